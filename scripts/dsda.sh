@@ -1,4 +1,4 @@
 #! /bin/sh
 
-python3 "$(dirname "$0")/dsda.py" "$@"
+python3 "$(dirname "$0")/../src/port/dsda.py" "$@"
 
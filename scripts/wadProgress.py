@@ -1,7 +1,10 @@
 import argparse
+import json
 import os
 import sys
 
+CACHE_FILE = ".progress.json"
+
 
 def env(parameter):
     result = os.environ.get(parameter.split("$")[-1])
@@ -23,16 +26,19 @@ def isDoom2Map(name):
 
 
 def countSequences(path, mapType):
+    return sequenceCount(os.listdir(path), mapType)
+
+
+def sequenceCount(names, mapType):
     check = isDoomMap if mapType == "doom" else isDoom2Map
 
     sequences = []
     sequence = []
 
-    dirList = os.listdir(path)
-    dirList.sort()
+    numbers = [ getNumber(name) for name in names if check(name) ]
+    numbers.sort()
 
-    for file in dirList:
-        number = getNumber(file)
+    for number in numbers:
         if len(sequence) == 0 or sequence[-1] == number - 1:
             sequence.append(number)
         else:
@@ -50,22 +56,23 @@ def getNumber(name):
 
 
 def getMapType(dirPath):
+    return mapTypeOf([ file for file in os.listdir(dirPath) if os.path.isdir(os.path.join(dirPath, file)) ], dirPath)
+
+
+def mapTypeOf(dirNames, dirPath):
     mapType = None
-    for file in os.listdir(dirPath):
-        fullPath = os.path.join(dirPath, file)
-        if os.path.isdir(fullPath):
-
-            if isDoom2Map(file):
-                if mapType == "doom":
-                    raise ValueError(f"Ambiguous directory {dirPath}.")
-                else:
-                    mapType = "doom2"
-
-            elif isDoomMap(file):
-                if mapType == "doom2":
-                    raise ValueError(f"Ambiguous directory {dirPath}.")
-                else:
-                    mapType = "doom"
+    for file in dirNames:
+        if isDoom2Map(file):
+            if mapType == "doom":
+                raise ValueError(f"Ambiguous directory {dirPath}.")
+            else:
+                mapType = "doom2"
+
+        elif isDoomMap(file):
+            if mapType == "doom2":
+                raise ValueError(f"Ambiguous directory {dirPath}.")
+            else:
+                mapType = "doom"
 
     if mapType is None:
         raise ValueError(f"Could not deduce map type for {dirPath}.")
@@ -73,11 +80,60 @@ def getMapType(dirPath):
     return mapType
 
 
+def readCache(filePath):
+    try:
+        with open(filePath, "r", encoding = "utf-8") as contents:
+            return json.load(contents)
+    except (OSError, ValueError):
+        return {}
+
+
+def targetProgress(dirPath, cache):
+    """
+        Map type and sequence count of a WAD directory, reusing the cached result while the directory is unchanged.
+
+        @param dirPath WAD directory holding one directory per map.
+        @param cache   Dictionary of directory name to cached result; updated in place.
+        @return Tuple of map type and sequence count, or (None, 0) for an empty directory.
+    """
+
+    target = os.path.basename(dirPath)
+    mtime = os.stat(dirPath).st_mtime_ns
+    cached = cache.get(target)
+
+    if cached and cached["mtime"] == mtime:
+        return cached["mapType"], cached["count"]
+
+    with os.scandir(dirPath) as entries:
+        dirNames = [ entry.name for entry in entries if entry.is_dir() ]
+
+    mapType = mapTypeOf(dirNames, dirPath) if dirNames else None
+    count = sequenceCount(dirNames, mapType) if mapType else 0
+
+    cache[target] = { "mtime": mtime, "mapType": mapType, "count": count }
+    return mapType, count
+
+
+def writeCache(filePath, cache):
+    temporary = f"{filePath}.tmp"
+    try:
+        with open(temporary, "w", encoding = "utf-8") as output:
+            json.dump(cache, output, indent = 4, sort_keys = True)
+        os.replace(temporary, filePath)
+    except OSError:
+        pass
+
+
 if __name__ == "__main__":
-    argv = sys.argv[1:]
+    argv = [ arg for arg in sys.argv[1:] if arg != "--full" ]
     argc = len(argv)
+    full = len(argv) != len(sys.argv[1:])
 
     baseDir = os.path.join(env("DOOM_DEMO_DIR"), "gzdoom", env("GZDOOM_LATEST_VERSION"), env("DOOM_PLAYER"))
+    cachePath = os.path.join(baseDir, CACHE_FILE)
+    cache = {} if full else readCache(cachePath)
+    oldCache = dict(cache)
+
     targets = None
     if argc >= 1:
         targets = [argv[0]]
@@ -88,12 +144,14 @@ if __name__ == "__main__":
 
     for target in targets:
         fullPath = os.path.join(baseDir, target)
-        if len(os.listdir()) == 0:
+        mapType, count = targetProgress(fullPath, cache)
+        if mapType is None:
             continue
 
-        mapType = getMapType(fullPath)
-
         maxAmount = 45 if target == "doom" else (36 if mapType == "doom" else 32)
 
         namePart = f"{target}:{(width - (len(target) + 1)) * ' '}"
-        print(f"{namePart}{round(10000 * countSequences(fullPath, mapType) / maxAmount) / 100}%")
+        print(f"{namePart}{round(10000 * count / maxAmount) / 100}%")
+
+    if cache != oldCache:
+        writeCache(cachePath, cache)
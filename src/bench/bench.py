@@ -0,0 +1,281 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SOURCE_DIRS = [ os.path.join(ROOT_DIR, "src", name) for name in [ "port", "web", "monster" ] ]
+SOURCE_DIRS.append(os.path.join(ROOT_DIR, "scripts"))
+
+# Results are kept in the launcher's cache directory.
+if SOURCE_DIRS[0] not in sys.path:
+    sys.path.append(SOURCE_DIRS[0])
+
+import portEnv
+
+RESULT_DIR = "bench"
+TREE_DIR = "doom-bench"
+THRESHOLD = 0.1
+
+
+def setUp(environment):
+    """
+        Point the environment at a synthetic tree and make the tools importable the way their scripts import each
+        other, as sibling modules.
+    """
+
+    os.environ.update(environment)
+    for path in SOURCE_DIRS:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def timeCall(function, repeat):
+    """
+        @return List of the wall times in seconds of `repeat` calls, after one untimed warm-up call.
+    """
+
+    function()
+
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        result.append(time.perf_counter() - start)
+    return result
+
+
+def benchmarks(environment, root):
+    """
+        @return Dictionary of benchmark name to a function of no arguments running it once.
+    """
+
+    import attempts
+    import gzdoom
+    import monster
+    import readWiki
+    import wadProgress
+
+    gzdoom.envSetting.cache_clear()
+
+    target = "pwad00000"
+    demoTarget = synthetic.demoTarget(environment["DOOM_DEMO_DIR"], target)
+    mapDir = os.path.join(demoTarget, "map01")
+    prefix = os.path.join(mapDir, f"{synthetic.PLAYER}-{target}-map01-uv-max")
+    monsters = os.path.join(root, "monsters.json")
+    pages = sorted([ os.path.join(root, "pages", name) for name in os.listdir(os.path.join(root, "pages")) ])
+
+    def quietly(function):
+        def result():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return function()
+        return result
+
+    def resolveLaunch():
+        gzdoom.readLaunch([ target, "-m", "1", "-x" ])
+
+    def scanAttempts():
+        attempts.scanAttempts(mapDir, ".lmp", gzdoom.storedDemos(mapDir))
+
+    def coldMonsters():
+        try:
+            os.remove(monster.cachePath(monsters))
+        except OSError:
+            pass
+        monster.parse(monsters)
+
+    def readPages():
+        for page in pages:
+            with open(page, "r", encoding = "utf-8") as contents:
+                readWiki.parse(readWiki.readChunks(contents))
+
+    return {
+        "readLaunch":       resolveLaunch,
+        "currentAttempt":   lambda: gzdoom.currentAttempt(prefix, ".lmp"),
+        "scanAttempts":     scanAttempts,
+        "storedDemos":      lambda: gzdoom.storedDemos(mapDir),
+        "listPWADs":        quietly(lambda: gzdoom.readLaunch([ target, "-l", "listPWADs" ])),
+        "countSequences":   lambda: wadProgress.countSequences(demoTarget, "doom2"),
+        "readWiki.parse":   readPages,
+        "monster.parse":    lambda: monster.parse(monsters),
+        "monster.cold":     coldMonsters
+    }
+
+
+def revision():
+    """
+        @return The checked out commit, with "+" appended when the work tree has changes; "unknown" outside git.
+    """
+
+    try:
+        commit = subprocess.run([ "git", "rev-parse", "--short", "HEAD" ], cwd = ROOT_DIR, capture_output = True,
+                                text = True, check = True).stdout.strip()
+        status = subprocess.run([ "git", "status", "--porcelain", "--untracked-files=no" ], cwd = ROOT_DIR,
+                                capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return f"{commit}+" if status else commit
+
+
+def run(environment, root, repeat, names = None):
+    """
+        @param names Benchmarks to run, all by default.
+        @return Dictionary of benchmark name to its timings: "best", "median" and "mean" in seconds, and "runs".
+    """
+
+    result = {}
+    for name, function in benchmarks(environment, root).items():
+        if names and name not in names:
+            continue
+
+        times = timeCall(function, repeat)
+        result[name] = {
+            "best":     min(times),
+            "median":   statistics.median(times),
+            "mean":     statistics.fmean(times),
+            "runs":     len(times)
+        }
+    return result
+
+
+def resultPath(resultDir, name):
+    return os.path.join(resultDir, f"{name}.json")
+
+
+def save(resultDir, name, sizes, results):
+    os.makedirs(resultDir, exist_ok = True)
+    path = resultPath(resultDir, name)
+    temporary = f"{path}.tmp"
+
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump({
+            "revision": name,
+            "date":     datetime.datetime.now().isoformat(timespec = "seconds"),
+            "sizes":    sizes,
+            "results":  results
+        }, output, indent = 4)
+    os.replace(temporary, path)
+
+    return path
+
+
+def load(resultDir, name):
+    with open(resultPath(resultDir, name), "r", encoding = "utf-8") as contents:
+        return json.load(contents)
+
+
+def compare(old, new, threshold = THRESHOLD):
+    """
+        Compare the median times of two saved runs.
+
+        @return List of (benchmark, old seconds, new seconds, new / old, verdict) for benchmarks in both runs; the
+                verdict is "slower" or "faster" past the threshold, "" otherwise.
+    """
+
+    result = []
+    for name, timings in new["results"].items():
+        if name not in old["results"]:
+            continue
+
+        before = old["results"][name]["median"]
+        after = timings["median"]
+        ratio = after / before if before else float("inf")
+
+        verdict = ""
+        if ratio > 1 + threshold:
+            verdict = "slower"
+        elif ratio < 1 - threshold:
+            verdict = "faster"
+
+        result.append((name, before, after, ratio, verdict))
+    return result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Launcher Benchmarks",
+                                     description = "Time the launcher and tools on a synthetic tree.")
+    parser.add_argument("compare", nargs = "*", help = "Two saved runs to compare instead of running, old then new.")
+
+    parser.add_argument("-a", "--attempts",     default = 200,
+                                                type    = int,
+                                                help    = "Attempts per map of each demo target.")
+
+    parser.add_argument("-b", "--benchmarks",   default = [],
+                                                nargs   = "*",
+                                                help    = "Benchmarks to run; all by default.")
+
+    parser.add_argument("-m", "--maps",         default = 32,
+                                                type    = int,
+                                                help    = "Maps per PWAD.")
+
+    parser.add_argument("-n", "--repeat",       default = 10,
+                                                type    = int,
+                                                help    = "Timed runs per benchmark.")
+
+    parser.add_argument("-o", "--output",       default = None,
+                                                help    = "Directory of saved runs; defaults to one in the cache.")
+
+    parser.add_argument("-p", "--pwads",        default = 2000,
+                                                type    = int,
+                                                help    = "PWAD directories.")
+
+    parser.add_argument("-s", "--save",         default = None,
+                                                help    = "Name to save the run under; defaults to the commit.")
+
+    parser.add_argument("-t", "--targets",      default = 4,
+                                                type    = int,
+                                                help    = "PWADs with recorded demos.")
+
+    parser.add_argument("-w", "--tree",         default = None,
+                                                help    = "Where to build the synthetic tree; reused while its sizes "
+                                                          "match.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    resultDir = args.output or os.path.join(portEnv.cacheDir(), RESULT_DIR)
+
+    if args.compare:
+        if len(args.compare) != 2:
+            print("Compare takes two saved runs.")
+            sys.exit(2)
+
+        old, new = [ load(resultDir, name) for name in args.compare ]
+        if old["sizes"] != new["sizes"]:
+            print(f"Warning: the runs used different trees, {old['sizes']} and {new['sizes']}.")
+
+        rows = compare(old, new)
+        print(f"{'benchmark':<16} {args.compare[0]:>12} {args.compare[1]:>12} {'ratio':>8}")
+        for name, before, after, ratio, verdict in rows:
+            print(f"{name:<16} {before * 1000:>10.3f}ms {after * 1000:>10.3f}ms {ratio:>8.2f}  {verdict}")
+        sys.exit(1 if any([ row[4] == "slower" for row in rows ]) else 0)
+
+    sizes = { "pwads": args.pwads, "maps": args.maps, "attempts": args.attempts, "targets": args.targets }
+    root = args.tree or os.path.join(tempfile.gettempdir(), TREE_DIR)
+    monsters = os.path.join(ROOT_DIR, "data", "monsters.json")
+
+    start = time.perf_counter()
+    environment = synthetic.load(root, sizes, monsters)
+    print(f"Tree: {root} ({time.perf_counter() - start:.1f}s)")
+
+    setUp(environment)
+    results = run(environment, root, args.repeat, args.benchmarks)
+
+    print(f"{'benchmark':<16} {'best':>12} {'median':>12}")
+    for name, timings in results.items():
+        print(f"{name:<16} {timings['best'] * 1000:>10.3f}ms {timings['median'] * 1000:>10.3f}ms")
+
+    name = args.save or revision()
+    print(f"Saved: {save(resultDir, name, sizes, results)}")
@@ -0,0 +1,180 @@
+import json
+import os
+import random
+import shutil
+import struct
+
+MARKER_FILE = ".synthetic.json"
+PLAYER = "Bencher"
+VERSION = "4.11"
+
+THINGS = {
+    "Monsters":         [ "Zombieman", "Shotgun_guy", "Imp", "Demon", "Baron_of_Hell", "Arch-vile", "Cyberdemon",
+                          "Hell_knight", "Revenant", "Mancubus" ],
+    "Weapons":          [ "Shotgun", "Super_shotgun", "Chaingun", "Rocket_launcher", "Plasma_gun", "BFG9000" ],
+    "Ammunition":       [ "Shells", "Box_of_shells", "Rocket", "Cell_charge", "Bullets" ],
+    "Health &amp; Armor": [ "Stimpack", "Medikit", "Green_armor", "Blue_armor" ],
+    "Items":            [ "Soul_sphere", "Megasphere", "Backpack" ],
+    "Keys":             [ "Blue_keycard", "Red_skull_key" ],
+    "Miscellaneous":    [ "Barrel" ],
+    "Multiplayer":      [ "Zombieman" ]
+}
+
+
+def writeWad(filePath, identification, lumps):
+    """
+        Write a WAD of empty-ish lumps; enough for the directory readers, nothing an engine could load.
+
+        @param identification "IWAD" or "PWAD".
+        @param lumps          Lump names, e.g. [ "MAP01", "THINGS" ].
+    """
+
+    body = b"\0" * 4
+    data = body * len(lumps)
+    directory = b"".join([ struct.pack("<ii8s", 12 + index * len(body), len(body), name.encode("ascii"))
+                           for index, name in enumerate(lumps) ])
+
+    with open(filePath, "wb") as output:
+        output.write(struct.pack("<4sii", identification.encode("ascii"), len(lumps), 12 + len(data)))
+        output.write(data)
+        output.write(directory)
+
+
+def mapLumps(maps):
+    result = []
+    for number in range(1, maps + 1):
+        result += [ f"MAP{number:02}", "THINGS", "LINEDEFS" ]
+    return result
+
+
+def wikiPage(filePath, filler, seed):
+    """
+        Write a level page shaped like the wiki's: filler paragraphs around the "Things" tables.
+    """
+
+    generator = random.Random(seed)
+    lines = [ "<html><body>" ] + [ f"<p>{'x' * 200}</p>" ] * filler
+    lines.append('<h2><span class="mw-headline" id="Things">Things</span></h2>')
+
+    for category, things in THINGS.items():
+        lines += [ '<table class="wikitable" style="text-align: right;">', "<tbody><tr>", f"<th>{category}</th>",
+                   "<th>ITYTD and HNTR</th>", "<th>HMP</th>", "<th>UV and NM</th>", "</tr>" ]
+        for thing in things:
+            counts = "".join([ f"<td>{generator.randint(0, 40)}</td>" for _ in range(3) ])
+            lines.append(f'<tr><td style="text-align: left;"><a href="/wiki/{thing}" title="{thing}">'
+                         f'{thing.replace("_", " ")}</a></td>{counts}</tr>')
+        lines.append("</tbody></table>")
+
+    lines += [ f"<p>{'x' * 200}</p>" ] * filler + [ "</body></html>" ]
+    with open(filePath, "w", encoding = "utf-8") as output:
+        output.write("\n".join(lines))
+
+
+def demoTarget(demoBase, target):
+    return os.path.join(demoBase, "gzdoom", VERSION, PLAYER, target)
+
+
+def build(root, pwads, maps, attempts, targets, monsters):
+    """
+        Build a DOOM_DIR, a GZDoom directory with a stub executable and a demo tree under root.
+
+        @param pwads    PWAD directories, each with a WAD of `maps` maps and a readme.
+        @param attempts Recorded attempts per map of each demo target.
+        @param targets  PWADs that get demos.
+        @param monsters Monster stats to copy in, so their cache is written inside the tree.
+        @return Dictionary of the environment settings of the tree.
+    """
+
+    doomDir = os.path.join(root, "doom")
+    demoBase = os.path.join(root, "demo")
+    executableDir = os.path.join(root, "gzdoom")
+
+    for iwad in [ "doom", "doom2" ]:
+        os.makedirs(os.path.join(doomDir, "iwad", iwad), exist_ok = True)
+    writeWad(os.path.join(doomDir, "iwad", "doom2", "doom2.wad"), "IWAD", mapLumps(32))
+    writeWad(os.path.join(doomDir, "iwad", "doom", "doom.wad"), "IWAD", [ "E1M1", "THINGS" ])
+
+    for index in range(pwads):
+        name = f"pwad{index:05}"
+        pwadDir = os.path.join(doomDir, "pwad", name)
+        os.makedirs(pwadDir, exist_ok = True)
+        writeWad(os.path.join(pwadDir, f"{name}.wad"), "PWAD", mapLumps(maps))
+        with open(os.path.join(pwadDir, "readme.txt"), "w", encoding = "utf-8") as output:
+            output.write(name)
+
+    os.makedirs(os.path.join(doomDir, "data"), exist_ok = True)
+    with open(os.path.join(doomDir, "data", "pwads.json"), "w", encoding = "utf-8") as output:
+        json.dump({ f"pwad{index:05}": { "iwad": "doom2" } for index in range(pwads) }, output, indent = 4)
+
+    for subDir in [ "addon", "mod" ]:
+        os.makedirs(os.path.join(executableDir, subDir), exist_ok = True)
+    for index in range(8):
+        writeWad(os.path.join(executableDir, "addon", f"addon{index}.wad"), "PWAD", [ "DEHACKED" ])
+    executable = os.path.join(executableDir, "gzdoom.exe")
+    with open(executable, "w", encoding = "utf-8") as output:
+        output.write("#!/bin/sh\nexit 0\n")
+    os.chmod(executable, 0o755)
+
+    for index in range(min(targets, pwads)):
+        target = f"pwad{index:05}"
+        for number in range(1, maps + 1):
+            mapName = f"map{number:02}"
+            mapDir = os.path.join(demoTarget(demoBase, target), mapName)
+            os.makedirs(mapDir, exist_ok = True)
+            for attempt in range(attempts):
+                demoName = f"{PLAYER}-{target}-{mapName}-uv-max_{attempt:03}.lmp"
+                with open(os.path.join(mapDir, demoName), "wb") as output:
+                    output.write(b"\0" * 16)
+
+    pageDir = os.path.join(root, "pages")
+    os.makedirs(pageDir, exist_ok = True)
+    for index, filler in enumerate([ 100, 1000, 10000 ]):
+        wikiPage(os.path.join(pageDir, f"level{index}.html"), filler, index)
+
+    shutil.copy(monsters, os.path.join(root, "monsters.json"))
+
+    homeDir = os.path.join(root, "home")
+    os.makedirs(os.path.join(homeDir, "doc", "annoy"), exist_ok = True)
+    os.makedirs(os.path.join(root, "cache"), exist_ok = True)
+
+    return {
+        "DOOM_CACHE_DIR":           os.path.join(root, "cache"),
+        "DOOM_DEMO_DIR":            demoBase,
+        "DOOM_DIR":                 doomDir,
+        "DOOM_IWAD_DIR":            os.path.join(doomDir, "iwad"),
+        "DOOM_PLAYER":              PLAYER,
+        "DOOM_PWAD_DIR":            os.path.join(doomDir, "pwad"),
+        "GZDOOM_EXE":               executable,
+        "GZDOOM_LATEST_VERSION":    VERSION,
+        "HOME":                     homeDir
+    }
+
+
+def load(root, sizes, monsters):
+    """
+        Reuse the tree under root if it was built with the same sizes, otherwise build it from scratch.
+
+        @param sizes Dictionary of the build arguments: pwads, maps, attempts and targets.
+        @return Dictionary of the environment settings of the tree.
+    """
+
+    markerPath = os.path.join(root, MARKER_FILE)
+    try:
+        with open(markerPath, "r", encoding = "utf-8") as contents:
+            marker = json.load(contents)
+    except (OSError, ValueError):
+        marker = None
+
+    if marker is not None and marker.get("sizes") == sizes:
+        return marker["environment"]
+
+    if marker is not None:
+        shutil.rmtree(root)
+    elif os.path.isdir(root) and os.listdir(root):
+        raise ValueError(f"Not a synthetic tree, won't build over it: {root}.")
+
+    environment = build(root, monsters = monsters, **sizes)
+    with open(markerPath, "w", encoding = "utf-8") as output:
+        json.dump({ "sizes": sizes, "environment": environment }, output, indent = 4)
+
+    return environment
@@ -0,0 +1,240 @@
+import argparse
+import json
+import sys
+
+import numpy
+
+import monster
+
+SKILLS = 5
+
+# Wiki tables have one column for ITYTD and HNTR, one for HMP and one for UV and NM.
+SKILL_COLUMNS = numpy.array([ 0, 0, 1, 2, 2 ])
+
+# Average damage of one unit of ammunition: a bullet, a shell (seven pellets), a rocket's direct hit, a plasma cell.
+UNIT_DAMAGE = {
+    "bullet": 10.0,
+    "shell":  70.0,
+    "rocket": 90.0,
+    "cell":   22.5
+}
+
+# Ammunition given by each pickup, weapons included, keyed by lowercase thing name.
+PICKUPS = {
+    "4 shotgun shells":      ("shell", 4),
+    "ammo clip":             ("bullet", 10),
+    "box of ammo":           ("bullet", 50),
+    "box of bullets":        ("bullet", 50),
+    "box of rockets":        ("rocket", 5),
+    "box of shells":         ("shell", 20),
+    "box of shotgun shells": ("shell", 20),
+    "cell charge":           ("cell", 20),
+    "cell charge pack":      ("cell", 100),
+    "chaingun":              ("bullet", 20),
+    "clip":                  ("bullet", 10),
+    "energy cell":           ("cell", 20),
+    "energy cell pack":      ("cell", 100),
+    "plasma gun":            ("cell", 40),
+    "plasma rifle":          ("cell", 40),
+    "bfg9000":               ("cell", 40),
+    "rocket":                ("rocket", 1),
+    "rocket launcher":       ("rocket", 2),
+    "shells":                ("shell", 4),
+    "shotgun":               ("shell", 8),
+    "shotgun shells":        ("shell", 4),
+    "super shotgun":         ("shell", 8)
+}
+
+# Pickups giving several kinds of ammunition, and weapons giving none.
+BUNDLES = {
+    "backpack": [ ("bullet", 10), ("shell", 4), ("rocket", 1), ("cell", 20) ],
+    "chainsaw": []
+}
+
+AMMO_DAMAGE = { name: UNIT_DAMAGE[unit] * amount for name, (unit, amount) in PICKUPS.items() }
+AMMO_DAMAGE.update({ name: sum([ UNIT_DAMAGE[unit] * amount for unit, amount in ammo ])
+                     for name, ammo in BUNDLES.items() })
+AMMO_CATEGORIES = [ "Ammunition", "Weapons" ]
+
+
+def skillCounts(counts):
+    """
+        @return Counts per skill level 1 to 5 from the counts per wiki column.
+    """
+
+    counts = numpy.asarray(counts, dtype = numpy.float64)
+    if counts.size == SKILLS:
+        return counts
+    if counts.size < 3:
+        counts = numpy.resize(counts, 3) if counts.size else numpy.zeros(3)
+    return counts[SKILL_COLUMNS]
+
+
+def countMatrix(levels, names, categories):
+    """
+        Put the thing counts of many levels into one array.
+
+        @param levels     List of levelData dictionaries.
+        @param names      Thing names, one per column; matched case-insensitively.
+        @param categories Categories of levelData to read.
+        @return Tuple of the maps x things x skills array and the set of names that weren't in names.
+    """
+
+    column = { name.lower(): index for index, name in enumerate(names) }
+    result = numpy.zeros((len(levels), len(names), SKILLS))
+    unknown = set()
+
+    for mapIndex, level in enumerate(levels):
+        for category in categories:
+            for name, counts in level.get(category, {}).items():
+                index = column.get(name.lower())
+                if index is None:
+                    unknown.add(name)
+                    continue
+                result[mapIndex, index] += skillCounts(counts)
+
+    return result, unknown
+
+
+class Budget:
+    """
+        Hit points and ammunition of many maps at once.
+
+        Monster and pickup counts are held as maps x things x skills arrays, so totals for every map and skill level are
+        one product with the HP or damage column.
+    """
+
+    _ammo        = None
+    _damage      = None
+    _hp          = None
+    _items       = []
+    _monsters    = []
+    _names       = []
+    _unknown     = set()
+    _unknownAmmo = set()
+
+    def __init__(self, levels, monsters, names = None):
+        """
+            @param levels   List of levelData dictionaries, one per map.
+            @param monsters Dictionary of name to Monster.
+            @param names    Map names, defaults to their index.
+        """
+
+        self._monsters = sorted(monsters)
+        self._hp       = numpy.array([ float(monsters[name].hp() or 0) for name in self._monsters ])
+        self._items    = sorted(AMMO_DAMAGE)
+        self._damage   = numpy.array([ AMMO_DAMAGE[name] for name in self._items ])
+        self._names    = list(names) if names is not None else [ str(index) for index in range(len(levels)) ]
+
+        self._counts, unknownMonsters = countMatrix(levels, self._monsters, [ "Monsters" ])
+        self._ammo, self._unknownAmmo = countMatrix(levels, self._items, AMMO_CATEGORIES)
+        self._unknown = unknownMonsters
+
+    def ammo(self):
+        """
+            @return Damage the ammunition of each map can deal, maps x skills.
+        """
+
+        return numpy.einsum("mis,i->ms", self._ammo, self._damage)
+
+    def hp(self):
+        """
+            @return Total monster hit points, maps x skills.
+        """
+
+        return numpy.einsum("mns,n->ms", self._counts, self._hp)
+
+    def names(self):
+        return self._names
+
+    def rank(self, skill = 4, key = "hp"):
+        """
+            @param skill Skill level, 1 to 5.
+            @param key   "hp" or "ratio".
+            @return Map indices ordered from the highest value down.
+        """
+
+        values = self.hp() if key == "hp" else self.ratio()
+        values = numpy.nan_to_num(values[:, skill - 1], nan = -numpy.inf)
+        return numpy.argsort(-values, kind = "stable")
+
+    def ratio(self):
+        """
+            @return Ammunition damage per monster hit point, maps x skills; NaN for maps without monsters.
+        """
+
+        hp = self.hp()
+        return numpy.divide(self.ammo(), hp, out = numpy.full(hp.shape, numpy.nan), where = hp > 0)
+
+    def unknown(self):
+        """
+            @return Monster names of the levels that have no stats.
+        """
+
+        return self._unknown
+
+    def unknownAmmo(self):
+        """
+            @return Ammunition and weapon names of the levels that aren't known pickups, so their ammunition isn't
+                    counted.
+        """
+
+        return self._unknownAmmo
+
+
+def readLevels(filePath):
+    """
+        Read levels as written by wadData.py, either the whole dataset or JSON lines.
+
+        @return Tuple of map names and levelData dictionaries.
+    """
+
+    with (open(filePath, "r", encoding = "utf-8") if filePath != "-" else sys.stdin) as contents:
+        raw = contents.read()
+
+    try:
+        records = json.loads(raw)["maps"]
+    except ValueError:
+        records = [ json.loads(line) for line in raw.splitlines() if line.strip() ]
+
+    records = [ record for record in records if record.get("data") ]
+    return [ record["page"] for record in records ], [ record["data"] for record in records ]
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Monster Budget", description = "HP and ammunition totals of many maps.")
+    parser.add_argument("levels", nargs = "?", default = "-", help = "Output of wadData.py, - for standard input.")
+
+    parser.add_argument("-k", "--key",          default = "hp",
+                                                choices = [ "hp", "ratio" ],
+                                                help    = "What to rank the maps by.")
+
+    parser.add_argument("-m", "--monsters",     default = "data/monsters.json",
+                                                help    = "Monster stats.")
+
+    parser.add_argument("-s", "--skill",        default = 4,
+                                                type    = int,
+                                                choices = range(1, SKILLS + 1),
+                                                help    = "Skill level to rank by.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    names, levels = readLevels(args.levels)
+    budget = Budget(levels, monster.parse(args.monsters), names)
+
+    hp = budget.hp()[:, args.skill - 1]
+    ammo = budget.ammo()[:, args.skill - 1]
+    ratio = budget.ratio()[:, args.skill - 1]
+
+    width = max([ len(name) for name in names ] + [ 3 ])
+    print(f"{'map':<{width}} {'hp':>10} {'ammo':>10} {'ratio':>7}")
+    for index in budget.rank(args.skill, args.key):
+        print(f"{names[index]:<{width}} {hp[index]:>10.0f} {ammo[index]:>10.0f} {ratio[index]:>7.2f}")
+
+    if budget.unknown():
+        print(f"No stats for: {', '.join(sorted(budget.unknown()))}")
+    if budget.unknownAmmo():
+        print(f"No ammunition for: {', '.join(sorted(budget.unknownAmmo()))}")
@@ -1,11 +1,15 @@
-raise NotImplementedError(f"{__file__} is not implemented.")
-
 import getopt
 import os
 import sys
 
-from web import readWiki
+# readWiki imports its siblings as top-level modules, so it is imported from its own directory, not as web.readWiki.
+WEB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web")
+if WEB_DIR not in sys.path:
+    sys.path.append(WEB_DIR)
+
+import budget
 import monster
+import readWiki
 
 
 def usage(scriptName = os.path.basename(__file__), exitCode = 0):
@@ -41,8 +45,4 @@ if __name__ == "__main__":
     data = readWiki.levelData(website)
     monsters = monster.parse("data/monsters.json")
 
-    hp = {}
-    for monster, amounts in data["Monsters"].items():
-        hp[monster] = amounts[-1] * monsters[monster].hp()
-
-    print(sum([value for _, value in hp.items()]))
+    print(budget.Budget([ data ], monsters).hp()[0, -1])
@@ -1,9 +1,23 @@
-raise NotImplementedError(f"{__file__} is not implemented.")
-
+import contextlib
+import hashlib
 import json
+import os
+import pickle
 import sys
 
-from web import readWiki
+# The cache directory is the one the web tools share, found through their own helper.
+WEB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web")
+if WEB_DIR not in sys.path:
+    sys.path.append(WEB_DIR)
+
+import webEnv
+
+CACHE_EXTENSION = ".cache"
+CACHE_VERSION = 1
+COPY_KEY = "Copy Of"
+
+# Fields a copy gives as a factor of the original's value; a missing original value counts as 1.
+RELATIVE = [ "HP", "Movement", "Projectile" ]
 
 
 def getOptional(dictionary, key):
@@ -11,11 +25,18 @@ def getOptional(dictionary, key):
 
 
 class Monster:
+    """
+        Resolved stats of one monster. Copies are already folded in, so every field is an absolute value.
+    """
+
+    __slots__ = ("myName", "myHp", "myModifiers", "myMovement", "myProjectile")
 
     def __init__(self, name, stats):
         self.myName = name
         self.myHp = getOptional(stats, "HP")
-        self.myModifiers = getOptional(stats, "Modifiers")
+        self.myModifiers = tuple(getOptional(stats, "Modifiers") or ())
+        self.myMovement = getOptional(stats, "Movement")
+        self.myProjectile = getOptional(stats, "Projectile") or {}
 
     def hp(self):
         return self.myHp
@@ -23,52 +44,178 @@ class Monster:
     def modifiers(self):
         return self.myModifiers
 
+    def movement(self):
+        return self.myMovement
+
+    def projectile(self):
+        return self.myProjectile
+
     def stats(self):
         return {
             "HP": self.myHp,
-            "Modifiers": self.myModifiers
+            "Modifiers": list(self.myModifiers),
+            "Movement": self.myMovement,
+            "Projectile": dict(self.myProjectile)
         }
 
     def name(self):
         return self.myName
 
 
-def copyMonsters(monsterData, copies):
-    toAdd = []
+def isNumber(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
 
-    for name, stats in copies.items():
-        monster = monsterData[stats["Copy Of"]]
-        toAdd.append(Monster(name, monster.stats()))
 
-    for addition in toAdd:
-        monsterData[addition.name()] = addition
+def modifiers(stats):
+    """
+        @return The modifiers of raw stats as a list, read from either "Modifier" or "Modifiers".
+    """
 
+    result = []
+    for key in [ "Modifier", "Modifiers" ]:
+        value = stats.get(key)
+        if value:
+            result += [ value ] if isinstance(value, str) else list(value)
+    return result
 
-def readMonsters(monsterData):
-    copies = {}
-    result = {}
 
+def scale(original, factor):
+    """
+        Apply a relative value of a copy to the original's value: numbers multiply, dictionaries apply per key.
+    """
+
+    if isinstance(factor, dict):
+        original = original if isinstance(original, dict) else {}
+        result = dict(original)
+        for key, value in factor.items():
+            result[key] = scale(original.get(key), value)
+        return result
+
+    if isNumber(factor):
+        return (original if isNumber(original) else 1) * factor
+
+    return factor
+
+
+def resolve(name, raw, resolved, chain = ()):
+    """
+        Work out the absolute stats of a monster, following "Copy Of" through any number of originals.
+
+        @param name     Monster name.
+        @param raw      Dictionary of name to stats as written in the source.
+        @param resolved Dictionary of name to already resolved stats, filled in as a side effect.
+        @return The resolved stats.
+    """
+
+    if name in resolved:
+        return resolved[name]
+    if name in chain:
+        raise ValueError(f"\"{COPY_KEY}\" loop: {' -> '.join(chain + (name,))}.")
+    if name not in raw:
+        raise ValueError(f"No such monster: {name}.")
+
+    stats = raw[name]
+    if COPY_KEY in stats:
+        original = resolve(stats[COPY_KEY], raw, resolved, chain + (name,))
+        result = dict(original)
+        for key, value in stats.items():
+            if key in RELATIVE:
+                result[key] = scale(original.get(key), value)
+            elif key not in [ COPY_KEY, "Modifier", "Modifiers" ]:
+                result[key] = value
+        result["Modifiers"] = original["Modifiers"] + [ item for item in modifiers(stats)
+                                                        if item not in original["Modifiers"] ]
+    else:
+        result = { key: value for key, value in stats.items() if key not in [ "Modifier", "Modifiers" ] }
+        result["Modifiers"] = modifiers(stats)
+
+    resolved[name] = result
+    return result
+
+
+def readMonsters(monsterData):
+    raw = {}
     for game in monsterData:
-        for name in monsterData[game]:
-            stats = monsterData[game][name]
+        raw.update(monsterData[game])
+
+    resolved = {}
+    return { name: Monster(name, resolve(name, raw, resolved)) for name in raw }
+
+
+def cachePath(filePath):
+    """
+        @return Path of the resolved cache of a monster table, in the cache directory and named after the table's
+                absolute path, so tables of the same name don't share one.
+    """
+
+    digest = hashlib.sha1(os.path.abspath(filePath).encode("utf-8")).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(filePath))[0]
+    return os.path.join(webEnv.cacheDir(), f"{name}-{digest}{CACHE_EXTENSION}")
+
 
-            if "Copy Of" in stats:
-                copies[name] = stats
-            else:
-                result[name] = Monster(name, stats)
+def sourceKey(filePath):
+    stat = os.stat(filePath)
+    return (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
 
-    return result, copies if len(copies) > 0 else None
+
+def readCache(filePath):
+    try:
+        with open(cachePath(filePath), "rb") as contents:
+            key, rows = pickle.load(contents)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+    if key != sourceKey(filePath):
+        return None
+
+    result = {}
+    for name, hp, monsterModifiers, movement, projectile in rows:
+        monster = Monster.__new__(Monster)
+        monster.myName = name
+        monster.myHp = hp
+        monster.myModifiers = monsterModifiers
+        monster.myMovement = movement
+        monster.myProjectile = projectile
+        result[name] = monster
+    return result
+
+
+def writeCache(filePath, monsters):
+    rows = [ (monster.myName, monster.myHp, monster.myModifiers, monster.myMovement, monster.myProjectile)
+             for monster in monsters.values() ]
+    path = cachePath(filePath)
+    temporary = f"{path}.tmp"
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(temporary, "wb") as output:
+            pickle.dump((sourceKey(filePath), rows), output, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
 
 
 def parse(filePath):
-    data = None
+    """
+        Read the monster table, from its resolved cache unless the source changed since the cache was written.
+
+        @param filePath Monster stats, e.g. data/monsters.json.
+        @return Dictionary of name to Monster.
+    """
+
+    result = readCache(filePath)
+    if result is not None:
+        return result
+
     with open(filePath, "r", encoding = "utf-8") as contents:
         data = json.load(contents)
 
+    result = readMonsters(data)
+    writeCache(filePath, result)
+    return result
 
-    monsters, copies = readMonsters(data)
-
-    if copies:
-        copyMonsters(monsters, copies)
 
-    return monsters
+if __name__ == "__main__":
+    for monster in parse(sys.argv[1] if len(sys.argv) > 1 else "data/monsters.json").values():
+        print(monster.name(), monster.stats())
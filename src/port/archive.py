@@ -0,0 +1,278 @@
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+ARCHIVE_FILE = "demos.zip"
+COMPRESS_LEVEL = 9
+EXTENSION = ".lmp"
+EXTRACT_DIR = "doom-demos"
+
+
+def archivePath(demoDir):
+    return os.path.join(demoDir, ARCHIVE_FILE)
+
+
+def attemptNumber(name):
+    """
+        @return The attempt number of a demo name like "Player-doom2-map01-uv-max_012.lmp", None for other names.
+    """
+
+    if not name.endswith(EXTENSION) or "_" not in name:
+        return None
+
+    number = name[:-len(EXTENSION)].rsplit("_", 1)[1]
+    return int(number) if number.isdigit() else None
+
+
+@functools.lru_cache(maxsize = 64)
+def cachedMembers(path, mtime):
+    with zipfile.ZipFile(path) as container:
+        return { info.filename: (info.file_size, info.CRC) for info in container.infolist() }
+
+
+def members(demoDir):
+    """
+        Read the index of a map directory's archive; the central directory only, nothing is decompressed.
+
+        @return Dictionary of demo name to (size, CRC), empty if the directory has no archive.
+    """
+
+    path = archivePath(demoDir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    try:
+        return cachedMembers(path, mtime)
+    except (OSError, zipfile.BadZipFile):
+        return {}
+
+
+def names(demoDir):
+    return set(members(demoDir))
+
+
+def read(filePath):
+    """
+        @param filePath Path a demo would have if it weren't archived.
+        @return The demo's bytes as a memoryview, or None if the archive of its directory doesn't hold it.
+    """
+
+    demoDir, name = os.path.split(filePath)
+    if name not in members(demoDir):
+        return None
+
+    with zipfile.ZipFile(archivePath(demoDir)) as container:
+        return memoryview(container.read(name))
+
+
+def contents(demoDir, skip = ()):
+    """
+        Read every archived demo of a map directory, opening the archive once.
+
+        @param skip Names to leave out.
+        @return Generator of (name, bytes as a memoryview).
+    """
+
+    if not members(demoDir):
+        return
+
+    with zipfile.ZipFile(archivePath(demoDir)) as container:
+        for info in container.infolist():
+            if info.filename not in skip:
+                yield info.filename, memoryview(container.read(info))
+
+
+def extract(filePath, targetDir = None):
+    """
+        Make an archived demo available as a file, for engines that need a path.
+
+        Files are named after the demo's CRC and name, so a demo extracted before is reused as it is.
+
+        @param filePath  Path a demo would have if it weren't archived.
+        @param targetDir Where to put the file, a directory in the temp directory by default.
+        @return Path of the extracted file, or None if the archive of its directory doesn't hold it.
+    """
+
+    demoDir, name = os.path.split(filePath)
+    member = members(demoDir).get(name)
+    if member is None:
+        return None
+
+    size, crc = member
+    targetDir = targetDir or os.path.join(tempfile.gettempdir(), EXTRACT_DIR)
+    result = os.path.join(targetDir, f"{crc:08x}-{name}")
+
+    if os.path.exists(result) and os.path.getsize(result) == size:
+        return result
+
+    os.makedirs(targetDir, exist_ok = True)
+    temporary = f"{result}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(archivePath(demoDir)) as container, open(temporary, "wb") as output:
+        output.write(container.read(name))
+    os.replace(temporary, result)
+
+    return result
+
+
+def looseAttempts(demoDir):
+    """
+        @return Dictionary of demo prefix to a list of (number, name) of the unarchived attempts, oldest first.
+    """
+
+    result = {}
+    with os.scandir(demoDir) as entries:
+        for entry in entries:
+            number = attemptNumber(entry.name)
+            if number is not None and entry.is_file():
+                result.setdefault(entry.name.rsplit("_", 1)[0], []).append((number, entry.name))
+
+    for attempts in result.values():
+        attempts.sort()
+    return result
+
+
+def rewrite(demoDir, additions, removals = ()):
+    """
+        Write a new archive with the members of the old one, minus removals, plus the added files, then swap it in.
+
+        @param additions List of demo names in demoDir to add; an added name replaces a member of the same name.
+        @param removals  Names of members to leave out.
+        @return True if an archive remains, False if it would be empty and was deleted.
+    """
+
+    path = archivePath(demoDir)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    skip = set(additions) | set(removals)
+    count = 0
+
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_DEFLATED, compresslevel = COMPRESS_LEVEL) as output:
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as container:
+                for info in container.infolist():
+                    if info.filename not in skip:
+                        output.writestr(info, container.read(info), zipfile.ZIP_DEFLATED, COMPRESS_LEVEL)
+                        count += 1
+
+        for name in additions:
+            output.write(os.path.join(demoDir, name), name)
+            count += 1
+
+    if count == 0:
+        os.remove(temporary)
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+
+    os.replace(temporary, path)
+    return True
+
+
+def pack(demoDir, keep = 0):
+    """
+        Move the attempts of a map directory into its archive, leaving the newest `keep` of each demo prefix loose.
+
+        The new archive is complete before any loose file is removed.
+
+        @return List of the names that were archived.
+    """
+
+    result = []
+    for attempts in looseAttempts(demoDir).values():
+        result += [ name for _, name in attempts[:max(0, len(attempts) - keep)] ]
+
+    if not result:
+        return result
+
+    rewrite(demoDir, sorted(result))
+    for name in result:
+        os.remove(os.path.join(demoDir, name))
+
+    return result
+
+
+def unpack(demoDir, wanted = None):
+    """
+        Move archived attempts back to loose files. Loose files that already exist are left as they are, and so are
+        the members of their names, which may differ from them.
+
+        @param wanted Names to unpack, all members by default.
+        @return List of the names that were unpacked.
+    """
+
+    available = members(demoDir)
+    result = []
+    for name in sorted(available):
+        if (wanted is None or name in wanted) and not os.path.exists(os.path.join(demoDir, name)):
+            result.append(name)
+
+    if not result:
+        return result
+
+    with zipfile.ZipFile(archivePath(demoDir)) as container:
+        for name in result:
+            target = os.path.join(demoDir, name)
+
+            info = container.getinfo(name)
+            temporary = f"{target}.tmp"
+            with open(temporary, "wb") as output:
+                output.write(container.read(info))
+            stamp = time.mktime(info.date_time + (0, 0, -1))
+            os.utime(temporary, (stamp, stamp))
+            os.replace(temporary, target)
+
+    rewrite(demoDir, [], result)
+    return result
+
+
+def mapDirs(paths, everything):
+    if not everything:
+        return paths
+
+    import demoStats
+
+    result = []
+    for path in paths:
+        result += [ dirPath for dirPath, _ in demoStats.findMapDirs(path) ]
+    return result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Demo Archive",
+                                     description = "Pack map directories' attempts into one file.")
+    parser.add_argument("action", choices = [ "pack", "unpack", "list" ])
+    parser.add_argument("paths", nargs = "+", help = "Map directories, or demo trees with -a.")
+
+    parser.add_argument("-a", "--all",          action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Treat the paths as demo trees and act on every map "
+                                                          "directory.")
+
+    parser.add_argument("-k", "--keep",         default = 0,
+                                                type    = int,
+                                                help    = "Newest attempts per demo to leave unpacked.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+
+    for demoDir in mapDirs(args.paths, args.all):
+        if args.action == "pack":
+            done = pack(demoDir, args.keep)
+        elif args.action == "unpack":
+            done = unpack(demoDir)
+        else:
+            done = sorted(members(demoDir), key = lambda name: (name.rsplit("_", 1)[0], attemptNumber(name) or 0))
+
+        if done:
+            print(f"{demoDir}: {len(done)}")
+            for name in done:
+                print(f"    {name}")
@@ -0,0 +1,137 @@
+import contextlib
+import json
+import os
+import sys
+
+INDEX_FILE = ".attempts.json"
+
+
+def attemptNumber(fileName, prefix, extension):
+    """
+        Parse the attempt number out of a demo file name.
+
+        @param fileName  Base name of the file, e.g. "Player-doom2-map01-uv-max_012.lmp".
+        @param prefix    Base name of the demo prefix, e.g. "Player-doom2-map01-uv-max".
+        @param extension Demo file extension including the dot.
+        @return The attempt number, or None if the name doesn't belong to the prefix.
+    """
+
+    start = len(prefix) + 1
+    end = len(fileName) - len(extension)
+
+    if end <= start or not fileName.startswith(f"{prefix}_") or not fileName.endswith(extension):
+        return None
+
+    number = fileName[start:end]
+    return int(number) if number.isdigit() else None
+
+
+def indexPath(demoDir):
+    return os.path.join(demoDir, INDEX_FILE)
+
+
+def readIndex(demoDir):
+    try:
+        with open(indexPath(demoDir), "r", encoding = "utf-8") as contents:
+            return json.load(contents)
+    except (OSError, ValueError):
+        return {}
+
+
+def writeIndex(demoDir, index):
+    """
+        Save the index of a demo directory. The index only saves scans, so a failed write is reported and the launch
+        goes on; the temporary file is removed so it doesn't lie next to the demos.
+
+        @return True if the index was written.
+    """
+
+    path = indexPath(demoDir)
+    temporary = f"{path}.tmp"
+
+    try:
+        with open(temporary, "w", encoding = "utf-8") as output:
+            json.dump(index, output, indent = 4, sort_keys = True)
+        os.replace(temporary, path)
+    except OSError as error:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        print(f"Warning: can't write the attempt index {path}: {error}", file = sys.stderr)
+        return False
+
+    return True
+
+
+def scanAttempts(demoDir, extension, stored = ()):
+    """
+        Rebuild the index of a demo directory with a single directory scan.
+
+        @param demoDir   Directory holding the demos of one map.
+        @param extension Demo file extension including the dot.
+        @param stored    Names of demos of the directory that are kept elsewhere and count as taken.
+        @return Dictionary of demo prefix to next free attempt number.
+    """
+
+    result = {}
+
+    if not os.path.isdir(demoDir):
+        return result
+
+    with os.scandir(demoDir) as entries:
+        names = [ entry.name for entry in entries ]
+
+    for name in names + list(stored):
+        if not name.endswith(extension) or "_" not in name:
+            continue
+
+        prefix = name.rsplit("_", 1)[0]
+        number = attemptNumber(name, prefix, extension)
+        if number is None:
+            continue
+
+        result[prefix] = max(result.get(prefix, 0), number + 1)
+
+    return result
+
+
+def nextAttempt(filePath, extension, demoFile, stored = ()):
+    """
+        Find the next free attempt number for a demo path prefix.
+
+        The number is read from the index file of the demo directory and checked against at most a couple of files. If
+        the index disagrees with the directory it is rebuilt from one scan of the directory.
+
+        @param filePath  Demo path prefix, as built by demoFileSetup.
+        @param extension Demo file extension including the dot.
+        @param demoFile  Function building the full demo path from prefix, number and extension.
+        @param stored    Names of demos of the directory that are kept elsewhere and count as taken.
+        @return The next attempt number.
+    """
+
+    demoDir, prefix = os.path.split(filePath)
+    index = readIndex(demoDir)
+    number = index.get(prefix)
+    stored = set(stored)
+
+    def taken(number):
+        path = demoFile(filePath, number, extension)
+        return os.path.exists(path) or os.path.basename(path) in stored
+
+    rebuilt = False
+    isValid = isinstance(number, int) and number >= 0
+    if isValid and number > 0 and not taken(number - 1):
+        isValid = False
+
+    if isValid:
+        while taken(number):
+            number += 1
+    else:
+        index = scanAttempts(demoDir, extension, stored)
+        number = index.get(prefix, 0)
+        rebuilt = True
+
+    if os.path.isdir(demoDir) and (rebuilt or index.get(prefix) != number):
+        index[prefix] = number
+        writeIndex(demoDir, index)
+
+    return number
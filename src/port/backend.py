@@ -0,0 +1,139 @@
+import os
+
+DEHACKED_EXTENSIONS = [ "bex", "deh" ]
+
+
+def extension(filePath):
+    return os.path.splitext(filePath)[1][1:].lower()
+
+
+class Backend:
+    """
+        Command line of one source port, built from a resolved Launch.
+
+        Launch resolves the files, IWAD, map and demo path for its port; a backend only decides how the port is told
+        about them. Subclasses set the environment settings of their executable and version and implement
+        `arguments`. REQUIRES_DIRS tells whether the "addon" and "mod" directories next to the executable must exist.
+    """
+
+    EXECUTABLE_ENV = ""
+    NAME = ""
+    REQUIRES_DIRS = True
+    SETTING_ARGS = {
+        "fast":     "-fast",
+        "nomo":     "-nomonsters",
+        "respawn":  "-respawn"
+    }
+    VERSION_ENV = ""
+
+    _executablePath = ""
+
+    def __init__(self, executablePath):
+        self._executablePath = str(executablePath)
+
+    def arguments(self, launch):
+        raise NotImplementedError
+
+    def command(self, launch, demoPath = None):
+        """
+            @param launch   The resolved Launch.
+            @param demoPath Demo to record or play back instead of the launch's own.
+            @return Command list starting with this port's executable.
+        """
+
+        result = [ self._executablePath ] + self.arguments(launch)
+
+        if not launch.practice():
+            result.extend([ launch.demoCommand(), demoPath or launch.demoPath() ])
+
+        return result
+
+    def executablePath(self):
+        return self._executablePath
+
+    def settings(self, launch):
+        return [ self.SETTING_ARGS[setting] for setting, value in launch.settings().items() if value ]
+
+
+class GZDoom(Backend):
+    EXECUTABLE_ENV = "GZDOOM_EXE"
+    NAME = "gzdoom"
+    VERSION_ENV = "GZDOOM_LATEST_VERSION"
+
+    def arguments(self, launch):
+        result = []
+        result.extend([ "-compatmode", launch.compatibility() ])
+        result.extend([ "-iwad", launch.iwadPath() ])
+        result.extend([ "-file" ] + launch.files())
+        result.extend([ "-skill", launch.skill() ])
+        result.extend([ "-warp" ] + launch.warp())
+        result.extend(self.settings(launch))
+        return result
+
+    def command(self, launch, demoPath = None):
+        result = super().command(launch, demoPath)
+
+        if int(launch.track()):
+            result.extend([ "+set", "idmus", launch.track() ])
+
+        return result
+
+
+class Dsda(Backend):
+    """
+        dsda-doom. It can't load the GZDoom add-ons and mods (pk3 and the like), so only WADs are passed as files and
+        DeHackEd patches with -deh. The complevel comes from the target's "complevel" in the configuration, if it has
+        one; otherwise dsda-doom picks it.
+    """
+
+    EXECUTABLE_ENV = "DSDA_EXE"
+    NAME = "dsda"
+    REQUIRES_DIRS = False
+    VERSION_ENV = "DSDA_LATEST_VERSION"
+
+    def arguments(self, launch):
+        wads = [ path for path in launch.files() if extension(path) == "wad" ]
+        patches = [ path for path in launch.files() if extension(path) in DEHACKED_EXTENSIONS ]
+
+        result = []
+        result.extend([ "-iwad", launch.iwadPath() ])
+        if wads:
+            result.extend([ "-file" ] + wads)
+        if patches:
+            result.extend([ "-deh" ] + patches)
+
+        complevel = launch.configuration().get(launch.target(), {}).get("complevel")
+        if complevel is not None:
+            result.extend([ "-complevel", str(complevel) ])
+
+        result.extend([ "-skill", launch.skill() ])
+        result.extend([ "-warp" ] + launch.warp())
+        result.extend(self.settings(launch))
+        return result
+
+
+BACKENDS = { backend.NAME: backend for backend in [ GZDoom, Dsda ] }
+
+
+def get(name):
+    """
+        @param name Port name, e.g. "gzdoom" or "dsda".
+        @return The backend class.
+    """
+
+    if name not in BACKENDS:
+        raise ValueError(f"No such port: {name}; known ports are {', '.join(sorted(BACKENDS))}.")
+    return BACKENDS[name]
+
+
+def executableDirs():
+    """
+        @return Directories of the executables of every port whose executable is configured.
+    """
+
+    result = []
+    for backend in BACKENDS.values():
+        executable = os.environ.get(backend.EXECUTABLE_ENV)
+        if executable:
+            result.append(os.path.dirname(executable))
+    return result
@@ -0,0 +1,270 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import backend
+import gzdoom
+
+SETTING_TO_ARG = { setting: arg for arg, setting in gzdoom.ARG_TO_SETTING.items() }
+
+
+def entryFromDemo(filePath):
+    """
+        Build a manifest entry from a demo path of the demo tree.
+
+        @param filePath Demo file, named as demoFileSetup names them.
+        @return Manifest entry, or None if the name doesn't fit.
+    """
+
+    parts = gzdoom.parseDemoName(os.path.basename(filePath))
+    if parts is None:
+        return None
+
+    mapName = parts["map"]
+    mapNumbers = [ mapName[1], mapName[3] ] if mapName[0] == "e" else [ mapName[3:] ]
+
+    dirParts = os.path.normpath(filePath).split(os.sep)
+    isTest = len(dirParts) >= 5 and dirParts[-5] == ".test"
+    mapper = dirParts[-4] if isTest else ""
+    versionIndex = -7 if isTest else -5
+    version = dirParts[versionIndex] if len(dirParts) >= -versionIndex else ""
+    executable = dirParts[versionIndex - 1] if len(dirParts) > -versionIndex else ""
+
+    return {
+        "player":       parts["player"],
+        "executable":   executable,
+        "version":      version,
+        "target":       parts["target"],
+        "map":          mapNumbers,
+        "skill":        parts["difficulty"],
+        "demo":         parts["number"],
+        "category":     parts["category"],
+        "mapper":       mapper,
+        "settings":     [ setting for setting, value in parts["settings"].items() if value ]
+    }
+
+
+def entryArgs(entry, executable = None):
+    """
+        @param executable Name of the port executable the entry is resolved for, e.g. "dsda-doom". The entry's version
+                          only applies if the entry doesn't name a different executable; otherwise the port's own
+                          default version is used.
+        @return readLaunch arguments for a manifest entry.
+        @raise ValueError If the entry has no demo number; the queue only plays demos back, it never records.
+    """
+
+    try:
+        demo = int(entry["demo"])
+    except (KeyError, TypeError, ValueError):
+        demo = -1
+
+    if demo < 0:
+        raise ValueError(f"No demo number to play back: {entry.get('demo')}.")
+
+    result = [ str(entry["target"]) ]
+
+    mapNumbers = entry.get("map")
+    if mapNumbers:
+        mapNumbers = mapNumbers.split() if isinstance(mapNumbers, str) else mapNumbers
+        result += [ "-m" ] + [ str(number) for number in mapNumbers ]
+
+    result += [ "-s", str(entry.get("skill", "4")) ]
+    result += [ "-d", str(demo) ]
+    result += [ "-c", str(entry.get("category", "max")) ]
+
+    if entry.get("mapper"):
+        result += [ "-t", entry["mapper"] ]
+    if entry.get("player"):
+        result += [ "-p", entry["player"] ]
+    if ownsVersion(entry, executable):
+        result += [ "-r", entry["version"] ]
+
+    for setting in entry.get("settings", []):
+        result.append(SETTING_TO_ARG[setting])
+
+    return result + list(entry.get("args", []))
+
+
+def ownsVersion(entry, executable):
+    """
+        @return Whether the entry's version is one of the port with this executable name.
+    """
+
+    return bool(entry.get("version")) and entry.get("executable", executable) in [ executable, "", None ]
+
+
+def readManifest(manifestPath, patterns):
+    result = []
+
+    if manifestPath:
+        with open(manifestPath, "r", encoding = "utf-8") as contents:
+            result += json.load(contents)
+
+    for pattern in patterns:
+        for filePath in sorted(glob.glob(pattern, recursive = True)):
+            entry = entryFromDemo(filePath)
+            if entry is not None:
+                result.append(entry)
+
+    return result
+
+
+def run(job, timeout):
+    """
+        Run one prepared command and time it.
+
+        @param job     Tuple of manifest entry, port name and command list.
+        @param timeout Seconds before the run is killed, None to wait forever.
+        @return Result record of the run.
+    """
+
+    entry, port, command = job
+    result = { "entry": entry, "port": port, "command": command, "exitCode": None, "timedOut": False, "error": None }
+
+    start = time.perf_counter()
+    try:
+        result["exitCode"] = subprocess.run(command,
+                                            stdin   = subprocess.DEVNULL,
+                                            stdout  = subprocess.DEVNULL,
+                                            stderr  = subprocess.DEVNULL,
+                                            timeout = timeout).returncode
+    except subprocess.TimeoutExpired:
+        result["timedOut"] = True
+    except OSError as error:
+        result["error"] = str(error)
+
+    result["wallTime"] = time.perf_counter() - start
+    return result
+
+
+def runAll(entries, workers, timeout, executable = None, extraArgs = (), timeDemo = False, portNames = None):
+    """
+        Resolve every manifest entry and run the playbacks through a bounded pool.
+
+        Resolution happens up front and one at a time, against one catalog; only the engine runs are parallel. Each
+        entry's files, IWAD and map are resolved once, with the port that recorded it if that port is one of them;
+        every other port only builds its own command and looks up its own demo, under its own version directory. An
+        executable given here only replaces the program that is run, so a stub can stand in for the ports without
+        changing the demo paths.
+
+        @param portNames Ports to play every entry with, e.g. [ "gzdoom", "dsda" ]; GZDoom alone by default.
+        @return Generator of result records, in order of completion.
+    """
+
+    ports = {}
+    for port in portNames or [ backend.GZDoom.NAME ]:
+        portBackend = backend.get(port)
+        executablePath = gzdoom.envSetting(portBackend.EXECUTABLE_ENV)
+        ports[port] = (portBackend(executablePath), os.path.basename(executablePath).split(".")[0])
+
+    catalog = gzdoom.loadCatalog()
+
+    def failed(entry, port, error):
+        return { "entry": entry, "port": port, "command": None, "exitCode": None, "timedOut": False,
+                 "error": str(error), "wallTime": 0.0 }
+
+    jobs = []
+    for entry in entries:
+        order = sorted(ports, key = lambda port: ports[port][1] != entry.get("executable"))
+        launch = None
+
+        while order and launch is None:
+            port = order.pop(0)
+            try:
+                launch = gzdoom.readLaunch(entryArgs(entry, ports[port][1]), catalog = catalog, port = port)
+                commands = [ (port, launch.command()) ]
+            except (OSError, ValueError) as error:
+                yield failed(entry, port, error)
+
+        if launch is None:
+            continue
+
+        for port in order:
+            portBackend, executableName = ports[port]
+            version = entry["version"] if ownsVersion(entry, executableName) else \
+                      gzdoom.envSetting(portBackend.VERSION_ENV)
+            demoPath = launch.portDemoPath(executableName, version)
+
+            if os.path.exists(demoPath):
+                commands.append((port, portBackend.command(launch, demoPath)))
+            else:
+                yield failed(entry, port, f"File for -playdemo doesn't exist. {demoPath}")
+
+        for port, command in commands:
+            if executable:
+                command[0] = executable
+            if timeDemo:
+                command = [ "-timedemo" if part == "-playdemo" else part for part in command ]
+
+            jobs.append((entry, port, command + list(extraArgs)))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = [ executor.submit(run, job, timeout) for job in jobs ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "DOOM Batch", description = "Unattended demo playback queue.")
+
+    parser.add_argument("manifest",             nargs   = "?",
+                                                default = None,
+                                                help    = "JSON list of entries: target, map, skill, demo, ...")
+
+    parser.add_argument("-a", "--arguments",    default = [],
+                                                nargs   = "*",
+                                                help    = "Extra engine arguments for every run.")
+
+    parser.add_argument("-e", "--executable",   default = None,
+                                                help    = "Program to run instead of GZDoom, e.g. a stub for testing.")
+
+    parser.add_argument("-g", "--glob",         default = [],
+                                                nargs   = "*",
+                                                help    = "Demo file patterns to add to the manifest.")
+
+    parser.add_argument("-j", "--workers",      default = os.cpu_count(),
+                                                type    = int,
+                                                help    = "Parallel runs.")
+
+    parser.add_argument("-o", "--output",       default = None,
+                                                help    = "Results file (JSON lines); defaults to standard output.")
+
+    parser.add_argument("-p", "--ports",        default = [ backend.GZDoom.NAME ],
+                                                nargs   = "+",
+                                                choices = sorted(backend.BACKENDS),
+                                                help    = "Ports to play every entry with.")
+
+    parser.add_argument("-t", "--timeout",      default = None,
+                                                type    = float,
+                                                help    = "Seconds per run before it is killed.")
+
+    parser.add_argument("-T", "--timedemo",     action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Use -timedemo instead of -playdemo so the engine quits.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    entries = readManifest(args.manifest, args.glob)
+    output = open(args.output, "w", encoding = "utf-8") if args.output else sys.stdout
+
+    failures = 0
+    try:
+        for record in runAll(entries, args.workers, args.timeout, args.executable, args.arguments, args.timedemo,
+                             args.ports):
+            failures += record["exitCode"] != 0
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    sys.exit(1 if failures else 0)
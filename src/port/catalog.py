@@ -0,0 +1,182 @@
+import json
+import os
+
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1
+
+MAX_DEPTH = 3
+
+
+def extension(name):
+    return name.split(".")[-1].lower() if "." in name else ""
+
+
+class Catalog:
+    """
+        Cached listing of the directories holding IWADs, PWADs and add-on files.
+
+        Every directory below the roots (down to MAX_DEPTH) is stored with its modification time, its files and its
+        subdirectories. A refresh only lists directories whose modification time changed since the last run.
+    """
+
+    _cachePath = ""
+    _changed   = False
+    _dirs      = {}
+    _roots     = []
+
+    def __init__(self, cachePath, roots):
+        self._cachePath = str(cachePath)
+        self._changed   = False
+        self._dirs      = {}
+        self._roots     = []
+
+        for root in roots:
+            path = os.path.normpath(str(root))
+            if path not in self._roots:
+                self._roots.append(path)
+
+    def changed(self):
+        return self._changed
+
+    def dirs(self, dirPath):
+        entry = self._dirs.get(os.path.normpath(dirPath))
+        return None if entry is None else list(entry["dirs"])
+
+    def files(self, dirPath, ignore = ()):
+        """
+            List the loadable files of a cataloged directory.
+
+            @param dirPath Directory to list.
+            @param ignore  Extensions (without dot) to leave out.
+            @return Full paths of the files, or None if the directory isn't covered by the catalog.
+        """
+
+        dirPath = os.path.normpath(dirPath)
+        entry = self._dirs.get(dirPath)
+        if entry is None:
+            return None
+
+        return [ os.path.join(dirPath, name) for name in entry["files"] if extension(name) not in ignore ]
+
+    def isDir(self, path):
+        """
+            @return True or False if the catalog knows the answer, None if the path is outside of it.
+        """
+
+        path = os.path.normpath(path)
+        if path in self._dirs:
+            return True
+
+        parent, name = os.path.split(path)
+        entry = self._dirs.get(parent)
+        if entry is None:
+            return None
+
+        return name in entry["dirs"]
+
+    def isFile(self, path):
+        """
+            @return True or False if the catalog knows the answer, None if the path is outside of it.
+        """
+
+        parent, name = os.path.split(os.path.normpath(path))
+        entry = self._dirs.get(parent)
+        if entry is None:
+            return None
+
+        return name in entry["files"]
+
+    def paths(self):
+        return list(self._dirs)
+
+    def read(self):
+        try:
+            with open(self._cachePath, "r", encoding = "utf-8") as contents:
+                data = json.load(contents)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == CATALOG_VERSION:
+            self._dirs = data.get("dirs", {})
+
+    def refresh(self):
+        cached = self._dirs
+        self._dirs = {}
+
+        for root in self._roots:
+            self.visit(root, 0, cached)
+
+        if set(cached) != set(self._dirs):
+            self._changed = True
+
+        return self
+
+    def roots(self):
+        return list(self._roots)
+
+    def visit(self, dirPath, depth, cached):
+        if dirPath in self._dirs:
+            return
+
+        try:
+            mtime = os.stat(dirPath).st_mtime_ns
+        except OSError:
+            return
+
+        entry = cached.get(dirPath)
+        if entry is None or entry["mtime"] != mtime:
+            entry = { "mtime": mtime, "files": [], "dirs": [] }
+            try:
+                with os.scandir(dirPath) as entries:
+                    for item in entries:
+                        if item.is_dir():
+                            entry["dirs"].append(item.name)
+                        elif item.is_file():
+                            entry["files"].append(item.name)
+            except OSError:
+                return
+
+            entry["files"].sort()
+            entry["dirs"].sort()
+            self._changed = True
+
+        self._dirs[dirPath] = entry
+
+        if depth >= MAX_DEPTH:
+            return
+
+        for name in entry["dirs"]:
+            if name[0] != ".":
+                self.visit(os.path.join(dirPath, name), depth + 1, cached)
+
+    def write(self):
+        data = { "version": CATALOG_VERSION, "roots": self._roots, "dirs": self._dirs }
+        temporary = f"{self._cachePath}.tmp"
+
+        try:
+            with open(temporary, "w", encoding = "utf-8") as output:
+                json.dump(data, output)
+            os.replace(temporary, self._cachePath)
+        except OSError:
+            return
+
+        self._changed = False
+
+
+def load(cachePath, roots):
+    """
+        Read the catalog cache, rescan what changed and write it back if needed.
+
+        @param cachePath File the catalog is cached in.
+        @param roots     Directories to catalog.
+        @return The up to date Catalog.
+    """
+
+    result = Catalog(cachePath, roots)
+    result.read()
+    result.refresh()
+
+    if result.changed():
+        result.write()
+
+    return result
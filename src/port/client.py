@@ -0,0 +1,127 @@
+import argparse
+import datetime
+import json
+import os
+import socket
+import sys
+import time
+
+import portEnv
+
+PORT_SCRIPTS = { "gzdoom": "gzdoom.py", "dsda": "dsda.py" }
+SOCKET_FILE = "launcher.sock"
+
+
+def socketPath():
+    runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return os.path.join(runtimeDir, f"doom-{SOCKET_FILE}")
+
+    return os.path.join(portEnv.cacheDir(), SOCKET_FILE)
+
+
+def send(request):
+    """
+        @return The daemon's reply, or None if there is no daemon to answer.
+    """
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(socketPath())
+            with connection.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode("utf-8") + b"\n")
+                stream.flush()
+                return json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def fallback(argv, port):
+    """
+        Launch without the daemon, replacing this process with the port's script, e.g. gzdoom.py.
+    """
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), PORT_SCRIPTS[port])
+    os.execv(sys.executable, [ sys.executable, script ] + argv)
+
+
+def run(command):
+    """
+        Start the engine as a child and wait for it, the way gzdoom.py's runCommand does, without its imports.
+
+        @return Tuple of the exit code and the seconds the engine ran.
+    """
+
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execvp(command[0], command)
+        except OSError as error:
+            print(f"Can't run {command[0]}: {error}.", file = sys.stderr)
+        os._exit(127)
+
+    while True:
+        try:
+            _, status = os.waitpid(pid, 0)
+            break
+        except InterruptedError:
+            continue
+
+    return os.waitstatus_to_exitcode(status), time.perf_counter() - start
+
+
+def clock(label):
+    current = datetime.datetime.now().replace(microsecond = 0)
+    print(f"{label}{current.strftime('%H:%M:%S')}")
+    return current
+
+
+def readArgs(argv):
+    """
+        Take the client's own options off the command line; everything else goes to the launcher.
+
+        @return Tuple of the parsed options and the launcher's arguments.
+    """
+
+    parser = argparse.ArgumentParser(prog = "Launcher Client", add_help = False, allow_abbrev = False)
+
+    parser.add_argument("--port",               choices = sorted(PORT_SCRIPTS),
+                                                default = "gzdoom",
+                                                help    = "Source port to launch.")
+
+    return parser.parse_known_args(argv)
+
+
+if __name__ == "__main__":
+    args, argv = readArgs(sys.argv[1:])
+    reply = send({ "type":          "launch",
+                   "argv":          argv,
+                   "environment":   dict(os.environ),
+                   "cwd":           os.getcwd(),
+                   "port":          args.port })
+
+    if reply is None or reply.get("fallback"):
+        fallback(argv, args.port)
+
+    sys.stdout.write(reply.get("output", ""))
+
+    if reply.get("error"):
+        print(reply["error"], file = sys.stderr)
+        sys.exit(1)
+
+    if not reply.get("command"):
+        sys.exit(reply.get("exitCode", 0))
+
+    start = clock("| Start:       ")
+    print("Running...")
+    sys.stdout.flush()
+
+    exitCode, runtime = run(reply["command"])
+
+    print(f"| Total:       {clock('| Finish:      ') - start}")
+    if reply["record"]:
+        print(f"Wrote demo to: {reply['demoPath']}")
+
+    send({ "type": "finish", "token": reply["token"], "exitCode": exitCode, "runtime": runtime })
+    sys.exit(exitCode)
@@ -0,0 +1,407 @@
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import errno
+import io
+import json
+import os
+import select
+import socket
+import sys
+import time
+import uuid
+
+import backend as ports
+import gzdoom
+import portEnv
+import profiler
+import telemetry
+
+REQUEST_TIMEOUT = 10
+SOCKET_FILE = "launcher.sock"
+SESSION_AGE = 24 * 60 * 60
+
+IN_MODIFY       = 0x00000002
+IN_ATTRIB       = 0x00000004
+IN_CLOSE_WRITE  = 0x00000008
+IN_MOVED_FROM   = 0x00000040
+IN_MOVED_TO     = 0x00000080
+IN_CREATE       = 0x00000100
+IN_DELETE       = 0x00000200
+IN_DELETE_SELF  = 0x00000400
+IN_MOVE_SELF    = 0x00000800
+IN_NONBLOCK     = 0o4000
+IN_CLOEXEC      = 0o2000000
+IN_ONLYDIR      = 0x01000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | \
+             IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+
+def socketPath():
+    """
+        @return Path of the daemon's socket, in XDG_RUNTIME_DIR if there is one, else in the cache directory.
+    """
+
+    runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return os.path.join(runtimeDir, f"doom-{SOCKET_FILE}")
+
+    return os.path.join(portEnv.cacheDir(), SOCKET_FILE)
+
+
+class Watcher:
+    """
+        inotify watches on a set of directories, through ctypes; any event on any of them counts as a change.
+
+        Raises OSError when inotify isn't available, so the caller can fall back to polling.
+    """
+
+    _fd = -1
+    _libc = None
+    _watched = set()
+
+    def __init__(self):
+        name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(name, use_errno = True)
+        self._watched = set()
+
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "No inotify.")
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def changed(self):
+        """
+            Drain the pending events.
+
+            @return True if there were any.
+        """
+
+        result = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return result
+
+            if not data:
+                return result
+            result = True
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def fileno(self):
+        return self._fd
+
+    def watch(self, paths):
+        """
+            Add watches for directories that aren't watched yet.
+
+            @raise OSError When the watch limit is reached.
+        """
+
+        for path in paths:
+            if path in self._watched:
+                continue
+
+            if self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK) < 0:
+                error = ctypes.get_errno()
+                if error in [ errno.ENOENT, errno.ENOTDIR, errno.EACCES ]:
+                    continue
+                raise OSError(error, f"{os.strerror(error)}: {path}")
+
+            self._watched.add(path)
+
+
+class Daemon:
+    """
+        Resident launcher answering launch requests over a Unix socket.
+
+        The catalog stays loaded between launches and is only refreshed after inotify reports a change in one of its
+        directories; without inotify it is refreshed for every launch, which checks each directory's mtime. The
+        configuration is read once per modification. The engine itself is started by the client, so the demo path of
+        a recording stays reserved until the client reports back; a second launch meanwhile gets the next number.
+    """
+
+    _catalog = None
+    _reserved = {}
+    _roots = []
+    _server = None
+    _sessions = {}
+    _watcher = None
+
+    def __init__(self, path, poll = False):
+        self._catalog  = None
+        self._reserved = {}
+        self._roots    = []
+        self._sessions = {}
+        self._watcher  = None
+
+        if not poll:
+            try:
+                self._watcher = Watcher()
+            except OSError as error:
+                print(f"No inotify, polling instead: {error}.")
+
+        if os.path.exists(path):
+            if isRunning(path):
+                raise ValueError(f"A daemon is running on {path} already.")
+            os.remove(path)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            self._server.bind(path)
+        finally:
+            os.umask(umask)
+        self._server.listen(16)
+
+    def catalog(self):
+        """
+            @return The catalog for the current environment, refreshed only if something changed since it was loaded.
+        """
+
+        roots = gzdoom.catalogRoots()
+        isStale = self._catalog is None or roots != self._roots or self._watcher is None
+
+        if self._watcher is not None and self._watcher.changed():
+            isStale = True
+
+        if not isStale:
+            return self._catalog
+
+        self._catalog = gzdoom.loadCatalog()
+        self._roots = roots
+
+        if self._watcher is not None:
+            try:
+                self._watcher.watch(self._catalog.paths())
+            except OSError as error:
+                print(f"Can't watch the catalog, polling instead: {error}.")
+                self._watcher.close()
+                self._watcher = None
+
+        return self._catalog
+
+    def close(self):
+        path = self._server.getsockname()
+        self._server.close()
+        if self._watcher is not None:
+            self._watcher.close()
+
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+    def finish(self, request):
+        token = request.get("token")
+        if not isinstance(token, str):
+            return { "error": "Bad request: no token." }
+
+        self._reserved.pop(token, None)
+        session = self._sessions.pop(token, None)
+        if session is None:
+            return {}
+
+        runtime = request.get("runtime")
+        exitCode = request.get("exitCode")
+        session.add("runtime", float(runtime) if isinstance(runtime, (int, float)) else 0.0)
+        session.finish(exitCode if isinstance(exitCode, int) else None, True)
+        session.save()
+        return {}
+
+    def handle(self, connection):
+        """
+            Answer one request. A broken request gets an error reply and never stops the daemon.
+
+            @return False if the request asked the daemon to stop.
+        """
+
+        connection.settimeout(REQUEST_TIMEOUT)
+        with connection, connection.makefile("rwb") as stream:
+            try:
+                request = json.loads(stream.readline())
+            except (OSError, ValueError):
+                return True
+
+            kind = request.get("type") if isinstance(request, dict) else None
+            try:
+                if kind == "launch":
+                    reply = self.launch(request)
+                elif kind == "finish":
+                    reply = self.finish(request)
+                else:
+                    reply = {} if kind == "stop" else { "error": "Bad request: no type." }
+            except Exception as error:
+                reply = { "error": f"{type(error).__name__}: {error}" }
+
+            try:
+                stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+                stream.flush()
+            except OSError:
+                pass
+
+        return kind != "stop"
+
+    def launch(self, request):
+        """
+            Resolve a launch in this process, the way gzdoom.py or dsda.py would for the requested port, up to the
+            point of starting the engine.
+
+            @return Reply with the output so far and either the command for the client to run, or the exit code of a
+                    launch that doesn't run anything.
+        """
+
+        problem = launchProblem(request)
+        if problem:
+            return { "error": f"Bad request: {problem}" }
+
+        argv = list(request["argv"])
+        environment = request["environment"]
+        if "-q" in argv or "--profile" in argv or environment.get(profiler.ENVIRONMENT):
+            return { "fallback": True }
+
+        session = telemetry.Session()
+        output = io.StringIO()
+
+        try:
+            os.environ.clear()
+            os.environ.update(environment)
+            os.chdir(request["cwd"])
+            gzdoom.envSetting.cache_clear()
+
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                launch = gzdoom.readLaunch(argv, session, self.catalog(), request.get("port", ports.GZDoom.NAME),
+                                           set(self._reserved.values()))
+
+                if launch.customAction() or not launch.launch():
+                    exitCode = launch.execute(session)
+                    if not launch.customAction():
+                        session.finish(exitCode, False)
+                        session.save()
+                    return { "output": output.getvalue(), "exitCode": exitCode }
+
+                gzdoom.annoy()
+                launch.say(launch)
+                print(f"| Attempt:     #{launch.attempts()}.")
+        except SystemExit as error:
+            return { "output": output.getvalue(), "exitCode": error.code if isinstance(error.code, int) else 2 }
+        except Exception as error:
+            return { "output": output.getvalue(), "error": f"{type(error).__name__}: {error}" }
+
+        session.describe(launch.details())
+        token = uuid.uuid4().hex
+        self.prune()
+        self._sessions[token] = session
+        if launch.record():
+            self._reserved[token] = launch.demoPath()
+
+        return {
+            "output":   output.getvalue(),
+            "command":  launch.command(),
+            "demoPath": launch.demoPath(),
+            "record":   launch.record(),
+            "token":    token
+        }
+
+    def prune(self):
+        oldest = time.time() - SESSION_AGE
+        for token, session in list(self._sessions.items()):
+            if session.entry()["started"] < oldest:
+                del self._sessions[token]
+                self._reserved.pop(token, None)
+
+    def serve(self):
+        sources = [ self._server ] + ([] if self._watcher is None else [ self._watcher ])
+        while True:
+            readable, _, _ = select.select(sources, [], [])
+
+            if self._watcher is not None and self._watcher in readable and self._watcher.changed():
+                self._catalog = None
+
+            if self._server in readable:
+                connection, _ = self._server.accept()
+                if not self.handle(connection):
+                    return
+
+            if self._watcher is None and len(sources) > 1:
+                sources = [ self._server ]
+
+
+def launchProblem(request):
+    """
+        @return What is wrong with the shape of a launch request, None if nothing is.
+    """
+
+    if not isinstance(request.get("argv"), list) or not all([ isinstance(arg, str) for arg in request["argv"] ]):
+        return "argv must be a list of strings."
+    if not isinstance(request.get("environment"), dict) or \
+       not all([ isinstance(value, str) for value in request["environment"].values() ]):
+        return "environment must map names to strings."
+    if not isinstance(request.get("cwd"), str):
+        return "cwd must be a string."
+    if not isinstance(request.get("port", ""), str):
+        return "port must be a string."
+    return None
+
+
+def isRunning(path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(path)
+    except OSError:
+        return False
+    return True
+
+
+def send(path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        with connection.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            return json.loads(stream.readline() or "{}")
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Launcher Daemon", description = "Keep the launcher's state warm.")
+
+    parser.add_argument("-p", "--poll",         action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Don't use inotify; check directory mtimes every launch.")
+
+    parser.add_argument("-s", "--stop",         action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Stop the running daemon.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    path = socketPath()
+
+    if args.stop:
+        if not isRunning(path):
+            print(f"No daemon on {path}.")
+            sys.exit(1)
+        send(path, { "type": "stop" })
+        sys.exit(0)
+
+    daemon = Daemon(path, args.poll)
+    print(f"Listening on {path}.")
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
@@ -0,0 +1,332 @@
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import sys
+
+import portEnv
+
+CHUNK_SIZE = 1024 * 1024
+EXTENSION = ".lmp"
+HASH_FILE = "dedupHashes.json"
+LINK_SUFFIX = ".dedup.tmp"
+MANIFEST_FILE = ".dedup.json"
+MANIFEST_VERSION = 1
+
+
+def manifestPath(demoBase):
+    return os.path.join(demoBase, MANIFEST_FILE)
+
+
+@functools.lru_cache(maxsize = 4)
+def cachedManifest(path, mtime):
+    try:
+        with open(path, "r", encoding = "utf-8") as contents:
+            data = json.load(contents)
+    except (OSError, ValueError):
+        return {}
+
+    return data.get("references", {}) if data.get("version") == MANIFEST_VERSION else {}
+
+
+def readManifest(demoBase):
+    """
+        @return Dictionary of relative path of a removed duplicate to the relative path of the demo it equals.
+    """
+
+    path = manifestPath(demoBase)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    return cachedManifest(path, mtime)
+
+
+def writeManifest(demoBase, references):
+    path = manifestPath(demoBase)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump({ "version": MANIFEST_VERSION, "references": references }, output, indent = 4, sort_keys = True)
+    os.replace(temporary, path)
+
+
+def relative(filePath, demoBase):
+    return os.path.relpath(os.path.abspath(filePath), os.path.abspath(demoBase)).replace(os.sep, "/")
+
+
+def referenced(filePath, demoBase):
+    """
+        Follow the references of a removed duplicate to the demo at the end of the chain, for references to demos that
+        were deduplicated by reference themselves later.
+
+        @return Path of the demo a removed duplicate refers to, None if the path isn't in the manifest.
+    """
+
+    references = readManifest(demoBase)
+    path = relative(filePath, demoBase)
+    seen = { path }
+
+    while path in references and references[path] not in seen:
+        path = references[path]
+        seen.add(path)
+
+    return os.path.join(demoBase, *path.split("/")) if len(seen) > 1 else None
+
+
+def remove(filePath, demoBase):
+    """
+        Remove a demo of the tree without breaking the references to it: if removed duplicates refer to it, the file
+        moves to the first of them instead, and the others are repointed to it.
+
+        @return Path the demo moved to, None if it was deleted.
+    """
+
+    references = dict(readManifest(demoBase))
+    path = relative(filePath, demoBase)
+    referring = sorted([ duplicate for duplicate, equal in references.items() if equal == path ])
+
+    if not referring:
+        os.remove(filePath)
+        return None
+
+    survivor = referring[0]
+    result = os.path.join(demoBase, *survivor.split("/"))
+    os.makedirs(os.path.dirname(result), exist_ok = True)
+    os.rename(filePath, result)
+
+    del references[survivor]
+    for duplicate in referring[1:]:
+        references[duplicate] = survivor
+    writeManifest(demoBase, references)
+
+    return result
+
+
+def resolve(filePath, demoBase):
+    """
+        @return The file a demo path can be read from: itself, or the demo a removed duplicate refers to; None if
+                neither exists.
+    """
+
+    if os.path.exists(filePath):
+        return filePath
+
+    result = referenced(filePath, demoBase)
+    return result if result is not None and os.path.exists(result) else None
+
+
+def storedNames(demoDir, demoBase):
+    """
+        @return Base names of the removed duplicates of a directory that are still reachable through the manifest.
+    """
+
+    references = readManifest(demoBase)
+    if not references:
+        return set()
+
+    prefix = relative(demoDir, demoBase) + "/"
+    return { path[len(prefix):] for path in references if path.startswith(prefix) and "/" not in path[len(prefix):] }
+
+
+def sha256(filePath):
+    result = hashlib.sha256()
+    with open(filePath, "rb") as contents:
+        for block in iter(lambda: contents.read(CHUNK_SIZE), b""):
+            result.update(block)
+    return result.hexdigest()
+
+
+def readHashes(hashPath):
+    try:
+        with open(hashPath, "r", encoding = "utf-8") as contents:
+            return json.load(contents)
+    except (OSError, ValueError):
+        return {}
+
+
+def writeHashes(hashPath, hashes):
+    temporary = f"{hashPath}.tmp"
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump(hashes, output)
+    os.replace(temporary, hashPath)
+
+
+def demos(demoBase):
+    """
+        @return Dictionary of demo path to its stat result, for every demo of the tree.
+    """
+
+    result = {}
+    for dirPath, _, fileNames in os.walk(demoBase):
+        for fileName in fileNames:
+            if fileName.endswith(EXTENSION):
+                filePath = os.path.join(dirPath, fileName)
+                result[filePath] = os.stat(filePath)
+    return result
+
+
+def duplicates(demoBase, hashPath, workers = 4):
+    """
+        Find groups of identical demos.
+
+        Only files sharing their size with a file of another inode are hashed, and hashes are kept between runs for
+        files whose size, mtime and inode didn't change.
+
+        @return List of groups, each a sorted list of paths with equal content and at least two inodes.
+    """
+
+    bySize = {}
+    for filePath, stat in demos(demoBase).items():
+        bySize.setdefault(stat.st_size, []).append((filePath, stat))
+
+    candidates = []
+    for group in bySize.values():
+        if len({ (stat.st_dev, stat.st_ino) for _, stat in group }) > 1:
+            candidates += group
+
+    hashes = readHashes(hashPath)
+    fresh = {}
+    toHash = []
+
+    for filePath, stat in candidates:
+        key = f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+        cached = hashes.get(filePath)
+        if cached and cached["key"] == key:
+            fresh[filePath] = cached
+        else:
+            fresh[filePath] = { "key": key, "sha256": None }
+            toHash.append(filePath)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        for filePath, digest in zip(toHash, executor.map(sha256, toHash)):
+            fresh[filePath]["sha256"] = digest
+
+    if fresh != hashes:
+        writeHashes(hashPath, fresh)
+
+    byHash = {}
+    for filePath, stat in candidates:
+        byHash.setdefault(fresh[filePath]["sha256"], []).append((filePath, stat))
+
+    result = []
+    for group in byHash.values():
+        if len({ (stat.st_dev, stat.st_ino) for _, stat in group }) > 1:
+            result.append(sorted([ filePath for filePath, _ in group ]))
+    return result
+
+
+def link(source, duplicate):
+    """
+        Replace a file with a hardlink to another one, atomically.
+    """
+
+    temporary = f"{duplicate}{LINK_SUFFIX}"
+    os.link(source, temporary)
+    try:
+        os.replace(temporary, duplicate)
+    except OSError:
+        os.remove(temporary)
+        raise
+
+
+def deduplicate(demoBase, hashPath, dryRun = False, references = False, workers = 4):
+    """
+        Replace duplicate demos with hardlinks to the first path of their group.
+
+        When a hardlink can't be made, e.g. across file systems, the duplicate is removed and recorded in the manifest
+        instead, but only if references are allowed; otherwise it is left alone and reported. References to a removed
+        duplicate are repointed to the demo it equals.
+
+        @return Dictionary with "linked", "referenced" and "failed" lists and the bytes "saved".
+    """
+
+    result = { "linked": [], "referenced": [], "failed": [], "saved": 0 }
+    manifest = dict(readManifest(demoBase))
+
+    for group in duplicates(demoBase, hashPath, workers):
+        source = group[0]
+        sourceStat = os.stat(source)
+        removals = []
+
+        for duplicate in group[1:]:
+            stat = os.stat(duplicate)
+            if (stat.st_dev, stat.st_ino) == (sourceStat.st_dev, sourceStat.st_ino):
+                continue
+
+            if dryRun:
+                result["linked"].append((duplicate, source))
+                result["saved"] += stat.st_size
+                continue
+
+            try:
+                link(source, duplicate)
+                result["linked"].append((duplicate, source))
+                result["saved"] += stat.st_size
+            except OSError as error:
+                if references:
+                    removals.append((duplicate, stat.st_size))
+                else:
+                    result["failed"].append((duplicate, str(error)))
+
+        if not removals:
+            continue
+
+        for duplicate, _ in removals:
+            removed = relative(duplicate, demoBase)
+            for path, equal in list(manifest.items()):
+                if equal == removed:
+                    manifest[path] = relative(source, demoBase)
+            manifest[removed] = relative(source, demoBase)
+        writeManifest(demoBase, manifest)
+
+        for duplicate, size in removals:
+            os.remove(duplicate)
+            result["referenced"].append((duplicate, source))
+            result["saved"] += size
+
+    return result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Demo Dedup", description = "Hardlink identical demos of the demo tree.")
+
+    parser.add_argument("-b", "--base",         default = None,
+                                                help    = "Demo tree root (DOOM_DEMO_DIR).")
+
+    parser.add_argument("-j", "--workers",      default = 4,
+                                                type    = int,
+                                                help    = "Files hashed in parallel.")
+
+    parser.add_argument("-n", "--dryRun",       action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Only print what would be linked.")
+
+    parser.add_argument("-r", "--references",   action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Remove duplicates that can't be hardlinked and record them "
+                                                          "in the manifest.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import gzdoom
+
+    args = readArgs(sys.argv[1:])
+    demoBase = args.base or gzdoom.envSetting("DOOM_DEMO_DIR")
+
+    result = deduplicate(demoBase, os.path.join(portEnv.cacheDir(), HASH_FILE), args.dryRun, args.references,
+                         args.workers)
+
+    for key in [ "linked", "referenced", "failed" ]:
+        print(f"{key}: {len(result[key])}")
+        for first, second in result[key]:
+            print(f"    {first} -> {second}" if key != "failed" else f"    {first}: {second}")
+    print(f"saved: {result['saved']} bytes")
+
+    sys.exit(1 if result["failed"] else 0)
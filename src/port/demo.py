@@ -0,0 +1,523 @@
+import io
+import os
+import struct
+
+CHUNK_SIZE  = 1 << 16
+END_MARKER  = 0x80
+HEADER_READ = 1024
+TICRATE     = 35
+
+BOOM_VERSIONS     = { 200, 201, 202, 203, 210, 211, 212, 213, 214 }
+BOOM_OPTIONS      = 64
+BOOM_PLAYERS      = 32
+EXTENDED_VERSION  = 255
+LONGTICS_VERSION  = 111
+LONGTICS_VERSIONS = { LONGTICS_VERSION, 214, 221 }
+MBF21_OPTIONS     = 21
+MBF21_VERSION     = 221
+VANILLA_VERSIONS  = { 104, 105, 106, 107, 108, 109, LONGTICS_VERSION }
+VANILLA_PLAYERS   = 4
+
+EXTENDED_SIGNATURE = b"PR+UM"
+UMAPINFO           = b"UMAPINFO"
+
+TIC      = struct.Struct("<bbBB")
+LONG_TIC = struct.Struct("<bbhB")
+
+BUTTON_ATTACK  = 0x01
+BUTTON_USE     = 0x02
+BUTTON_CHANGE  = 0x04
+BUTTON_SPECIAL = 0x80
+
+ZDOOM_FORM   = b"FORM"
+ZDOOM_TYPE   = b"ZDEM"
+ZDOOM_HEADER = b"ZDHD"
+ZDOOM_VARS   = b"VARS"
+ZDOOM_BODY   = b"BODY"
+
+ZDOOM_FAST_MONSTERS   = 1 << 15
+ZDOOM_MONSTER_RESPAWN = 1 << 13
+ZDOOM_NO_MONSTERS     = 1 << 12
+
+ZDOOM_USERCMD      = 1
+ZDOOM_STOP         = 6
+ZDOOM_SERVERINFO   = 8
+ZDOOM_EMPTYUSERCMD = 41
+
+# Payload of the other demo commands a recording holds: "s" is a string, a digit that many bytes.
+ZDOOM_COMMANDS = {
+    3:  "s",
+    4:  "s",
+    5:  "s",
+    7:  "s",
+    9:  "1",
+    10: "s4",
+    11: "1s",
+    12: "1",
+    13: "s",
+    14: "",
+    16: "",
+    17: "",
+    18: "4",
+    19: "",
+    20: "ss",
+    25: "s",
+    28: "1s"
+}
+
+ZDOOM_BUTTONS = 0x01
+ZDOOM_PITCH   = 0x02
+ZDOOM_YAW     = 0x04
+ZDOOM_FORWARD = 0x08
+ZDOOM_SIDE    = 0x10
+ZDOOM_UP      = 0x20
+ZDOOM_ROLL    = 0x40
+
+ZDOOM_SHORT = struct.Struct(">h")
+
+
+def emptyHeader(formatName, version):
+    return {
+        "format":       formatName,
+        "version":      version,
+        "skill":        None,
+        "episode":      None,
+        "map":          None,
+        "mapName":      None,
+        "deathmatch":   False,
+        "respawn":      False,
+        "fast":         False,
+        "nomonsters":   False,
+        "player":       0,
+        "players":      [],
+        "longtics":     False,
+        "headerSize":   0
+    }
+
+
+def isMemory(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def openDemo(source):
+    """
+        @param source A demo file, or the bytes of a demo already in memory, e.g. read from an archive.
+        @return A binary file object for it.
+    """
+
+    return io.BytesIO(source) if isMemory(source) else open(source, "rb")
+
+
+def readHeader(filePath):
+    """
+        Read the header of a demo.
+
+        Vanilla (1.4 - 1.9, longtics), pre-1.4, Boom/MBF, PrBoom+ (210 - 214), MBF21 (221), the extended format (255)
+        around any of them, and ZDoom (GZDoom) demos are understood.
+
+        @param filePath The demo file, or its bytes.
+        @return Dictionary of header fields; skill is 1-5 like SKILLS, episode/map are numbers where the format has
+                them.
+    """
+
+    with openDemo(filePath) as contents:
+        data = contents.read(4)
+
+        if data == ZDOOM_FORM:
+            return readZDoomHeader(contents)
+
+        data += contents.read(HEADER_READ)
+
+    if data[:1] != bytes([ EXTENDED_VERSION ]):
+        return readClassicHeader(data, filePath)
+
+    start, mapName = readExtensions(data, filePath)
+    result = readClassicHeader(data[start:], filePath)
+    result["headerSize"] += start
+    if mapName:
+        result["mapName"] = mapName
+    return result
+
+
+def readExtensions(data, filePath):
+    """
+        Skip the extensions in front of an extended (255) demo's real header.
+
+        @return Tuple of the offset of the real header and the UMAPINFO map name, if the demo has one.
+    """
+
+    if data[1:6] != EXTENDED_SIGNATURE:
+        raise ValueError(f"Unsupported extended demo: {filePath}.")
+
+    try:
+        count = struct.unpack_from("<H", data, 7)[0]
+        position = 9
+        isUmapinfo = False
+
+        for _ in range(count):
+            length = data[position]
+            isUmapinfo = isUmapinfo or data[position + 1:position + 1 + length] == UMAPINFO
+            position += 1 + length
+    except (IndexError, struct.error):
+        raise ValueError(f"Demo too short: {filePath}.")
+
+    mapName = None
+    if isUmapinfo:
+        mapName = data[position:position + 8].split(b"\0")[0].decode("ascii", "replace").lower()
+        position += 8
+
+    if position >= len(data):
+        raise ValueError(f"Demo too short: {filePath}.")
+
+    return position, mapName
+
+
+def readClassicHeader(data, filePath):
+    if len(data) < 7:
+        raise ValueError(f"Demo too short: {filePath}.")
+
+    version = data[0]
+
+    if version <= 4:
+        result = emptyHeader("old", None)
+        result["skill"], result["episode"], result["map"] = data[0] + 1, data[1], data[2]
+        result["players"] = [ bool(value) for value in data[3:3 + VANILLA_PLAYERS] ]
+        result["headerSize"] = 3 + VANILLA_PLAYERS
+        return result
+
+    if version in VANILLA_VERSIONS:
+        if len(data) < 9 + VANILLA_PLAYERS:
+            raise ValueError(f"Demo too short: {filePath}.")
+
+        result = emptyHeader("vanilla", version)
+        result["skill"], result["episode"], result["map"] = data[1] + 1, data[2], data[3]
+        result["deathmatch"], result["respawn"] = bool(data[4]), bool(data[5])
+        result["fast"], result["nomonsters"] = bool(data[6]), bool(data[7])
+        result["player"] = data[8]
+        result["players"] = [ bool(value) for value in data[9:9 + VANILLA_PLAYERS] ]
+        result["longtics"] = version == LONGTICS_VERSION
+        result["headerSize"] = 9 + VANILLA_PLAYERS
+        return result
+
+    if version in BOOM_VERSIONS or version == MBF21_VERSION:
+        options = 13
+
+        if version == MBF21_VERSION:
+            if len(data) < options + MBF21_OPTIONS:
+                raise ValueError(f"Demo too short: {filePath}.")
+            flags = options + 3
+            playerStart = options + MBF21_OPTIONS + data[options + MBF21_OPTIONS - 1]
+        else:
+            flags = options + 6
+            playerStart = options + (256 if version == 200 else BOOM_OPTIONS)
+
+        if len(data) < playerStart + BOOM_PLAYERS:
+            raise ValueError(f"Demo too short: {filePath}.")
+
+        result = emptyHeader("mbf21" if version == MBF21_VERSION else "boom", version)
+        result["skill"], result["episode"], result["map"] = data[8] + 1, data[9], data[10]
+        result["deathmatch"], result["player"] = bool(data[11]), data[12]
+        result["respawn"], result["fast"], result["nomonsters"] = (bool(value) for value in data[flags:flags + 3])
+        result["players"] = [ bool(value) for value in data[playerStart:playerStart + BOOM_PLAYERS] ]
+        result["longtics"] = version in LONGTICS_VERSIONS
+        result["headerSize"] = playerStart + BOOM_PLAYERS
+        return result
+
+    raise ValueError(f"Unsupported demo version {version}: {filePath}.")
+
+
+def readZDoomHeader(contents):
+    form = contents.read(8)
+    if len(form) < 8 or form[4:] != ZDOOM_TYPE:
+        raise ValueError(f"Not a ZDoom demo: {getattr(contents, 'name', 'in memory')}.")
+
+    result = emptyHeader("zdoom", None)
+
+    while True:
+        chunk = contents.read(8)
+        if len(chunk) < 8:
+            break
+
+        name, size = chunk[:4], struct.unpack(">I", chunk[4:])[0]
+        if name == ZDOOM_BODY:
+            result["headerSize"] = contents.tell()
+            break
+
+        data = contents.read(size + (size & 1))
+
+        if name == ZDOOM_HEADER and len(data) >= 4:
+            result["version"] = struct.unpack(">H", data[:2])[0]
+            mapName = data[4:].split(b"\0")[0].decode("ascii", "replace").lower()
+            result["mapName"] = mapName
+
+            if len(mapName) == 4 and mapName[0] == "e" and mapName[2] == "m":
+                result["episode"], result["map"] = int(mapName[1]), int(mapName[3])
+            elif mapName.startswith("map") and mapName[3:].isdigit():
+                result["episode"], result["map"] = 1, int(mapName[3:])
+
+        elif name == ZDOOM_VARS:
+            values = data[:size].split(b"\0")[0].decode("ascii", "replace").split("\\")
+            variables = dict(zip(values[1::2], values[2::2]))
+
+            if variables.get("skill", "").isdigit():
+                result["skill"] = int(variables["skill"]) + 1
+            if variables.get("dmflags", "").isdigit():
+                dmflags = int(variables["dmflags"])
+                result["fast"] = bool(dmflags & ZDOOM_FAST_MONSTERS)
+                result["respawn"] = bool(dmflags & ZDOOM_MONSTER_RESPAWN)
+                result["nomonsters"] = bool(dmflags & ZDOOM_NO_MONSTERS)
+
+    return result
+
+
+def mismatches(header, skill, mapName, warp):
+    """
+        Compare a demo header against the skill and map of a launch.
+
+        @param header  Header as returned by readHeader.
+        @param skill   Skill number, 1-5.
+        @param mapName Map name as given by parseMap, e.g. "map07" or "e2m4".
+        @param warp    Map numbers as given by parseMap.
+        @return List of descriptions of what doesn't match; empty if the demo fits.
+    """
+
+    result = []
+
+    if header["skill"] is not None and header["skill"] != int(skill):
+        result.append(f"skill {header['skill']} instead of {skill}")
+
+    if header["mapName"]:
+        if header["mapName"] != mapName:
+            result.append(f"map {header['mapName']} instead of {mapName}")
+    elif header["map"] is not None:
+        numbers = [ header["episode"], header["map"] ] if len(warp) == 2 else [ header["map"] ]
+        if numbers != [ int(number) for number in warp ]:
+            result.append(f"map {numbers} instead of {list(warp)}")
+
+    return result
+
+
+def tics(filePath):
+    """
+        Stream the tic commands of a demo without loading it into memory.
+
+        @param filePath The demo file, or its bytes.
+        @return Generator of one tuple per tic, holding a (forward, side, turn, buttons) tuple per player in the game.
+                It returns True if the demo ends at its end marker, False if the recording was cut off.
+    """
+
+    header = readHeader(filePath)
+    if header["format"] == "zdoom":
+        return (yield from zdoomTics(filePath, header))
+
+    command = LONG_TIC if header["longtics"] else TIC
+    players = max(1, sum(header["players"]))
+    ticSize = command.size * players
+
+    with openDemo(filePath) as contents:
+        contents.seek(header["headerSize"])
+        data = b""
+
+        while True:
+            block = contents.read(CHUNK_SIZE)
+            data += block
+            position = 0
+
+            while position < len(data):
+                if data[position] == END_MARKER:
+                    return True
+                if position + ticSize > len(data):
+                    break
+
+                yield tuple(command.unpack_from(data, position + index * command.size) for index in range(players))
+                position += ticSize
+
+            if not block:
+                return False
+
+            data = data[position:]
+
+
+class ZDoomBody:
+    """
+        Buffered reader of the BODY of a ZDoom demo, whose commands have no fixed size.
+
+        Raises EOFError when the demo ends in the middle of a command.
+    """
+
+    _contents = None
+    _data = b""
+    _position = 0
+
+    def __init__(self, contents):
+        self._contents = contents
+        self._data     = b""
+        self._position = 0
+
+    def byte(self):
+        return self.read(1)[0]
+
+    def fill(self):
+        block = self._contents.read(CHUNK_SIZE)
+        if not block:
+            raise EOFError
+
+        self._data = self._data[self._position:] + block
+        self._position = 0
+
+    def read(self, size):
+        while len(self._data) - self._position < size:
+            self.fill()
+
+        result = self._data[self._position:self._position + size]
+        self._position += size
+        return result
+
+    def short(self):
+        return ZDOOM_SHORT.unpack(self.read(2))[0]
+
+    def skip(self, layout):
+        for field in layout:
+            if field == "s":
+                self.string()
+            else:
+                self.read(int(field))
+
+    def string(self):
+        end = self._data.find(b"\0", self._position)
+        while end < 0:
+            self.fill()
+            end = self._data.find(b"\0", self._position)
+
+        result = self._data[self._position:end]
+        self._position = end + 1
+        return result
+
+
+def readZDoomCommand(body, state):
+    """
+        Apply a packed ZDoom user command to the player's previous one.
+
+        @param state List of forward, side, turn and buttons, changed in place.
+    """
+
+    flags = body.byte()
+
+    if flags & ZDOOM_BUTTONS:
+        value = body.byte()
+        buttons = value & 0x7f
+        shift = 7
+        while value & 0x80 and shift < 21:
+            value = body.byte()
+            buttons |= (value & 0x7f) << shift
+            shift += 7
+        if value & 0x80:
+            buttons |= body.byte() << 21
+        state[3] = buttons
+
+    if flags & ZDOOM_PITCH:
+        body.short()
+    if flags & ZDOOM_YAW:
+        state[2] = body.short()
+    if flags & ZDOOM_FORWARD:
+        state[0] = body.short()
+    if flags & ZDOOM_SIDE:
+        state[1] = body.short()
+    if flags & ZDOOM_UP:
+        body.short()
+    if flags & ZDOOM_ROLL:
+        body.short()
+
+
+def zdoomTics(filePath, header):
+    """
+        Stream the tic commands of a ZDoom demo: every player's tic ends with a user command, full or repeating the
+        previous one, after whatever other commands the player sent that tic.
+
+        Only attack and use are kept of the buttons, the ones that mean the same as in vanilla demos; weapon changes
+        aren't buttons in ZDoom demos.
+    """
+
+    players = max(1, sum(header["players"]))
+    states = [ [ 0, 0, 0, 0 ] for _ in range(players) ]
+
+    with openDemo(filePath) as contents:
+        contents.seek(header["headerSize"])
+        body = ZDoomBody(contents)
+        player = 0
+
+        try:
+            while True:
+                command = body.byte()
+
+                if command == ZDOOM_STOP:
+                    return True
+
+                if command == ZDOOM_SERVERINFO:
+                    kind = body.byte()
+                    body.read(kind & 63)
+                    body.skip([ "1", "4", "4", "s" ][kind >> 6])
+                    continue
+
+                if command in ZDOOM_COMMANDS:
+                    body.skip(ZDOOM_COMMANDS[command])
+                    continue
+
+                if command == ZDOOM_USERCMD:
+                    readZDoomCommand(body, states[player])
+                elif command != ZDOOM_EMPTYUSERCMD:
+                    raise ValueError(f"Unsupported ZDoom demo command {command}: {filePath}.")
+
+                player += 1
+                if player == players:
+                    yield tuple((forward, side, turn, buttons & (BUTTON_ATTACK | BUTTON_USE))
+                                for forward, side, turn, buttons in states)
+                    player = 0
+        except EOFError:
+            return False
+
+
+def summary(filePath):
+    """
+        Count tics and input statistics of a demo in one streamed pass.
+
+        @param filePath The demo file, or its bytes.
+        @return Dictionary with the header, tic count, duration in seconds, per player input counts and whether the
+                demo ends at its end marker ("complete").
+    """
+
+    header = readHeader(filePath)
+    players = max(1, sum(header["players"]))
+    inputs = [ { "forward": 0, "side": 0, "turn": 0, "attack": 0, "use": 0, "change": 0 } for _ in range(players) ]
+
+    count = 0
+    stream = tics(filePath)
+    while True:
+        try:
+            commands = next(stream)
+        except StopIteration as stop:
+            isComplete = bool(stop.value)
+            break
+
+        count += 1
+        for player, (forward, side, turn, buttons) in enumerate(commands):
+            counts = inputs[player]
+            counts["forward"] += forward != 0
+            counts["side"]    += side != 0
+            counts["turn"]    += turn != 0
+
+            if buttons & BUTTON_SPECIAL:
+                continue
+
+            counts["attack"] += bool(buttons & BUTTON_ATTACK)
+            counts["use"]    += bool(buttons & BUTTON_USE)
+            counts["change"] += bool(buttons & BUTTON_CHANGE)
+
+    return {
+        "header":   header,
+        "tics":     count,
+        "duration": count / TICRATE,
+        "inputs":   inputs,
+        "complete": isComplete,
+        "size":     len(filePath) if isMemory(filePath) else os.path.getsize(filePath)
+    }
@@ -0,0 +1,336 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import archive
+import demo as lmp
+import demoStats
+import gzdoom
+import portEnv
+
+INDEX_FILE = "demoIndex.db"
+INDEX_VERSION = 1
+
+COLUMNS = [
+    "dir", "name", "executable", "version", "player", "mapper", "target", "map", "difficulty", "flags", "category",
+    "number", "size", "mtime", "archived", "format", "skill", "headerVersion"
+]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key         TEXT PRIMARY KEY,
+        value       TEXT
+    );
+    CREATE TABLE IF NOT EXISTS dirs (
+        path        TEXT PRIMARY KEY,
+        mtime       INTEGER,
+        archive     INTEGER,
+        headers     INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS demos (
+        dir             TEXT NOT NULL,
+        name            TEXT NOT NULL,
+        executable      TEXT,
+        version         TEXT,
+        player          TEXT COLLATE NOCASE,
+        mapper          TEXT COLLATE NOCASE,
+        target          TEXT COLLATE NOCASE,
+        map             TEXT COLLATE NOCASE,
+        difficulty      TEXT,
+        flags           TEXT,
+        category        TEXT COLLATE NOCASE,
+        number          INTEGER,
+        size            INTEGER,
+        mtime           REAL,
+        archived        INTEGER,
+        format          TEXT,
+        skill           INTEGER,
+        headerVersion   INTEGER,
+        PRIMARY KEY (dir, name)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS demosPlayer ON demos (player, target, map);
+    CREATE INDEX IF NOT EXISTS demosTarget ON demos (target, map);
+    CREATE INDEX IF NOT EXISTS demosMap ON demos (map);
+    CREATE INDEX IF NOT EXISTS demosSkill ON demos (difficulty, category);
+    CREATE INDEX IF NOT EXISTS demosCategory ON demos (category, mtime);
+    CREATE INDEX IF NOT EXISTS demosFlags ON demos (flags, mtime);
+    CREATE INDEX IF NOT EXISTS demosTime ON demos (mtime);
+"""
+
+
+def indexPath():
+    return os.path.join(portEnv.cacheDir(), INDEX_FILE)
+
+
+def connect(path):
+    """
+        Open the index, creating it, or starting it over when it was written by another version.
+    """
+
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+
+    row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or row[0] != str(INDEX_VERSION):
+        with connection:
+            connection.execute("DELETE FROM demos")
+            connection.execute("DELETE FROM dirs")
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+    return connection
+
+
+def stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def flagString(settings):
+    return "".join([ key for setting, key in gzdoom.SETTING_KEY.items() if settings.get(setting) ])
+
+
+def headerFields(source):
+    """
+        @param source The demo file, or its bytes.
+        @return Tuple of format, skill and version from the demo's header; all None if it can't be read.
+    """
+
+    try:
+        header = lmp.readHeader(source)
+    except (OSError, ValueError):
+        return None, None, None
+
+    return header.get("format"), header.get("skill"), header.get("version")
+
+
+def scanDir(dirPath, parts, headers, previous):
+    """
+        Read the demos of one map directory, loose and archived.
+
+        @param headers  Read the header of every demo too.
+        @param previous Dictionary of name to the row the index had for it, to reuse headers of unchanged demos.
+        @return List of rows in COLUMNS order.
+    """
+
+    key = demoStats.mapKey(parts)
+    found = []
+
+    with os.scandir(dirPath) as entries:
+        for entry in entries:
+            if archive.attemptNumber(entry.name) is not None and entry.is_file():
+                stat = entry.stat()
+                found.append((entry.name, stat.st_size, stat.st_mtime, False, entry.path))
+
+    loose = { name for name, _, _, _, _ in found }
+    members = archive.members(dirPath)
+    archiveTime = os.path.getmtime(archive.archivePath(dirPath)) if members else None
+    for name, (size, _) in members.items():
+        if name not in loose:
+            found.append((name, size, archiveTime, True, None))
+
+    missing = {}
+    result = []
+    for name, size, mtime, archived, path in found:
+        fields = gzdoom.parseDemoName(name)
+        if fields is None:
+            continue
+
+        header = (None, None, None)
+        old = previous.get(name)
+        isSame = old is not None and old["size"] == size and old["mtime"] == mtime
+        if isSame and (old["format"] is not None or not headers):
+            header = (old["format"], old["skill"], old["headerVersion"])
+        elif headers and path is not None:
+            header = headerFields(path)
+        elif headers:
+            missing[name] = len(result)
+
+        result.append([ dirPath, name, key["executable"], key["version"], fields["player"], key["mapper"],
+                        fields["target"], fields["map"], fields["difficulty"], flagString(fields["settings"]),
+                        fields["category"], fields["number"], size, mtime, int(archived) ] + list(header))
+
+    if missing:
+        for name, data in archive.contents(dirPath, set(members) - set(missing)):
+            result[missing[name]][-3:] = headerFields(data)
+
+    return result
+
+
+def update(connection, demoBase, headers = False):
+    """
+        Bring the index up to date with the demo tree.
+
+        Only map directories whose mtime or archive changed since the last update are listed again; the rest of the
+        tree costs one stat per map directory.
+
+        @param headers Read demo headers too; directories indexed without them are read again once.
+        @return Dictionary with the "dirs" rescanned, the "removed" directories and the "demos" indexed.
+    """
+
+    known = { path: (mtime, archiveTime, bool(withHeaders)) for path, mtime, archiveTime, withHeaders
+              in connection.execute("SELECT path, mtime, archive, headers FROM dirs") }
+    result = { "dirs": 0, "removed": 0, "demos": 0 }
+    seen = set()
+
+    insert = f"INSERT INTO demos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+    with connection:
+        for dirPath, parts in demoStats.findMapDirs(demoBase):
+            seen.add(dirPath)
+            current = (stamp(dirPath), stamp(archive.archivePath(dirPath)), headers)
+            old = known.get(dirPath)
+            if old is not None and old[:2] == current[:2] and (old[2] or not headers):
+                continue
+
+            previous = {}
+            cursor = connection.execute(f"SELECT {', '.join(COLUMNS)} FROM demos WHERE dir = ?", (dirPath,))
+            for row in cursor:
+                previous[row[1]] = dict(zip(COLUMNS, row))
+
+            rows = scanDir(dirPath, parts, headers, previous)
+            connection.execute("DELETE FROM demos WHERE dir = ?", (dirPath,))
+            connection.executemany(insert, rows)
+            connection.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)", (dirPath,) + current[:2] +
+                               (int(headers),))
+            result["dirs"] += 1
+
+        for dirPath in set(known) - seen:
+            connection.execute("DELETE FROM demos WHERE dir = ?", (dirPath,))
+            connection.execute("DELETE FROM dirs WHERE path = ?", (dirPath,))
+            result["removed"] += 1
+
+    if result["dirs"] or result["removed"]:
+        connection.execute("ANALYZE")
+
+    result["demos"] = connection.execute("SELECT COUNT(*) FROM demos").fetchone()[0]
+    return result
+
+
+def query(connection, filters, order = "mtime", latest = None):
+    """
+        @param filters Dictionary of column to value; None values are left out. Text matches ignore case, except for
+                       difficulty and flags; "flags" of "" means demos without any.
+        @param order   Column to sort by, newest or highest first.
+        @param latest  Only the first this many results.
+        @return List of rows as dictionaries.
+    """
+
+    clauses = []
+    values = []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if column not in COLUMNS:
+            raise ValueError(f"No such field: {column}.")
+        clauses.append(f"{column} = ?")
+        values.append(value)
+
+    if order not in COLUMNS:
+        raise ValueError(f"No such field: {order}.")
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM demos"
+    if clauses:
+        sql += f" WHERE {' AND '.join(clauses)}"
+    sql += f" ORDER BY {order} DESC, dir, number DESC"
+    if latest is not None:
+        sql += " LIMIT ?"
+        values.append(latest)
+
+    return [ dict(zip(COLUMNS, row)) for row in connection.execute(sql, values) ]
+
+
+def demoPath(row):
+    return os.path.join(row["dir"], row["name"])
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Demo Index", description = "Search the demo tree by demo name fields.")
+    parser.add_argument("action", choices = [ "update", "query" ])
+
+    parser.add_argument("-b", "--base",         default = None,
+                                                help    = "Demo tree root (DOOM_DEMO_DIR).")
+
+    parser.add_argument("-c", "--category",     default = None,
+                                                help    = "Category, e.g. max.")
+
+    parser.add_argument("-d", "--difficulty",   default = None,
+                                                help    = "Skill name, e.g. uv.")
+
+    parser.add_argument("-e", "--headers",      action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Read demo headers while updating.")
+
+    parser.add_argument("-f", "--flags",        default = None,
+                                                help    = "Setting flags exactly, e.g. \"o\" for nomo, \"\" for none.")
+
+    parser.add_argument("-i", "--index",        default = None,
+                                                help    = "Index file; defaults to the one in the cache.")
+
+    parser.add_argument("-l", "--long",         action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Print every field, not only paths.")
+
+    parser.add_argument("-m", "--map",          default = None,
+                                                help    = "Map, e.g. map07.")
+
+    parser.add_argument("-n", "--latest",       default = None,
+                                                type    = int,
+                                                help    = "Only the newest demos.")
+
+    parser.add_argument("-p", "--player",       default = None,
+                                                help    = "Player.")
+
+    parser.add_argument("-s", "--sort",         default = "mtime",
+                                                choices = COLUMNS,
+                                                help    = "Field to sort by, descending.")
+
+    parser.add_argument("-t", "--target",       default = None,
+                                                help    = "WAD.")
+
+    parser.add_argument("-u", "--update",       action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Update the index before querying.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    connection = connect(args.index or indexPath())
+    demoBase = args.base or gzdoom.envSetting("DOOM_DEMO_DIR")
+
+    if args.action == "update" or args.update:
+        start = time.perf_counter()
+        result = update(connection, demoBase, args.headers)
+        print(f"{result['dirs']} directories read, {result['removed']} removed, {result['demos']} demos; "
+              f"{time.perf_counter() - start:.2f}s.", file = sys.stderr)
+
+    if args.action == "query":
+        filters = {
+            "player":       args.player,
+            "target":       args.target,
+            "map":          args.map,
+            "difficulty":   args.difficulty,
+            "category":     args.category,
+            "flags":        args.flags
+        }
+
+        start = time.perf_counter()
+        rows = query(connection, filters, args.sort, args.latest)
+        elapsed = time.perf_counter() - start
+
+        for row in rows:
+            if args.long:
+                print("\t".join([ str(row[column]) for column in COLUMNS[2:] ] + [ demoPath(row) ]))
+            else:
+                print(demoPath(row))
+        print(f"{len(rows)} demos; {elapsed * 1000:.1f}ms.", file = sys.stderr)
+
+    connection.close()
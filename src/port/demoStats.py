@@ -0,0 +1,197 @@
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+
+import archive
+import demo as lmp
+import portEnv
+import wad
+
+CSV_FIELDS = [
+    "executable", "version", "player", "mapper", "target", "map",
+    "attempts", "latest", "longest", "longestDuration", "size", "duration", "unparsed"
+]
+
+
+def findMapDirs(baseDir):
+    """
+        Find every map directory of the demo tree.
+
+        @param baseDir The demo tree, normally DOOM_DEMO_DIR.
+        @return List of (directory, path parts below baseDir) tuples.
+    """
+
+    result = []
+    pending = [ (baseDir, []) ]
+
+    while pending:
+        dirPath, parts = pending.pop()
+
+        try:
+            entries = [ entry for entry in os.scandir(dirPath) if entry.is_dir() ]
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name[0] == "." and entry.name != ".test":
+                continue
+
+            entryParts = parts + [ entry.name ]
+            if len(parts) >= 4 and wad.isMap(entry.name):
+                result.append((entry.path, entryParts))
+            else:
+                pending.append((entry.path, entryParts))
+
+    result.sort()
+    return result
+
+
+def mapKey(parts):
+    """
+        @return The executable/version/player/mapper/target/map fields of a map directory's path parts.
+    """
+
+    executable, version, player = parts[0:3]
+    mapper = ""
+    rest = parts[3:]
+
+    if rest[0] == ".test" and len(rest) >= 4:
+        mapper = rest[1]
+        rest = rest[2:]
+
+    return {
+        "executable":   executable,
+        "version":      version,
+        "player":       player,
+        "mapper":       mapper,
+        "target":       rest[-2],
+        "map":          rest[-1]
+    }
+
+
+def mapStats(job):
+    """
+        Summarise the attempts of one map directory; runs in a worker process.
+
+        "longest" is the attempt that played the most tics. It isn't called the best run: a demo doesn't record
+        whether the exit was reached, and quitting or restarting ends it at its end marker just like an exit does.
+        Demos whose tics can't be decoded count as "unparsed" and add no duration. Archived attempts are read from the
+        archive without extracting them.
+    """
+
+    dirPath, parts = job
+    result = mapKey(parts)
+    result.update({
+        "attempts":         0,
+        "latest":           None,
+        "longest":          None,
+        "longestDuration":  None,
+        "size":             0,
+        "duration":         0.0,
+        "unparsed":         0
+    })
+
+    with os.scandir(dirPath) as entries:
+        loose = [ (entry.name, entry.stat().st_size, entry.path) for entry in entries
+                  if archive.attemptNumber(entry.name) is not None and entry.is_file() ]
+
+    for name, size, path in loose:
+        addAttempt(result, archive.attemptNumber(name), size, path)
+
+    skip = { name for name, _, _ in loose }
+    for name, data in archive.contents(dirPath, skip):
+        addAttempt(result, archive.attemptNumber(name), len(data), data)
+
+    return result
+
+
+def addAttempt(result, number, size, source):
+    """
+        Count one attempt into the summary of its map directory.
+
+        @param source The demo file, or its bytes.
+    """
+
+    if number is None:
+        return
+
+    result["attempts"] += 1
+    result["size"] += size
+
+    if result["latest"] is None or number > result["latest"]:
+        result["latest"] = number
+
+    try:
+        stats = lmp.summary(source)
+    except (OSError, ValueError):
+        result["unparsed"] += 1
+        return
+
+    duration = stats["duration"]
+    result["duration"] += duration
+
+    if result["longestDuration"] is None or duration > result["longestDuration"]:
+        result["longest"], result["longestDuration"] = number, duration
+
+
+def collect(baseDir, workers = None):
+    jobs = findMapDirs(baseDir)
+    if not jobs:
+        return []
+
+    chunkSize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+        return list(executor.map(mapStats, jobs, chunksize = chunkSize))
+
+
+def writeCsv(stats, output):
+    writer = csv.DictWriter(output, fieldnames = CSV_FIELDS)
+    writer.writeheader()
+    for entry in stats:
+        writer.writerow(entry)
+
+
+def writeJson(stats, output):
+    totals = {
+        "maps":     len(stats),
+        "attempts": sum([ entry["attempts"] for entry in stats ]),
+        "size":     sum([ entry["size"] for entry in stats ]),
+        "duration": sum([ entry["duration"] for entry in stats ])
+    }
+    json.dump({ "totals": totals, "maps": stats }, output, indent = 4)
+    output.write("\n")
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Demo Statistics", description = "Attempt statistics for the demo tree.")
+
+    parser.add_argument("-d", "--demoDir",  default = None,
+                                            help    = "Demo tree; defaults to DOOM_DEMO_DIR.")
+
+    parser.add_argument("-f", "--format",   default = "json",
+                                            choices = [ "csv", "json" ],
+                                            help    = "Report format.")
+
+    parser.add_argument("-o", "--output",   default = None,
+                                            help    = "Report file; defaults to standard output.")
+
+    parser.add_argument("-w", "--workers",  default = None,
+                                            type    = int,
+                                            help    = "Worker processes; defaults to the number of cores.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    stats = collect(args.demoDir or portEnv.env("DOOM_DEMO_DIR"), args.workers)
+    write = writeCsv if args.format == "csv" else writeJson
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8", newline = "") as output:
+            write(stats, output)
+    else:
+        write(stats, sys.stdout)
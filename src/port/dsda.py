@@ -0,0 +1,7 @@
+import sys
+
+import backend
+import gzdoom
+
+if __name__ == "__main__":
+    sys.exit(gzdoom.main(sys.argv[1:], backend.Dsda.NAME))
@@ -1,10 +1,22 @@
 import argparse
+import contextlib
 import datetime
+import functools
 import json
 import os
 import subprocess
 import sys
 
+import archive
+import attempts
+import backend as ports
+import catalog as wadCatalog
+import dedup
+import demo as lmp
+import portEnv
+import profiler
+import wad
+
 ARG_TO_SETTING = {
     "--fast":       "fast",
     "--respawn":    "respawn",
@@ -48,7 +60,7 @@ SKILLS = {
 }
 
 def annoy():
-    countFile = os.path.join(env("HOME"), "doc", "annoy", "count.txt")
+    countFile = os.path.join(envSetting("HOME"), "doc", "annoy", "count.txt")
     if not os.path.exists(countFile):
         with open(countFile, "w", encoding = "utf-8") as output:
             output.write("0")
@@ -61,7 +73,13 @@ def annoy():
     with open(countFile, "w", encoding = "utf-8") as output:
         output.write(str(count + 1))
 
-def autoLoad(modDir):
+@profiler.profiled
+def autoLoad(modDir, catalog = None):
+    if catalog is not None:
+        files = catalog.files(modDir, MOD_FILES_IGNORE)
+        if files is not None:
+            return files
+
     result = []
     for file in [ fileName for fileName in os.listdir(modDir) ]:
         fullPath = os.path.join(modDir, file)
@@ -73,21 +91,86 @@ def autoLoad(modDir):
     return result
 
 
-def currentAttempt(filePath, extension):
-    number = 0
-    while number <= 999:
-        if not os.path.exists(f"{demoFile(filePath, number, extension)}"):
-            return number
-        number += 1
-    raise ValueError("Too many demos!")
+@profiler.profiled
+def currentAttempt(filePath, extension, reserved = ()):
+    """
+        @param reserved Demo paths that other launches are about to record; taken like existing demos.
+    """
+
+    demoDir = os.path.dirname(filePath)
+    taken = { os.path.basename(path) for path in reserved if os.path.dirname(path) == demoDir }
+    return attempts.nextAttempt(filePath, extension, demoFile, storedDemos(demoDir) | taken)
 
 
 def demoFile(filePath, number, extension):
     return f"{filePath}_{stringNumber(number, 3)}{extension}"
 
 
-def demoFileSetup(executable, version, player, mapper, target, map, difficulty, category, settings, demo):
-    dirBase  = os.path.join(env("DOOM_DEMO_DIR"), executable, version, player)
+def parseDemoName(fileName):
+    """
+        Split a demo file name as built by demoFileSetup back into its parts.
+
+        @param fileName Base name like "Player-target-map07-uvfo-max_012.lmp".
+        @return Dictionary of player, target, map, difficulty, settings, category and number; None if it doesn't fit.
+    """
+
+    stem, extension = os.path.splitext(fileName)
+    if "_" not in stem:
+        return None
+
+    stem, number = stem.rsplit("_", 1)
+    parts = stem.split("-")
+    if not number.isdigit() or len(parts) < 5:
+        return None
+
+    difficultyPart = parts[-2]
+    difficulty = None
+    for name in sorted([ value[1] for value in SKILLS.values() ], key = len, reverse = True):
+        if difficultyPart.startswith(name):
+            difficulty = name
+            break
+
+    keys = { key: setting for setting, key in SETTING_KEY.items() }
+    flags = difficultyPart[len(difficulty):] if difficulty else ""
+    if difficulty is None or any([ flag not in keys for flag in flags ]):
+        return None
+
+    return {
+        "player":       "-".join(parts[:-4]),
+        "target":       parts[-4],
+        "map":          parts[-3],
+        "difficulty":   difficulty,
+        "settings":     { setting: key in flags for key, setting in keys.items() },
+        "category":     parts[-1],
+        "number":       int(number),
+        "extension":    extension
+    }
+
+
+def demoNaming(player, mapper, target, category, version):
+    """
+        The spelling of the naming fields of the demo tree, shared by Launch and anything else building demo paths.
+
+        @return Dictionary of the player and mapper in title case and the target, category and version in lower case.
+    """
+
+    return {
+        "category": str(category).lower(),
+        "mapper":   str(mapper).title(),
+        "player":   str(player).title(),
+        "target":   str(target).lower(),
+        "version":  str(version).lower()
+    }
+
+
+def demoPrefixPath(demoBase, executable, version, player, mapper, target, map, difficulty, category, settings):
+    """
+        The demo naming scheme: where the attempts of one run go and what they're called, without the attempt number.
+
+        @return Path like "DOOM_DEMO_DIR/gzdoom/4.11/Player/target/map01/Player-target-map01-uvf-max".
+    """
+
+    dirBase  = os.path.join(demoBase, executable, version, player)
 
     if mapper is not None and mapper != "":
         dirBase = os.path.join(dirBase, ".test", mapper)
@@ -100,13 +183,21 @@ def demoFileSetup(executable, version, player, mapper, target, map, difficulty,
         if setting:
             extraPart = f"{extraPart}{SETTING_KEY[flag]}"
 
+    return f"{os.path.join(demoDir, demoName)}{extraPart}-{category}"
+
+
+@profiler.profiled
+def demoFileSetup(executable, version, player, mapper, target, map, difficulty, category, settings, demo,
+                  reserved = ()):
     attempt = -1
     extension = ".lmp"
     result = ""
-    fullPath = f"{os.path.join(demoDir, demoName)}{extraPart}-{category}"
+    fullPath = demoPrefixPath(envSetting("DOOM_DEMO_DIR"), executable, version, player, mapper, target, map, difficulty,
+                              category, settings)
+    demoDir = os.path.dirname(fullPath)
 
     if demo is None or demo < 0:
-        attempt = currentAttempt(fullPath, extension)
+        attempt = currentAttempt(fullPath, extension, reserved)
 
         if os.path.exists(demoFile(fullPath, attempt, extension)):
             raise ValueError(f"File for -record already exists. {result}")
@@ -118,20 +209,14 @@ def demoFileSetup(executable, version, player, mapper, target, map, difficulty,
         raise ValueError(f"Demo number should be integer: {demo} ({type(demo)}).")
 
     result = demoFile(fullPath, demo, extension)
-    if not os.path.exists(result):
+    if resolveDemo(result) is None:
         raise ValueError(f"File for -playdemo doesn't exist. {result}")
 
     return fullPath, -1
 
 
-def env(parameter):
-    result = os.environ.get(parameter.split("$")[-1])
-    if result is None:
-        raise ValueError(f"No such environment variable: {result}.")
-    return result
-
-
-def getIWad(configuration, targetWad):
+@profiler.profiled
+def getIWad(configuration, targetWad, targetPath = None):
     if targetWad in IWADS:
         return targetWad
 
@@ -139,10 +224,16 @@ def getIWad(configuration, targetWad):
     if targetWad in configuration and iwadKey in configuration[targetWad]:
         return configuration[targetWad][iwadKey]
 
+    if targetPath and wad.isWad(targetPath):
+        with wad.Wad(targetPath) as contents:
+            if contents.mapType() == "doom":
+                return "doom"
+
     return "doom2"
 
 
-def getPWad(target, mapper):
+@profiler.profiled
+def getPWad(target, mapper, catalog = None):
     isIwad = target in IWADS
     isSwad = mapper in SPECIAL_MAPPERS
     isTwad = mapper is not None and mapper != ""
@@ -164,8 +255,13 @@ def getPWad(target, mapper):
     if isTwad or isSwad:
         targetDir = os.path.join(targetDir, mapper)
 
-    pwadDir = verifyDir(os.path.join(f"{env('DOOM_DIR')}", f"{targetDir}", f"{target}"))
-    pwad = verifyFile(os.path.join(pwadDir, f"{target}.wad"))
+    pwadDir = verifyDir(os.path.join(f"{envSetting('DOOM_DIR')}", f"{targetDir}", f"{target}"), catalog)
+    pwad = verifyFile(os.path.join(pwadDir, f"{target}.wad"), catalog)
+
+    extraFiles = None if catalog is None else catalog.files(pwadDir, MOD_FILES_IGNORE)
+    if extraFiles is not None:
+        return pwad, extraFiles
+
     extraFiles = []
 
     for name in os.listdir(pwadDir):
@@ -183,6 +279,18 @@ def getTime(label="Start: "):
     return current
 
 
+def catalogRoots():
+    result = [ envSetting("DOOM_DIR"), envSetting("DOOM_IWAD_DIR"), envSetting("DOOM_PWAD_DIR") ]
+    for executableDir in ports.executableDirs():
+        result += [ os.path.join(executableDir, "addon"), os.path.join(executableDir, "mod") ]
+    return result
+
+
+@profiler.profiled
+def loadCatalog():
+    return wadCatalog.load(os.path.join(portEnv.cacheDir(), wadCatalog.CATALOG_FILE), catalogRoots())
+
+
 def parseMap(mapList, iwad):
     if not mapList:
         mapList = [ "1", "1" ] if iwad == "doom" else [ "01" ]
@@ -197,11 +305,39 @@ def parseMap(mapList, iwad):
 
     numbers = [ int(number) for number in mapList ]
     if amount == 2:
-        return f"e{mapList[0]}m{mapList[1]}", numbers
+        return f"e{numbers[0]}m{numbers[1]}", numbers
 
     return "map" + ("0" if numbers[0] < 10 else "") + str(numbers[0]), numbers
 
 
+def portDir(filePath, isRequired, catalog = None):
+    """
+        @param isRequired Whether the port can't do without the directory.
+        @return The verified directory, or "" for a missing one the port can do without.
+    """
+
+    if not isRequired and not os.path.isdir(filePath):
+        return ""
+
+    return verifyDir(filePath, catalog)
+
+
+def printProfile():
+    """
+        Stop profiling, if the launch was profiled, and print where its time went.
+    """
+
+    result = profiler.stop(os.path.join(portEnv.cacheDir(), profiler.TRACE_DIR))
+    if result is None:
+        return
+
+    path, lines = result
+    print("| Profile:")
+    for line in lines:
+        print(f"|     {line}")
+    print(f"| Trace:       {path}")
+
+
 def printPWADList(pwads):
     header = "PWADs"
     prefix = "    "
@@ -218,19 +354,31 @@ def printPWADList(pwads):
     print('-' * (width + headerLength))
 
 
-def readJson(filePath):
+@functools.lru_cache(maxsize = 4)
+def cachedJson(filePath, mtime):
     with open(filePath) as contents:
         return json.load(contents)
 
 
-def readMods(configuration, sourceDir, targetWad):
+@profiler.profiled
+def readJson(filePath):
+    """
+        Read a JSON file, once per modification; the result is shared between calls and must not be changed.
+    """
+
+    return cachedJson(filePath, os.stat(filePath).st_mtime_ns)
+
+
+@profiler.profiled
+def readMods(configuration, sourceDir, targetWad, catalog = None):
     result = []
 
     modKeys = [ "music", "mods" ]
 
     if not configuration:
         raise ValueError("Won't load mods with non-existent configuration.")
-    if not os.path.exists(sourceDir):
+    isDir = None if catalog is None else catalog.isDir(sourceDir)
+    if isDir is False or isDir is None and not os.path.exists(sourceDir):
         raise ValueError(f"No such mod source directory: {sourceDir}.")
     if not targetWad:
         raise ValueError("Can't read mods for a non-target.")
@@ -245,13 +393,86 @@ def readMods(configuration, sourceDir, targetWad):
         result = []
         for file in configuration[targetWad][modKey]:
             fullPath = os.path.join(sourceDir, file)
+            isFile = None if catalog is None else catalog.isFile(fullPath)
 
-            if not os.path.isfile(fullPath) or os.path.splitext(file) in MOD_FILES_IGNORE:
+            if isFile is None:
+                isFile = os.path.isfile(fullPath)
+            if not isFile or os.path.splitext(file) in MOD_FILES_IGNORE:
                 continue
             result.append(fullPath)
     return result
 
 
+@profiler.profiled
+def resolveDemo(filePath):
+    """
+        Find the file a demo of the demo tree can be played from: the demo itself, the demo a dedup reference points
+        to, or either of them extracted from its map directory's archive.
+
+        @return Path of a readable file, None if the demo isn't anywhere.
+    """
+
+    for candidate in [ filePath, dedup.referenced(filePath, envSetting("DOOM_DEMO_DIR")) ]:
+        if candidate is None:
+            continue
+        if os.path.exists(candidate):
+            return candidate
+
+        result = archive.extract(candidate)
+        if result is not None:
+            return result
+
+    return None
+
+
+def runCommand(command, demoPath, attempt, isRunning, recordDemo, say = print, session = None):
+    print(f"| Attempt:     #{attempt}.")
+
+    start = getTime(label = "| Start:       ")
+
+    if not isRunning:
+        say(" ".join(command))
+        exitCode = 0
+    else:
+        print("Running...")
+        with timed(session, "runtime"):
+            with profiler.phase("spawn"):
+                process = subprocess.Popen(command)
+            with process:
+                try:
+                    exitCode = process.wait()
+                except BaseException:
+                    process.kill()
+                    raise
+        os.environ[DEMO_POINTER] = demoPath
+        total = getTime(label = "| Finish:      ") - start
+        print(f"| Total:       {total}")
+
+    if recordDemo and isRunning:
+        print(f"Wrote demo to: {demoPath}")
+
+    return exitCode
+
+
+@functools.lru_cache(maxsize = None)
+def envSetting(parameter):
+    """
+        Environment setting, looked up the first time it is needed and remembered afterwards.
+
+        Nothing is read from the environment when the module is imported; call envSetting.cache_clear() to re-read.
+    """
+
+    return portEnv.env(parameter)
+
+
+def storedDemos(demoDir):
+    """
+        @return Names of the demos of a directory that are kept elsewhere but still count as recorded.
+    """
+
+    return dedup.storedNames(demoDir, envSetting("DOOM_DEMO_DIR")) | archive.names(demoDir)
+
+
 def stringNumber(number, amount):
     result = str(number)
     while len(result) < amount:
@@ -259,7 +480,81 @@ def stringNumber(number, amount):
     return result
 
 
-def verifyDir(filePath):
+def timed(session, phase):
+    """
+        @param session Telemetry session of the launch, or None.
+        @return Context manager timing a phase of the launch into the session and the profiler, if there are any.
+    """
+
+    if session is None:
+        return profiler.phase(phase)
+
+    result = contextlib.ExitStack()
+    result.enter_context(profiler.phase(phase))
+    result.enter_context(session.phase(phase))
+    return result
+
+
+@profiler.profiled
+def verifyMap(mapName, targetPath, wadPaths):
+    """
+        Check that a -warp target exists, if the target WAD has any maps at all.
+
+        @param mapName    Map name as given by parseMap, e.g. "map07" or "e2m4".
+        @param targetPath The target WAD.
+        @param wadPaths   Other files that get loaded; only WAD files among them are read.
+    """
+
+    if not wad.isWad(targetPath):
+        return
+
+    with wad.Wad(targetPath) as contents:
+        maps = set(contents.maps())
+
+    if not maps or mapName in maps:
+        return
+
+    for path in wadPaths:
+        if path == targetPath or not wad.isWad(path):
+            continue
+
+        with wad.Wad(path) as contents:
+            if mapName in contents.maps():
+                return
+
+    raise ValueError(f"No map {mapName} in {targetPath} or the files loaded with it.")
+
+
+@profiler.profiled
+def verifyDemo(filePath, skill, mapName, warp):
+    """
+        Check that a demo was recorded with the skill and map of the launch. A demo whose header can't be read is let
+        through with a warning, for the port to decide on.
+
+        @return The demo's header; None if it can't be read.
+    """
+
+    try:
+        header = lmp.readHeader(filePath)
+    except ValueError as error:
+        print(f"Warning: not checking the demo against the launch: {error}", file = sys.stderr)
+        return None
+
+    problems = lmp.mismatches(header, skill, mapName, warp)
+
+    if problems:
+        raise ValueError(f"Demo {filePath} doesn't match the launch: {', '.join(problems)}.")
+
+    return header
+
+
+def verifyDir(filePath, catalog = None):
+    isDir = None if catalog is None else catalog.isDir(filePath)
+    if isDir is not None:
+        if not isDir:
+            raise ValueError(f"No such directory: {filePath}.")
+        return filePath
+
     if not os.path.exists(filePath):
         raise ValueError(f"No such file: {filePath}.")
     if not os.path.isdir(filePath):
@@ -267,7 +562,13 @@ def verifyDir(filePath):
     return filePath
 
 
-def verifyFile(filePath):
+def verifyFile(filePath, catalog = None):
+    isFile = None if catalog is None else catalog.isFile(filePath)
+    if isFile is not None:
+        if not isFile:
+            raise ValueError(f"No such file: {filePath}.")
+        return filePath
+
     if not os.path.exists(filePath):
         raise ValueError(f"No such file: {filePath}.")
     if not os.path.isfile(filePath):
@@ -278,6 +579,7 @@ def verifyFile(filePath):
 class Launch:
     _addon              = []
     _attempts           = -1
+    _backend            = None
     _category           = ""
     _clearDemo          = False
     _command            = ""
@@ -289,7 +591,7 @@ class Launch:
     _demoPath           = ""
     _defaultFiles       = []
     _difficulty         = SKILLS["uv"]
-    _executable         = env("GZDOOM_EXE")
+    _executable         = ""
     _fast               = False
     _files              = []
     _iwad               = "doom2"
@@ -300,7 +602,7 @@ class Launch:
     _mods               = ""
     _noLaunch           = False
     _noMonsters         = False
-    _player             = env("DOOM_PLAYER")
+    _player             = ""
     _practice           = False
     _respawn            = False
     _settings           = {}
@@ -311,7 +613,7 @@ class Launch:
     _warp               = ""
     _useMods            = True
     _verbose            = False
-    _version            = env("GZDOOM_LATEST_VERSION")
+    _version            = ""
 
     def __init__(self,
                  category,
@@ -335,7 +637,10 @@ class Launch:
                  track,
                  useMods,
                  verbose,
-                 version):
+                 version,
+                 catalog = None,
+                 port = ports.GZDoom.NAME,
+                 reserved = ()):
 
         self._customActions  = [ str(action).lower() for action in customActions ]
 
@@ -346,23 +651,27 @@ class Launch:
                 self.listAttempts()
             if self.isCustomAction("listPWADs"):
                 self.listPWADs()
-            return 0
+            return
 
 
-        addonPath               = os.path.join(os.path.dirname(self._executable), "addon")
+        portBackend             = ports.get(port)
+        addonPath               = os.path.join(os.path.dirname(envSetting(portBackend.EXECUTABLE_ENV)), "addon")
         executablePath          = str(executable)
-        modPath                 = os.path.join(os.path.dirname(self._executable), "mod")
+        modPath                 = os.path.join(os.path.dirname(envSetting(portBackend.EXECUTABLE_ENV)), "mod")
         skill, difficulty       = SKILLS[str(skill)]
-        targetPath, extraFiles  = getPWad(target, mapper)
+        catalog                 = loadCatalog() if catalog is None else catalog
+        targetPath, extraFiles  = getPWad(target, mapper, catalog)
 
 
-        self._addon             = verifyDir(addonPath)
-        self._configurationPath = verifyFile(configuration)
-        self._executablePath    = verifyFile(executablePath)
-        self._modDir            = verifyDir(modPath)
-        self._targetPath        = verifyFile(targetPath)
+        self._addon             = portDir(addonPath, portBackend.REQUIRES_DIRS, catalog)
+        self._configurationPath = verifyFile(configuration, catalog)
+        self._executablePath    = verifyFile(executablePath, catalog)
+        self._modDir            = portDir(modPath, portBackend.REQUIRES_DIRS, catalog)
+        self._targetPath        = verifyFile(targetPath, catalog)
+        self._backend           = portBackend(self._executablePath)
 
-        self._category      = str(category).lower()
+        naming              = demoNaming(player, mapper, target, category, version)
+        self._category      = naming["category"]
         self._compatibility = str(compatibility).lower()
         self._defaultFiles  = bool(defaultFiles)
         self._difficulty    = str(difficulty).lower()
@@ -370,18 +679,19 @@ class Launch:
         self._noLaunch      = bool(noLaunch)
         self._fast          = bool(fast)
         self._files         = list(files)
-        self._mapper        = str(mapper).title()
+        self._mapper        = naming["mapper"]
         self._noMonsters    = bool(noMonsters)
-        self._player        = str(player).title()
+        self._player        = naming["player"]
         self._practice      = bool(practice)
         self._respawn       = bool(respawn)
         self._skill         = str(skill).lower()
-        self._target        = str(target).lower()
+        self._target        = naming["target"]
         self._track         = int(track)
-        self._version       = str(version).lower()
+        self._version       = naming["version"]
         self._useMods       = bool(useMods)
         self._verbose       = bool(verbose)
 
+        self._settings = {}
         self._settings[ARG_TO_SETTING["--fast"]]          = self._fast
         self._settings[ARG_TO_SETTING["--nomonsters"]]    = self._noMonsters
         self._settings[ARG_TO_SETTING["--respawn"]]       = self._respawn
@@ -390,16 +700,21 @@ class Launch:
         self._configuration   = readJson(self._configurationPath)
         self._defaultFiles    = extraFiles if bool(defaultFiles) else []
         self._executable      = os.path.basename(self._executablePath).split(".")[0]
-        self._iwad            = getIWad(self._configuration, target)
-        self._iwadPath        = verifyFile(os.path.join(env("DOOM_IWAD_DIR"), self._iwad, f"{self._iwad}.wad"))
+        self._iwad            = getIWad(self._configuration, target, self._targetPath)
+        self._iwadPath        = verifyFile(os.path.join(envSetting("DOOM_IWAD_DIR"), self._iwad, f"{self._iwad}.wad"),
+                                           catalog)
         self._map, self._warp = parseMap(map, self._iwad)
-        self._mods            = readMods(self._configuration, self._modDir, self._target) + autoLoad(self._addon)
+        self._mods            = readMods(self._configuration, self._modDir, self._target, catalog) \
+                                if self._modDir else []
+        self._mods           += autoLoad(self._addon, catalog) if self._addon else []
 
         self._files += self._defaultFiles
         self._files += self._mods
         if self._iwad != self._target:
             self._files.append(self._targetPath)
 
+        verifyMap(self._map, self._targetPath, [ self._iwadPath ] + self._files)
+
         self._demoPath, self._attempts = demoFileSetup(self._executable,
                                                        self._version,
                                                        self._player,
@@ -409,7 +724,11 @@ class Launch:
                                                        self._difficulty,
                                                        self._category,
                                                        self._settings,
-                                                       self._demo)
+                                                       self._demo,
+                                                       reserved)
+
+        if self.doDemo():
+            verifyDemo(self.demoPath(), self._skill, self._map, self._warp)
 
     def __str__(self):
         actions = self.customActions()
@@ -452,18 +771,34 @@ class Launch:
         if key not in self._customActions:
             self._customActions.append(key)
 
+    def addonDir(self):
+        return self._addon
+
+    def backend(self):
+        return self._backend
+
     def attempts(self):
         return self._attempts
 
     def compatibility(self):
         return self._compatibility
 
+    def configurationPath(self):
+        return self._configurationPath
+
     def customAction(self):
         return len(self.customActions()) > 0
 
     def customActions(self):
         return [ action for action in self._customActions ]
 
+    @profiler.profiled
+    def command(self):
+        return self._backend.command(self)
+
+    def configuration(self):
+        return self._configuration
+
     def demo(self):
         return self._demo
 
@@ -473,68 +808,77 @@ class Launch:
     def demoCommand(self):
         return self._command
 
+    def demoPrefix(self):
+        return self._demoPath
+
     def demoPath(self):
-        return f"{self._demoPath}_{stringNumber(self.attempts(), 3)}.lmp"
+        if self._demo < 0:
+            return demoFile(self._demoPath, self.attempts(), ".lmp")
+
+        result = demoFile(self._demoPath, self._demo, ".lmp")
+        return resolveDemo(result) or result
 
     def executable(self):
         return self._executable
 
+    def portDemoPath(self, executable, version):
+        """
+            @param executable Executable name of another port, e.g. "dsda-doom".
+            @param version    That port's version.
+            @return Where that port keeps the demo of this launch, resolved like demoPath.
+        """
+
+        prefix = demoPrefixPath(envSetting("DOOM_DEMO_DIR"), executable, str(version).lower(), self._player,
+                                self._mapper, self._target, self._map, self._difficulty, self._category, self._settings)
+        result = demoFile(prefix, self._demo, ".lmp")
+        return resolveDemo(result) or result
+
+    def details(self):
+        """
+            @return What a launch was, for telemetry: the map and how it was played, the attempt (or the played back
+                    demo) and the files loaded.
+        """
+
+        return {
+            "target":       self._target,
+            "map":          self._map,
+            "skill":        self._skill,
+            "difficulty":   self._difficulty,
+            "category":     self._category,
+            "settings":     [ flag for flag, setting in self._settings.items() if setting ],
+            "player":       self._player,
+            "executable":   self._executable,
+            "version":      self._version,
+            "attempt":      self.attempts() if self.record() else self.demo(),
+            "record":       self.record(),
+            "files":        [ self.iwadPath() ] + self.files()
+        }
+
     def difficulty(self):
         return self._difficulty
 
-    def execute(self):
+    def execute(self, session = None):
         """
             TODO:
                 - Delegate actions.
         """
 
+        if self.customAction():
+            return 0
+
         annoy()
 
         attempts = self.attempts()
         demoPath = self.demoPath()
         isRunning = self.launch()
-        isPractice = self.practice()
-        musicTrack = self.track()
         recordDemo = self.record()
 
         self.say(self)
 
-        result = []
-        result.append(self.executablePath())
-        result.extend(["-compatmode", self.compatibility()])
-        result.extend(["-iwad", self.iwadPath()])
-        result.extend(["-file"] + self.files())
-        result.extend(["-skill", self.skill()])
-        result.extend(["-warp"] + self.warp())
-
-        for flag, setting in self._settings.items():
-            if setting:
-                result.extend([flag])
-
-        if not isPractice:
-            result.extend([self.demoCommand(), self.demoPath()])
+        if session is not None:
+            session.describe(self.details())
 
-        if musicTrack:
-            result.extend(["+set idmus", self.track()])
-
-        print(f"| Attempt:     #{attempts}.")
-
-        start = getTime(label = "| Start:       ")
-
-        if not isRunning:
-            self.say(" ".join(result))
-            exitCode = 0
-        else:
-            print("Running...")
-            exitCode = subprocess.call(result)
-            os.environ[DEMO_POINTER] = demoPath
-            total = getTime(label = "| Finish:      ") - start
-            print(f"| Total:       {total}")
-
-        if recordDemo and isRunning:
-            print(f"Wrote demo to: {demoPath}")
-
-        return exitCode
+        return runCommand(self.command(), demoPath, attempts, isRunning, recordDemo, self.say, session)
 
     def executablePath(self):
         return self._executablePath
@@ -554,12 +898,18 @@ class Launch:
     def launch(self):
         return not (self._noLaunch or self.customAction())
 
+    def modDir(self):
+        return self._modDir
+
     def practice(self):
         return self._practice
 
     def record(self):
         return not self.practice() and self._demo == -1
 
+    def port(self):
+        return self._backend.NAME
+
     def say(self, message):
         if (self.verbose()):
             print(message)
@@ -573,6 +923,9 @@ class Launch:
     def track(self):
         return str(self._track)
 
+    def settings(self):
+        return dict(self._settings)
+
     def skill(self):
         return self._skill
 
@@ -591,28 +944,26 @@ class Launch:
         if self.attempts() == 0 or not os.path.exists(path):
             print(f"No demo {path} to remove.")
             return
-        os.remove(path)
-        print(f"Removed {path}.")
+        survivor = dedup.remove(path, envSetting("DOOM_DEMO_DIR"))
+        print(f"Removed {path}." if survivor is None else f"Removed {path}; its duplicates now refer to {survivor}.")
 
     def listAttempts(self):
         return ""
 
     def listPWADs(self):
-        pwadDir = os.path.join(env('DOOM_PWAD_DIR'))
-        if not os.path.exists(pwadDir):
+        pwadDir = os.path.join(envSetting('DOOM_PWAD_DIR'))
+        catalog = loadCatalog()
+        names = catalog.dirs(pwadDir)
+        if names is None:
             raise FileNotFoundError(f"Invalid PWAD dir: {pwadDir}")
 
-        dumbFiles = []
         dumbDirs = []
         pwads = []
 
-        for name in os.listdir(pwadDir):
+        for name in names:
             fullPath = os.path.join(pwadDir, name)
-            if not os.path.isdir(fullPath):
-                dumbFiles.append(fullPath)
-                continue
             pwad = os.path.join(fullPath, f"{name}.wad")
-            if not os.path.exists(pwad):
+            if not catalog.isFile(pwad):
                 dumbDirs.append(fullPath)
                 continue
             pwads.append(name)
@@ -620,7 +971,53 @@ class Launch:
         printPWADList(pwads)
 
 
-def readLaunch(argv):
+def readLaunch(argv, session = None, catalog = None, port = ports.GZDoom.NAME, reserved = ()):
+    """
+        @param session  Telemetry session of the launch, or None.
+        @param catalog  Catalog to resolve files with instead of loading one.
+        @param port     Source port to launch; decides the default executable and version and the command line.
+        @param reserved Demo paths that other launches are about to record, so a recording doesn't take their number.
+    """
+
+    portBackend = ports.get(port)
+
+    with timed(session, "parse"):
+        result = readArgs(argv)
+
+    if result.profile:
+        profiler.start()
+
+    with timed(session, "resolve"):
+        return Launch(
+            category      = result.category,
+            compatibility = result.compatibility,
+            configuration = result.configuration,
+            customActions = result.customActions,
+            demo          = result.demo,
+            defaultFiles  = not result.noDefaultFiles,
+            executable    = result.executable or envSetting(portBackend.EXECUTABLE_ENV),
+            fast          = result.fast,
+            files         = result.files,
+            map           = result.map,
+            mapper        = result.mapper,
+            noLaunch      = result.noLaunch,
+            noMonsters    = result.nomonsters,
+            player        = result.player or envSetting("DOOM_PLAYER"),
+            practice      = result.practice,
+            respawn       = result.respawn,
+            skill         = result.skill,
+            target        = result.target,
+            track         = result.track,
+            useMods       = not result.unmodded,
+            verbose       = result.verbose,
+            version       = result.version or envSetting(portBackend.VERSION_ENV),
+            catalog       = catalog,
+            port          = port,
+            reserved      = reserved
+        )
+
+
+def readArgs(argv):
     parser = argparse.ArgumentParser(prog = "DOOM Launcher", description = "DOOM Launcher Helper")
     parser.add_argument("target")
 
@@ -640,15 +1037,16 @@ def readLaunch(argv):
     parser.add_argument("-d", "--demo",             default = -1,
                                                     help    = "Run demo; argument is demo number.")
 
-    parser.add_argument("-e", "--executable",       default = env("GZDOOM_EXE"),
-                                                    help    = "Executable to use.")
+    parser.add_argument("-e", "--executable",       default = None,
+                                                    help    = "Executable to use; defaults to the port's, "
+                                                              "e.g. GZDOOM_EXE.")
 
     parser.add_argument("-f", "--files",            default = [],
                                                     help    = "Extra files; use for testing.",
                                                     nargs   = "*")
 
-    parser.add_argument("-g", "--configuration",    default = os.path.join(env("DOOM_DIR"), "data", "pwads.json"),
-                                                    help    = "Configuration file to use.")
+    parser.add_argument("-g", "--configuration",    default = None,
+                                                    help    = "Configuration file (DOOM_DIR/data/pwads.json).")
 
     parser.add_argument("-i", "--practice",         action  = "store_const",
                                                     const   = True,
@@ -679,11 +1077,18 @@ def readLaunch(argv):
     parser.add_argument("-o", "--compatibility",    default = "2",
                                                     help    = "Compatibility setting (compatmode).")
 
-    parser.add_argument("-p", "--player",           help    = "Player name.",
-                                                    default = env("DOOM_PLAYER"))
+    parser.add_argument("-p", "--player",           help    = "Player name; defaults to DOOM_PLAYER.",
+                                                    default = None)
 
-    parser.add_argument("-r", "--version",          default = env("GZDOOM_LATEST_VERSION"),
-                                                    help    = "GZDoom version.")
+    parser.add_argument("-q", "--profile",          action  = "store_const",
+                                                    const   = True,
+                                                    default = False,
+                                                    help    = "Time the launch phases and write a trace; or set "
+                                                              f"{profiler.ENVIRONMENT}.")
+
+    parser.add_argument("-r", "--version",          default = None,
+                                                    help    = "Port version; defaults to the port's latest, "
+                                                              "e.g. GZDOOM_LATEST_VERSION.")
 
     parser.add_argument("-s", "--skill",            help    = "Difficulty.",
                                                     default = "4")
@@ -715,31 +1120,49 @@ def readLaunch(argv):
     if errorActions:
         raise ValueError(f"No such action{'' if len(errorActions) == 1 else 's'}: {', '.join(errorActions)}.")
 
-    return Launch(
-        category      = result.category,
-        compatibility = result.compatibility,
-        configuration = result.configuration,
-        customActions = result.customActions,
-        demo          = result.demo,
-        defaultFiles  = not result.noDefaultFiles,
-        executable    = result.executable,
-        fast          = result.fast,
-        files         = result.files,
-        map           = result.map,
-        mapper        = result.mapper,
-        noLaunch      = result.noLaunch,
-        noMonsters    = result.nomonsters,
-        player        = result.player,
-        practice      = result.practice,
-        respawn       = result.respawn,
-        skill         = result.skill,
-        target        = result.target,
-        track         = result.track,
-        useMods       = not result.unmodded,
-        verbose       = result.verbose,
-        version       = result.version,
-    )
+    if result.configuration is None:
+        result.configuration = os.path.join(envSetting("DOOM_DIR"), "data", "pwads.json")
+
+    return result
+
+
+def main(argv, port = ports.GZDoom.NAME):
+    """
+        Launch a port the way its script does: from the compiled launch profile if there is a fresh one, otherwise
+        resolving everything.
+
+        @return Exit code.
+    """
+
+    import launchProfile
+    import telemetry
+
+    session = telemetry.Session()
+
+    if profiler.requested() or "-q" in argv or "--profile" in argv:
+        profiler.start()
+
+    with timed(session, "resolve"):
+        profile = launchProfile.load(argv, port)
+
+    if profile is not None:
+        exitCode = launchProfile.run(profile, session)
+        session.finish(exitCode, True)
+        session.save()
+        printProfile()
+        return exitCode
+
+    launch = readLaunch(argv, session, port = port)
+    with timed(session, "resolve"):
+        launchProfile.save(argv, launch)
+
+    exitCode = launch.execute(session)
+    if not launch.customAction():
+        session.finish(exitCode, launch.launch())
+        session.save()
+    printProfile()
+    return exitCode
 
 
 if __name__ == "__main__":
-    sys.exit(readLaunch(sys.argv[1:]).execute())
+    sys.exit(main(sys.argv[1:]))
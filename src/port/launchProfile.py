@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+import gzdoom
+import portEnv
+
+ENVIRONMENT = [
+    "DOOM_DEMO_DIR",
+    "DOOM_DIR",
+    "DOOM_IWAD_DIR",
+    "DOOM_PLAYER",
+    "DOOM_PWAD_DIR",
+    "DSDA_EXE",
+    "DSDA_LATEST_VERSION",
+    "GZDOOM_EXE",
+    "GZDOOM_LATEST_VERSION"
+]
+
+EXTENSION = ".lmp"
+PROFILE_DIR = "profiles"
+PROFILE_VERSION = 5
+
+
+def mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def profileKey(argv, port):
+    """
+        @return Hash of the port, the arguments and the environment settings the resolution depends on.
+    """
+
+    data = {
+        "argv":         list(argv),
+        "port":         port,
+        "environment":  { name: os.environ.get(name) for name in ENVIRONMENT },
+        "version":      PROFILE_VERSION
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys = True).encode("utf-8")).hexdigest()
+
+
+def profilePath(key):
+    return os.path.join(portEnv.cacheDir(), PROFILE_DIR, f"{key}.json")
+
+
+def watchedPaths(launch):
+    """
+        Every file the resolution read, plus the directories it listed; a change to any of them invalidates a profile.
+    """
+
+    result = [ launch.executablePath(), launch.configurationPath(), launch.iwadPath(), launch.targetPath() ]
+    result += launch.files()
+    result += [ os.path.dirname(launch.targetPath()), launch.modDir(), launch.addonDir() ]
+    return sorted(set(result))
+
+
+def compileProfile(argv, launch):
+    """
+        Turn a resolved Launch into a profile that can start the engine again without resolving anything.
+
+        @param argv   The arguments the launch was read from.
+        @param launch The resolved Launch.
+        @return Profile dictionary, or None for launches that don't start the engine.
+    """
+
+    if not launch.launch():
+        return None
+
+    command = launch.command()
+    demoIndex = None
+    if not launch.practice():
+        demoIndex = command.index(launch.demoPath())
+
+    return {
+        "key":          profileKey(argv, launch.port()),
+        "command":      command,
+        "demoIndex":    demoIndex,
+        "demoPrefix":   launch.demoPrefix(),
+        "record":       launch.record(),
+        "demoPath":     launch.demoPath(),
+        "demo":         launch.demo(),
+        "attempt":      launch.attempts(),
+        "details":      launch.details(),
+        "summary":      str(launch) if launch.verbose() else None,
+        "mtimes":       { path: mtime(path) for path in watchedPaths(launch) }
+    }
+
+
+def load(argv, port):
+    """
+        Find the profile of a set of arguments.
+
+        @param argv Launch arguments.
+        @param port Source port the arguments are for.
+        @return The profile, or None if there is none or a watched path changed since it was compiled.
+    """
+
+    try:
+        with open(profilePath(profileKey(argv, port)), "r", encoding = "utf-8") as contents:
+            profile = json.load(contents)
+    except (OSError, ValueError):
+        return None
+
+    for path, value in profile["mtimes"].items():
+        if mtime(path) != value:
+            return None
+
+    return profile
+
+
+def run(profile, session = None):
+    """
+        Start the engine from a profile, numbering a recorded demo with the next free attempt and finding a played
+        back one again, as it may have been deduplicated or archived since.
+
+        @param session Telemetry session of the launch, or None.
+        @return The exit code of the engine.
+    """
+
+    gzdoom.annoy()
+
+    command = list(profile["command"])
+    demoPath = profile["demoPath"]
+    attempt = profile["attempt"]
+
+    if profile["record"]:
+        prefix = profile["demoPrefix"]
+        attempt = gzdoom.currentAttempt(prefix, EXTENSION)
+        demoPath = gzdoom.demoFile(prefix, attempt, EXTENSION)
+        command[profile["demoIndex"]] = demoPath
+        os.makedirs(os.path.dirname(prefix), exist_ok = True)
+    elif profile["demoIndex"] is not None:
+        demoPath = gzdoom.resolveDemo(gzdoom.demoFile(profile["demoPrefix"], profile["demo"], EXTENSION))
+        if demoPath is None:
+            raise ValueError(f"File for -playdemo doesn't exist. {profile['demoPath']}")
+        command[profile["demoIndex"]] = demoPath
+
+    if profile["summary"]:
+        print(profile["summary"].replace(profile["demoPath"], demoPath))
+
+    if session is not None:
+        session.describe(profile["details"])
+        if profile["record"]:
+            session.describe({ "attempt": attempt })
+
+    return gzdoom.runCommand(command, demoPath, attempt, True, profile["record"], session = session)
+
+
+def save(argv, launch):
+    profile = compileProfile(argv, launch)
+    if profile is None:
+        return
+
+    path = profilePath(profile["key"])
+    temporary = f"{path}.tmp"
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(temporary, "w", encoding = "utf-8") as output:
+            json.dump(profile, output, indent = 4)
+        os.replace(temporary, path)
+    except OSError:
+        pass
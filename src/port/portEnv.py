@@ -0,0 +1,23 @@
+import os
+
+
+def env(parameter):
+    result = os.environ.get(parameter.split("$")[-1])
+    if result is None:
+        raise ValueError(f"No such environment variable: {parameter}.")
+    return result
+
+
+def cacheDir():
+    """
+        Directory for the launcher's caches: DOOM_CACHE_DIR, else "doom" in the XDG cache directory. Created if missing.
+
+        Only the standard library is imported here, so the client can use it without loading the launcher.
+    """
+
+    result = os.environ.get("DOOM_CACHE_DIR")
+    if not result:
+        result = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "doom")
+
+    os.makedirs(result, exist_ok = True)
+    return result
@@ -0,0 +1,182 @@
+import builtins
+import contextlib
+import datetime
+import functools
+import io
+import json
+import os
+import threading
+import time
+
+ENVIRONMENT = "DOOM_PROFILE"
+TRACE_DIR = "traces"
+
+CALLS = {
+    "open":     [ (builtins, "open"), (io, "open"), (os, "open") ],
+    "stat":     [ (os, "stat"), (os, "lstat") ],
+    "listdir":  [ (os, "listdir") ],
+    "scandir":  [ (os, "scandir") ]
+}
+
+active = None
+
+
+class Profiler:
+    """
+        Timings and file system call counts of the phases of one launch.
+
+        While profiling, the os and open functions listed in CALLS are wrapped to count their calls into every phase
+        that is open on the calling thread, so a phase counts the calls of the phases inside it too.
+    """
+
+    _events = []
+    _local = None
+    _originals = []
+    _start = 0.0
+
+    def __init__(self):
+        self._events    = []
+        self._local     = threading.local()
+        self._originals = []
+        self._start     = time.perf_counter()
+
+    def count(self, call):
+        for frame in getattr(self._local, "stack", []):
+            frame["calls"][call] = frame["calls"].get(call, 0) + 1
+
+    def events(self):
+        return list(self._events)
+
+    def install(self):
+        for call, targets in CALLS.items():
+            for owner, name in targets:
+                original = getattr(owner, name)
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self.wrap(call, original))
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    def wrap(self, call, function):
+        def result(*args, **kwargs):
+            self.count(call)
+            return function(*args, **kwargs)
+        return result
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+
+        frame = { "name": name, "calls": {}, "start": time.perf_counter() }
+        self._local.stack.append(frame)
+        try:
+            yield frame
+        finally:
+            self._local.stack.pop()
+            self._events.append({
+                "name":     name,
+                "start":    frame["start"] - self._start,
+                "duration": time.perf_counter() - frame["start"],
+                "depth":    len(self._local.stack),
+                "thread":   threading.get_ident(),
+                "calls":    frame["calls"]
+            })
+
+    def summary(self):
+        """
+            @return Lines with the time and the file system calls of every phase, in the order they started, indented
+                    by nesting.
+        """
+
+        result = []
+        for event in sorted(self._events, key = lambda event: (event["start"], event["depth"])):
+            calls = " ".join([ f"{call}={count}" for call, count in sorted(event["calls"].items()) ])
+            name = f"{'  ' * event['depth']}{event['name']}"
+            result.append(f"{name:<24} {event['duration'] * 1000:>9.3f} ms  {calls}")
+        return result
+
+    def trace(self):
+        """
+            @return The phases in the Chrome trace event format, for chrome://tracing, Perfetto or speedscope.
+        """
+
+        events = [ {
+            "name": event["name"],
+            "ph":   "X",
+            "ts":   round(event["start"] * 1000000, 3),
+            "dur":  round(event["duration"] * 1000000, 3),
+            "pid":  os.getpid(),
+            "tid":  event["thread"],
+            "args": event["calls"]
+        } for event in self._events ]
+
+        return { "traceEvents": events, "displayTimeUnit": "ms" }
+
+
+def requested():
+    return bool(os.environ.get(ENVIRONMENT))
+
+
+def start():
+    """
+        Start profiling the phases of this process, unless it is profiled already.
+    """
+
+    global active
+
+    if active is None:
+        active = Profiler()
+        active.install()
+    return active
+
+
+def stop(traceDir):
+    """
+        Stop profiling and write the trace.
+
+        @param traceDir Directory to write the trace to.
+        @return Tuple of the trace path and the summary lines; None if nothing was profiled.
+    """
+
+    global active
+
+    if active is None:
+        return None
+
+    profiler = active
+    profiler.uninstall()
+    active = None
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(traceDir, f"launch-{stamp}-{os.getpid()}.json")
+    os.makedirs(traceDir, exist_ok = True)
+    with open(path, "w", encoding = "utf-8") as output:
+        json.dump(profiler.trace(), output)
+
+    return path, profiler.summary()
+
+
+def phase(name):
+    """
+        @return Context manager timing a phase into the running profiler; does nothing when not profiling.
+    """
+
+    return contextlib.nullcontext() if active is None else active.phase(name)
+
+
+def profiled(function):
+    """
+        Decorator timing every call of a function as a phase of its name, when profiling.
+    """
+
+    @functools.wraps(function)
+    def result(*args, **kwargs):
+        if active is None:
+            return function(*args, **kwargs)
+
+        with active.phase(function.__name__):
+            return function(*args, **kwargs)
+    return result
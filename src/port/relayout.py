@@ -0,0 +1,460 @@
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+
+import archive
+import attempts
+import dedup
+import gzdoom
+import portEnv
+
+DEFAULTS = {
+    "category":     "max",
+    "difficulty":   "uv",
+    "executable":   "gzdoom",
+    "mapper":       ""
+}
+EXTENSION = ".lmp"
+JOURNAL_DIR = "relayout"
+NUMBER_FIELDS = [ "number" ]
+REQUIRED = [ "player", "target", "map", "number" ]
+TEMPORARY_PREFIX = ".relayout-"
+
+
+def compilePattern(pattern):
+    """
+        Turn a source naming pattern into a regular expression over "/" separated relative paths.
+
+        @param pattern Pattern like "{map}/{_}_{number}.lmp"; a {field} matches within one path component, {number}
+                       only digits. Fields that aren't part of the naming scheme are matched and ignored.
+        @return Compiled expression with one group per field.
+    """
+
+    result = ""
+    seen = set()
+    position = 0
+
+    for match in re.finditer(r"\{(\w+)\}", pattern):
+        result += re.escape(pattern[position:match.start()])
+        name = match.group(1)
+
+        if name in seen:
+            result += f"(?P={name})"
+        else:
+            result += f"(?P<{name}>\\d+)" if name in NUMBER_FIELDS else f"(?P<{name}>[^/]+?)"
+            seen.add(name)
+        position = match.end()
+
+    return re.compile(result + re.escape(pattern[position:]) + "$")
+
+
+def difficultyParts(value):
+    """
+        @return Tuple of the skill name and the settings of a difficulty like "uv", "4" or "uvfo".
+    """
+
+    value = value.lower()
+    if value in gzdoom.SKILLS:
+        return gzdoom.SKILLS[value][1], {}
+
+    keys = { key: setting for setting, key in gzdoom.SETTING_KEY.items() }
+    for name in sorted([ skill[1] for skill in gzdoom.SKILLS.values() ], key = len, reverse = True):
+        flags = value[len(name):]
+        if value.startswith(name) and all([ flag in keys for flag in flags ]):
+            return name, { keys[flag]: True for flag in flags }
+
+    raise ValueError(f"Not a difficulty: {value}.")
+
+
+def destination(fields, demoBase):
+    """
+        @param fields   Naming fields of one demo, from the source path and the defaults.
+        @param demoBase Root of the demo tree, i.e. DOOM_DEMO_DIR.
+        @return Path of the demo in the demoFileSetup naming scheme.
+    """
+
+    missing = [ name for name in REQUIRED + [ "version" ] if not fields.get(name) ]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}.")
+
+    difficulty, settings = difficultyParts(fields["difficulty"])
+    for flag in fields.get("flags", ""):
+        settings[{ key: setting for setting, key in gzdoom.SETTING_KEY.items() }[flag]] = True
+
+    naming = gzdoom.demoNaming(fields["player"], fields.get("mapper", ""), fields["target"], fields["category"],
+                               fields["version"])
+    prefix = gzdoom.demoPrefixPath(demoBase,
+                                   fields["executable"],
+                                   naming["version"],
+                                   naming["player"],
+                                   naming["mapper"],
+                                   naming["target"],
+                                   fields["map"].lower(),
+                                   difficulty,
+                                   naming["category"],
+                                   { setting: settings.get(setting, False) for setting in gzdoom.SETTING_KEY })
+    return gzdoom.demoFile(prefix, int(fields["number"]), EXTENSION)
+
+
+def sourceFiles(sourceDir):
+    """
+        @return Generator of (relative path with "/" separators, full path) of every file under sourceDir, except the
+                attempt indexes.
+    """
+
+    for dirPath, dirNames, fileNames in os.walk(sourceDir):
+        dirNames[:] = [ name for name in dirNames if not name.startswith(TEMPORARY_PREFIX) ]
+        relative = os.path.relpath(dirPath, sourceDir).replace(os.sep, "/")
+
+        for fileName in fileNames:
+            if fileName == attempts.INDEX_FILE:
+                continue
+            path = fileName if relative == "." else f"{relative}/{fileName}"
+            yield path, os.path.join(dirPath, fileName)
+
+
+def storedFiles(sourceDir, demoBase):
+    """
+        @return Generator of (relative path with "/" separators, full path) of every removed duplicate under sourceDir
+                that the dedup manifest still refers to.
+    """
+
+    prefix = dedup.relative(sourceDir, demoBase)
+    prefix = "" if prefix == "." else f"{prefix}/"
+
+    for path in dedup.readManifest(demoBase):
+        filePath = os.path.join(demoBase, *path.split("/"))
+        if path.startswith(prefix) and not os.path.lexists(filePath):
+            yield path[len(prefix):], filePath
+
+
+def plan(sourceDir, pattern, defaults, demoBase):
+    """
+        Work out every rename without touching anything.
+
+        A move collides when two sources map to the same destination, or when the destination already exists and
+        isn't itself moved away by the plan.
+
+        Removed duplicates the dedup manifest refers to are planned like files, but only their manifest entries move.
+        Archives of packed attempts are errors: their members would keep their old names in the old directory.
+
+        @return Dictionary with "moves" and "references" (source, destination) pairs, "collisions" as destination to
+                sources, "unmatched" paths and "errors" as (path, message) pairs.
+    """
+
+    expression = compilePattern(pattern)
+    result = { "moves": [], "references": [], "collisions": {}, "unmatched": [], "errors": [] }
+    stored = { os.path.abspath(filePath): relative for relative, filePath in storedFiles(sourceDir, demoBase) }
+    targets = {}
+
+    for relative, source in list(sourceFiles(sourceDir)) + [ (relative, path) for path, relative in stored.items() ]:
+        if os.path.basename(source) == archive.ARCHIVE_FILE:
+            result["errors"].append((relative, "Holds archived attempts; unpack them with archive.py first."))
+            continue
+
+        match = expression.match(relative)
+        if match is None:
+            result["unmatched"].append(relative)
+            continue
+
+        fields = dict(defaults)
+        fields.update({ name: value for name, value in match.groupdict().items() if value })
+
+        try:
+            path = destination(fields, demoBase)
+        except (KeyError, ValueError) as error:
+            result["errors"].append((relative, str(error)))
+            continue
+
+        if os.path.abspath(path) != os.path.abspath(source):
+            targets.setdefault(os.path.abspath(path), []).append(os.path.abspath(source))
+
+    sources = { source for paths in targets.values() for source in paths }
+    existing = { os.path.abspath(os.path.join(demoBase, *path.split("/"))) for path in dedup.readManifest(demoBase) }
+    for path, paths in sorted(targets.items()):
+        if len(paths) > 1 or ((os.path.lexists(path) or path in existing) and path not in sources):
+            result["collisions"][path] = paths
+        else:
+            result["references" if paths[0] in stored else "moves"].append((paths[0], path))
+
+    return result
+
+
+class Journal:
+    """
+        Append-only record of the renames of one apply. Each batch is written and synced before it is renamed, so a
+        rollback can undo whatever part of the apply happened.
+    """
+
+    _file = None
+    _lock = None
+    _path = ""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        self._file = open(path, "a", encoding = "utf-8")
+        self._lock = threading.Lock()
+        self._path = path
+
+    def close(self):
+        self._file.close()
+
+    def path(self):
+        return self._path
+
+    def write(self, entries):
+        with self._lock:
+            for source, target in entries:
+                self._file.write(json.dumps({ "from": source, "to": target }) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+
+def dropIndexes(paths):
+    """
+        Remove the attempt indexes of the directories of the given files; the launcher rebuilds them with one scan.
+    """
+
+    for demoDir in { os.path.dirname(path) for path in paths }:
+        try:
+            os.remove(attempts.indexPath(demoDir))
+        except OSError:
+            pass
+
+
+def renameAll(moves, journal):
+    """
+        Rename a batch, usually the files of one directory, journalling them first.
+
+        @return List of (source, error) of renames that failed.
+    """
+
+    journal.write(moves)
+    failed = []
+
+    for source, target in moves:
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok = True)
+            os.rename(source, target)
+        except OSError as error:
+            failed.append((source, str(error)))
+
+    return failed
+
+
+def inParallel(moves, journal, workers):
+    """
+        Rename through a thread pool with one task per source directory.
+
+        @return List of (source, error) of renames that failed.
+    """
+
+    byDir = {}
+    for source, target in moves:
+        byDir.setdefault(os.path.dirname(source), []).append((source, target))
+
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        for result in executor.map(lambda batch: renameAll(batch, journal), byDir.values()):
+            failed += result
+
+    return failed
+
+
+def apply(moves, journalPath, workers = 8):
+    """
+        Carry out the moves of a plan.
+
+        Every file first moves to a temporary name in its own directory and only then to its destination, so moves
+        whose destinations are other moves' sources (chains, swaps) can't overwrite each other. If anything fails, all
+        renames done so far are rolled back. The attempt indexes of the directories involved are dropped either way.
+
+        @return List of (source, error) of renames that failed; empty when everything moved.
+    """
+
+    token = uuid.uuid4().hex[:8]
+    staged = [ (source, os.path.join(os.path.dirname(source), f"{TEMPORARY_PREFIX}{token}-{index}"), target)
+               for index, (source, target) in enumerate(moves) ]
+
+    journal = Journal(journalPath)
+    try:
+        failed = inParallel([ (source, temporary) for source, temporary, _ in staged ], journal, workers)
+        if not failed:
+            failed = inParallel([ (temporary, target) for _, temporary, target in staged ], journal, workers)
+    finally:
+        journal.close()
+
+    if failed:
+        rollback(journalPath)
+    dropIndexes([ path for move in moves for path in move ])
+    return failed
+
+
+def rollback(journalPath):
+    """
+        Undo the renames of a journal, newest first. Renames that never happened are skipped. The attempt indexes of
+        the directories involved are dropped.
+
+        @return Number of renames undone.
+    """
+
+    with open(journalPath, "r", encoding = "utf-8") as contents:
+        entries = [ json.loads(line) for line in contents if line.strip() ]
+
+    result = 0
+    for entry in reversed(entries):
+        if os.path.lexists(entry["to"]) and not os.path.lexists(entry["from"]):
+            os.rename(entry["to"], entry["from"])
+            result += 1
+
+            dropIndexes([ entry["to"] ])
+            try:
+                os.rmdir(os.path.dirname(entry["to"]))
+            except OSError:
+                pass
+
+    dropIndexes([ entry["from"] for entry in entries ])
+    return result
+
+
+def journalMoves(journalPath):
+    """
+        @return List of (source, destination) of a journal, with the steps through temporary names joined up.
+    """
+
+    with open(journalPath, "r", encoding = "utf-8") as contents:
+        steps = [ json.loads(line) for line in contents if line.strip() ]
+
+    following = { step["from"]: step["to"] for step in steps }
+    targets = set(following.values())
+    result = []
+
+    for source in following:
+        if source in targets:
+            continue
+
+        target = following[source]
+        while target in following:
+            target = following[target]
+        result.append((source, target))
+
+    return result
+
+
+def updateManifest(moves, demoBase):
+    """
+        Point the dedup manifest at the new paths of moved demos, both the removed duplicates and the demos they equal.
+
+        @return Number of manifest entries changed.
+    """
+
+    references = dedup.readManifest(demoBase)
+    if not references:
+        return 0
+
+    renamed = { dedup.relative(source, demoBase): dedup.relative(target, demoBase) for source, target in moves }
+    updated = { renamed.get(path, path): renamed.get(equal, equal) for path, equal in references.items() }
+
+    changed = len(set(updated.items()) - set(references.items()))
+    if changed:
+        dedup.writeManifest(demoBase, updated)
+    return changed
+
+
+def journalPath():
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(portEnv.cacheDir(), JOURNAL_DIR, f"{stamp}-{os.getpid()}.jsonl")
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Demo Relayout", description = "Rename a tree of demos into the demo tree.")
+    parser.add_argument("source", nargs = "?", default = None, help = "Directory of the demos to rename.")
+    parser.add_argument("pattern", nargs = "?", default = None,
+                        help = "Source naming, e.g. \"{map}/{_}_{number}.lmp\".")
+
+    parser.add_argument("-b", "--base",         default = None,
+                                                help    = "Demo tree root (DOOM_DEMO_DIR).")
+
+    parser.add_argument("-j", "--workers",      default = 8,
+                                                type    = int,
+                                                help    = "Directories renamed in parallel.")
+
+    parser.add_argument("-n", "--dryRun",       action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Only print the plan.")
+
+    parser.add_argument("-o", "--journal",      default = None,
+                                                help    = "Journal file; defaults to one in the cache directory.")
+
+    parser.add_argument("-r", "--rollback",     default = None,
+                                                help    = "Undo the renames of a journal and exit.")
+
+    parser.add_argument("-s", "--set",          default = [],
+                                                nargs   = "*",
+                                                help    = "Field values not in the pattern, e.g. player=Cinnamon.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+
+    base = args.base or gzdoom.envSetting("DOOM_DEMO_DIR")
+
+    if args.rollback:
+        print(f"Undid {rollback(args.rollback)} renames.")
+        restored = updateManifest([ (target, source) for source, target in journalMoves(args.rollback) ], base)
+        print(f"Restored {restored} manifest entries.")
+        sys.exit(0)
+
+    if not args.source or not args.pattern:
+        print("A source directory and a pattern are needed.")
+        sys.exit(2)
+
+    defaults = dict(DEFAULTS)
+    defaults["version"] = os.environ.get("GZDOOM_LATEST_VERSION", "")
+    for assignment in args.set:
+        name, _, value = assignment.partition("=")
+        defaults[name] = value
+
+    result = plan(args.source, args.pattern, defaults, base)
+
+    for source, target in result["moves"]:
+        print(f"{source} -> {target}")
+    for source, target in result["references"]:
+        print(f"{source} -> {target} (removed duplicate)")
+    for target, sources in result["collisions"].items():
+        print(f"Collision: {target} <- {', '.join(sources)}")
+    for path, message in result["errors"]:
+        print(f"Error: {path}: {message}")
+    print(f"{len(result['moves'])} moves, {len(result['references'])} removed duplicates, "
+          f"{len(result['collisions'])} collisions, {len(result['errors'])} errors, "
+          f"{len(result['unmatched'])} unmatched.")
+
+    if args.dryRun:
+        sys.exit(0)
+    if result["collisions"] or result["errors"]:
+        print("Nothing renamed; resolve the collisions and errors first.")
+        sys.exit(1)
+
+    journal = args.journal or journalPath()
+    failed = apply(result["moves"], journal, args.workers)
+    for source, message in failed:
+        print(f"Failed: {source}: {message}")
+
+    if not failed and result["references"]:
+        references = Journal(journal)
+        references.write(result["references"])
+        references.close()
+    if not failed:
+        print(f"Updated {updateManifest(result['moves'] + result['references'], base)} manifest entries.")
+    print(f"Journal: {journal}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,265 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import portEnv
+
+PHASES = [ "parse", "resolve", "runtime" ]
+TELEMETRY_FILE = "telemetry.db"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS launches (
+        id          INTEGER PRIMARY KEY,
+        started     REAL NOT NULL,
+        target      TEXT,
+        map         TEXT,
+        skill       TEXT,
+        difficulty  TEXT,
+        category    TEXT,
+        settings    TEXT,
+        player      TEXT,
+        executable  TEXT,
+        version     TEXT,
+        attempt     INTEGER,
+        record      INTEGER,
+        launched    INTEGER,
+        exitCode    INTEGER,
+        wall        REAL,
+        parse       REAL,
+        resolve     REAL,
+        runtime     REAL,
+        files       TEXT
+    );
+    CREATE INDEX IF NOT EXISTS launchesStarted ON launches (started);
+    CREATE INDEX IF NOT EXISTS launchesMap ON launches (target, map);
+"""
+
+
+def databasePath():
+    return os.path.join(portEnv.cacheDir(), TELEMETRY_FILE)
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout = 5)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class Session:
+    """
+        Timings and details of one launch, from the start of the process to the end of the engine.
+
+        Phases are timed with the `phase` context manager; a phase entered twice adds up. Nothing is written until
+        `save`, and a session that can't be saved is dropped without failing the launch.
+    """
+
+    _details = {}
+    _exitCode = None
+    _launched = False
+    _phases = {}
+    _start = 0.0
+    _started = 0.0
+
+    def __init__(self):
+        self._details  = {}
+        self._exitCode = None
+        self._launched = False
+        self._phases   = {}
+        self._start    = time.perf_counter()
+        self._started  = time.time()
+
+    def describe(self, details):
+        self._details.update(details)
+
+    def finish(self, exitCode, launched):
+        self._exitCode = exitCode
+        self._launched = bool(launched)
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def phases(self):
+        return dict(self._phases)
+
+    def add(self, name, seconds):
+        self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    def entry(self):
+        details = self._details
+        return {
+            "started":      self._started,
+            "target":       details.get("target"),
+            "map":          details.get("map"),
+            "skill":        details.get("skill"),
+            "difficulty":   details.get("difficulty"),
+            "category":     details.get("category"),
+            "settings":     json.dumps(details.get("settings", [])),
+            "player":       details.get("player"),
+            "executable":   details.get("executable"),
+            "version":      details.get("version"),
+            "attempt":      details.get("attempt"),
+            "record":       int(bool(details.get("record"))),
+            "launched":     int(self._launched),
+            "exitCode":     self._exitCode,
+            "wall":         time.perf_counter() - self._start,
+            "parse":        self._phases.get("parse"),
+            "resolve":      self._phases.get("resolve"),
+            "runtime":      self._phases.get("runtime"),
+            "files":        json.dumps(details.get("files", []))
+        }
+
+    def save(self, path = None):
+        """
+            Append the session to the store.
+
+            @return True if it was written.
+        """
+
+        entry = self.entry()
+        columns = ", ".join(entry)
+        marks = ", ".join([ "?" ] * len(entry))
+
+        try:
+            connection = connect(path or databasePath())
+            with connection:
+                connection.execute(f"INSERT INTO launches ({columns}) VALUES ({marks})", list(entry.values()))
+            connection.close()
+        except (OSError, sqlite3.Error):
+            return False
+
+        return True
+
+
+class Phase:
+    _name = ""
+    _session = None
+    _start = 0.0
+
+    def __init__(self, session, name):
+        self._name    = name
+        self._session = session
+        self._start   = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._session.add(self._name, time.perf_counter() - self._start)
+        return False
+
+
+def condition(since, target):
+    clauses = [ "launched = 1" ]
+    values = []
+
+    if since is not None:
+        clauses.append("started >= ?")
+        values.append(since)
+    if target is not None:
+        clauses.append("target = ?")
+        values.append(target.lower())
+
+    return " AND ".join(clauses), values
+
+
+def mapTimes(connection, since = None, target = None):
+    """
+        @return List of (target, map, attempts, seconds in the engine, last start), most played first.
+    """
+
+    where, values = condition(since, target)
+    return connection.execute(f"""
+        SELECT target, map, COUNT(*), COALESCE(SUM(runtime), 0), MAX(started)
+        FROM launches WHERE {where}
+        GROUP BY target, map
+        ORDER BY 4 DESC
+    """, values).fetchall()
+
+
+def hourly(connection, since = None, target = None):
+    """
+        @return List of (local hour like "2024-03-01 21:00", attempts, seconds in the engine), oldest first.
+    """
+
+    where, values = condition(since, target)
+    return connection.execute(f"""
+        SELECT strftime('%Y-%m-%d %H:00', started, 'unixepoch', 'localtime') AS hour, COUNT(*),
+               COALESCE(SUM(runtime), 0)
+        FROM launches WHERE {where}
+        GROUP BY hour
+        ORDER BY hour
+    """, values).fetchall()
+
+
+def overhead(connection, since = None, target = None):
+    """
+        The launcher's own time next to the engine's, over every recorded launch, launched or not.
+
+        @return Dictionary of phase to (count, mean seconds, max seconds), plus "launcher" for whatever of the wall time
+                isn't the engine.
+    """
+
+    where, values = condition(since, target)
+    where = where.replace("launched = 1", "1")
+
+    result = {}
+    for name in PHASES + [ "launcher" ]:
+        column = "wall - COALESCE(runtime, 0)" if name == "launcher" else name
+        row = connection.execute(f"""
+            SELECT COUNT({column}), AVG({column}), MAX({column})
+            FROM launches WHERE {where} AND {column.split(" ")[0]} IS NOT NULL
+        """, values).fetchone()
+        result[name] = (row[0], row[1] or 0.0, row[2] or 0.0)
+
+    return result
+
+
+def duration(seconds):
+    return str(datetime.timedelta(seconds = round(seconds)))
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Launch Telemetry", description = "Report where the practice time went.")
+    parser.add_argument("report", nargs = "?", default = "maps", choices = [ "maps", "hours", "phases" ])
+
+    parser.add_argument("-d", "--days",         default = None,
+                                                type    = float,
+                                                help    = "Only the launches of the last days.")
+
+    parser.add_argument("-f", "--file",         default = None,
+                                                help    = "Telemetry database; defaults to the one in the cache.")
+
+    parser.add_argument("-t", "--target",       default = None,
+                                                help    = "Only the launches of one WAD.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+    path = args.file or databasePath()
+    since = None if args.days is None else time.time() - args.days * 24 * 60 * 60
+
+    if not os.path.exists(path):
+        print(f"No launches recorded in {path}.")
+        sys.exit(0)
+
+    connection = connect(path)
+
+    if args.report == "maps":
+        for target, map, count, seconds, last in mapTimes(connection, since, args.target):
+            lastTime = datetime.datetime.fromtimestamp(last).strftime("%Y-%m-%d %H:%M")
+            print(f"{target:<16} {map:<8} {count:>6} attempts  {duration(seconds):>10}  last {lastTime}")
+    elif args.report == "hours":
+        for hour, count, seconds in hourly(connection, since, args.target):
+            print(f"{hour}  {count:>4} attempts  {duration(seconds):>9}")
+    else:
+        for name, (count, mean, longest) in overhead(connection, since, args.target).items():
+            print(f"{name:<10} {count:>6}  mean {mean * 1000:>10.1f} ms  max {longest * 1000:>10.1f} ms")
+
+    connection.close()
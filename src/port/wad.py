@@ -0,0 +1,114 @@
+import mmap
+import os
+import re
+import struct
+
+HEADER = struct.Struct("<4sii")
+LUMP   = struct.Struct("<ii8s")
+
+IDENTIFICATIONS = { b"IWAD", b"PWAD" }
+
+DOOM_MAP  = re.compile(r"^E[1-9]M[1-9]$")
+DOOM2_MAP = re.compile(r"^MAP[0-9][0-9]$")
+MUSIC     = re.compile(r"^D_.+$")
+
+
+class Wad:
+    """
+        Read-only, memory-mapped view of a WAD file.
+
+        Only the header and the lump directory are parsed; lump contents stay in the mapping until asked for.
+    """
+
+    _data           = None
+    _filePath       = ""
+    _identification = ""
+    _lumps          = []
+    _size           = 0
+
+    def __init__(self, filePath):
+        self._filePath = str(filePath)
+
+        with open(self._filePath, "rb") as contents:
+            self._size = os.fstat(contents.fileno()).st_size
+            if self._size < HEADER.size:
+                raise ValueError(f"Not a WAD file: {self._filePath}.")
+            self._data = mmap.mmap(contents.fileno(), 0, access = mmap.ACCESS_READ)
+
+        identification, count, offset = HEADER.unpack_from(self._data, 0)
+        end = offset + count * LUMP.size
+
+        if identification not in IDENTIFICATIONS or count < 0 or offset < HEADER.size or end > self._size:
+            self.close()
+            raise ValueError(f"Not a WAD file: {self._filePath}.")
+
+        self._identification = identification.decode("ascii")
+        self._lumps = []
+
+        with memoryview(self._data) as view:
+            for position, size, name in LUMP.iter_unpack(view[offset:end]):
+                self._lumps.append((name.split(b"\0")[0].decode("ascii", "replace").upper(), position, size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def filePath(self):
+        return self._filePath
+
+    def identification(self):
+        return self._identification
+
+    def isIwad(self):
+        return self._identification == "IWAD"
+
+    def lump(self, name):
+        """
+            @return A memoryview of the last lump called name (the one the engine would use), or None.
+        """
+
+        name = name.upper()
+        for lumpName, position, size in reversed(self._lumps):
+            if lumpName == name:
+                return memoryview(self._data)[position:position + size]
+        return None
+
+    def lumps(self):
+        return [ lumpName for lumpName, _, _ in self._lumps ]
+
+    def maps(self):
+        return [ lumpName.lower() for lumpName, _, _ in self._lumps if isMap(lumpName) ]
+
+    def mapType(self):
+        """
+            @return "doom" for ExMy maps, "doom2" for MAPxx maps, None if the WAD has no maps.
+        """
+
+        for lumpName, _, _ in self._lumps:
+            if DOOM_MAP.match(lumpName):
+                return "doom"
+            if DOOM2_MAP.match(lumpName):
+                return "doom2"
+        return None
+
+    def music(self):
+        return [ lumpName for lumpName, _, _ in self._lumps if MUSIC.match(lumpName) ]
+
+    def size(self):
+        return self._size
+
+
+def isMap(lumpName):
+    lumpName = lumpName.upper()
+    return bool(DOOM_MAP.match(lumpName) or DOOM2_MAP.match(lumpName))
+
+
+def isWad(filePath):
+    return filePath.lower().endswith(".wad")
@@ -0,0 +1,143 @@
+import argparse
+import sys
+import time
+import tracemalloc
+
+import readWiki
+
+
+def removeTags(text, tags):
+    result = text
+    for tag in tags:
+        result = result.replace(f"<{tag}>", "").replace(f"</{tag}>", "")
+    return result
+
+
+def categorize(raw):
+    stop = "Multiplayer"
+    categories = [ "Monsters", "Weapons", "Ammunition", "Health &amp; Armor", "Items", "Key", "Miscellaneous", stop ]
+
+    result = { name: [] for name in categories }
+    lines = raw.splitlines()
+
+    categoryIndex = 0
+    currentCategory = None
+    nextCategory = categories[categoryIndex]
+
+    for line in lines:
+        if nextCategory in line:
+            if categoryIndex + 1 >= len(categories):
+                break
+
+            currentCategory = nextCategory
+            categoryIndex += 1
+            nextCategory = categories[categoryIndex]
+
+        if currentCategory:
+            result[currentCategory].append(line)
+
+    del result[stop]
+    return result
+
+
+def adjust(text, adjustments):
+    result = text
+    for pre, post in adjustments:
+        result = result.replace(pre, post)
+    return result
+
+
+def lexical(text):
+    return " ".join([ word[0].upper() + word[1:].lower() for word in text.split() ])
+
+
+def readCategory(values):
+    result = {}
+    currentName = None
+
+    for line in values[6:]:
+        pruned = removeTags(line, ["td", "th", "tr", "td colspan=\"3\""])
+
+        if "</table>" in line:
+            break
+
+        if not pruned:
+            currentName = None
+            continue
+
+        if not currentName:
+            if "a href" in pruned:
+                currentName = pruned.split("/wiki/")[1].split("\" title")[0]
+            else:
+                currentName = pruned.replace("<td style=\"text-align: left;\">", "")
+
+            currentName = lexical(currentName.replace("_", " ").replace("%27", "'"))
+            currentName = adjust(currentName, [["Of", "of"], ["Bfg", "BFG"], ["-vile", "-Vile"]])
+            result[currentName] = []
+            continue
+
+        result[currentName].append(int(pruned))
+
+    return result
+
+
+def lineParse(filePath):
+    """
+        The previous line based reader: the whole page as one string, split into lines.
+    """
+
+    with open(filePath, "r", encoding = "utf-8", errors = "replace") as contents:
+        raw = contents.read()
+
+    return { name: readCategory(lines) for name, lines in categorize(raw).items() }
+
+
+def streamParse(filePath):
+    with open(filePath, "r", encoding = "utf-8", errors = "replace") as contents:
+        return readWiki.parse(readWiki.readChunks(contents))
+
+
+def measure(function, filePath, repeat):
+    """
+        @return Tuple of the best time in seconds, the peak of traced allocations in bytes and the last result.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(filePath)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    readWiki.normalize.cache_clear()
+    tracemalloc.start()
+    function(filePath)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Wiki Parse Benchmark",
+                                     description = "Compare the line based and streaming level page readers.")
+    parser.add_argument("pages", nargs = "+", help = "Saved wiki level pages.")
+
+    parser.add_argument("-n", "--repeat",   default = 20,
+                                            type    = int,
+                                            help    = "Runs per page; the best time is kept.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+
+    print(f"{'page':<40} {'reader':<8} {'best ms':>10} {'peak KiB':>10}  monsters")
+    for page in args.pages:
+        lineTime, linePeak, lineResult = measure(lineParse, page, args.repeat)
+        streamTime, streamPeak, streamResult = measure(streamParse, page, args.repeat)
+        same = "same" if lineResult["Monsters"] == streamResult["Monsters"] else "DIFFERENT"
+
+        print(f"{page[-40:]:<40} {'lines':<8} {lineTime * 1000:>10.3f} {linePeak / 1024:>10.1f}")
+        print(f"{'':<40} {'stream':<8} {streamTime * 1000:>10.3f} {streamPeak / 1024:>10.1f}  {same}")
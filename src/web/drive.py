@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import urllib.parse
+import urllib.request
+
+import webEnv
+
+DRIVE_API = "https://www.googleapis.com/drive/v3"
+
+CACHE_FILE = "drive.json"
+CACHE_VERSION = 1
+
+FILE_FIELDS = "id, name, modifiedTime, size, md5Checksum, trashed"
+PAGE_SIZE = 1000
+
+
+def nameQuery(prefix):
+    escaped = prefix.replace("\\", "\\\\").replace("'", "\\'")
+    return f"name contains '{escaped}' and trashed = false"
+
+
+class DriveClient:
+    """
+        Minimal asynchronous Drive v3 client for listing files.
+
+        Requests run in worker threads, at most `concurrency` at a time. The base URL can point at a local fake Drive
+        endpoint for testing.
+    """
+
+    _baseUrl     = DRIVE_API
+    _semaphore   = None
+    _timeout     = 30
+    _token       = ""
+
+    def __init__(self, token, baseUrl = None, concurrency = 4, timeout = 30):
+        self._baseUrl   = (baseUrl or os.environ.get("DRIVE_API_URL") or DRIVE_API).rstrip("/")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._timeout   = timeout
+        self._token     = str(token)
+
+    def request(self, path, parameters):
+        url = f"{self._baseUrl}/{path}?{urllib.parse.urlencode(parameters)}"
+        headers = { "Accept": "application/json" }
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+
+        request = urllib.request.Request(url, headers = headers)
+        with urllib.request.urlopen(request, timeout = self._timeout) as response:
+            return json.load(response)
+
+    async def get(self, path, parameters):
+        async with self._semaphore:
+            return await asyncio.to_thread(self.request, path, parameters)
+
+    async def changes(self, pageToken):
+        """
+            Follow the change pages from a page token.
+
+            @return Tuple of the changes and the token to continue from next time.
+        """
+
+        result = []
+        fields = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+
+        while True:
+            page = await self.get("changes", { "pageToken": pageToken, "pageSize": PAGE_SIZE, "fields": fields })
+            result += page.get("changes", [])
+
+            if "nextPageToken" in page:
+                pageToken = page["nextPageToken"]
+                continue
+
+            return result, page.get("newStartPageToken", pageToken)
+
+    async def listFiles(self, query):
+        """
+            List every file matching a query, following all pages.
+        """
+
+        result = []
+        parameters = { "q": query, "pageSize": PAGE_SIZE, "fields": f"nextPageToken, files({FILE_FIELDS})" }
+
+        while True:
+            page = await self.get("files", parameters)
+            result += page.get("files", [])
+
+            if not page.get("nextPageToken"):
+                return result
+            parameters = dict(parameters, pageToken = page["nextPageToken"])
+
+    async def startPageToken(self):
+        return (await self.get("changes/startPageToken", {}))["startPageToken"]
+
+
+def fileEntry(item):
+    return {
+        "name":         item["name"],
+        "modifiedTime": item.get("modifiedTime"),
+        "size":         int(item["size"]) if "size" in item else None,
+        "md5Checksum":  item.get("md5Checksum")
+    }
+
+
+def matches(name, prefixes):
+    return any([ name.startswith(prefix) for prefix in prefixes ])
+
+
+def readCache(cachePath, prefixes):
+    try:
+        with open(cachePath, "r", encoding = "utf-8") as contents:
+            data = json.load(contents)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("version") != CACHE_VERSION or data.get("prefixes") != sorted(prefixes):
+        return None
+    return data
+
+
+def writeCache(cachePath, data):
+    temporary = f"{cachePath}.tmp"
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump(data, output, indent = 4, sort_keys = True)
+    os.replace(temporary, cachePath)
+
+
+async def refresh(client, prefixes, cachePath):
+    """
+        Bring the local metadata cache up to date.
+
+        The first run lists every file whose name starts with one of the prefixes, one query per prefix and in parallel.
+        Later runs only read the change feed since the previous run.
+
+        @param client    DriveClient to use.
+        @param prefixes  Name prefixes to keep, e.g. player names.
+        @param cachePath Metadata cache file.
+        @return Dictionary of file id to name, modifiedTime, size and md5Checksum.
+    """
+
+    data = readCache(cachePath, prefixes)
+
+    if data is None:
+        token = await client.startPageToken()
+        listings = await asyncio.gather(*[ client.listFiles(nameQuery(prefix)) for prefix in prefixes ])
+        files = {}
+
+        for listing in listings:
+            for item in listing:
+                if matches(item["name"], prefixes):
+                    files[item["id"]] = fileEntry(item)
+
+        data = { "version": CACHE_VERSION, "prefixes": sorted(prefixes), "pageToken": token, "files": files }
+        writeCache(cachePath, data)
+        return files
+
+    changes, token = await client.changes(data["pageToken"])
+    files = data["files"]
+    changed = token != data["pageToken"]
+
+    for change in changes:
+        fileId = change.get("fileId")
+        item = change.get("file")
+
+        if change.get("removed") or item is None or item.get("trashed") or not matches(item["name"], prefixes):
+            changed = files.pop(fileId, None) is not None or changed
+            continue
+
+        entry = fileEntry(item)
+        if files.get(fileId) != entry:
+            files[fileId] = entry
+            changed = True
+
+    if changed:
+        data["pageToken"] = token
+        writeCache(cachePath, data)
+
+    return files
+
+
+def listDemos(token, prefixes, cachePath = None, baseUrl = None, concurrency = 4):
+    """
+        @return Dictionary of file id to metadata of every Drive file starting with one of the prefixes.
+    """
+
+    async def main():
+        client = DriveClient(token, baseUrl, concurrency)
+        return await refresh(client, list(prefixes), cachePath or os.path.join(webEnv.cacheDir(), CACHE_FILE))
+
+    return asyncio.run(main())
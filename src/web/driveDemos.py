@@ -1,64 +1,66 @@
 from __future__ import print_function
 
-raise NotImplementedError(f"{__file__} is not implemented.")
-
 import os.path
 import sys
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 
-# If modifying these scopes, delete the file token.json.
+import drive
+
 SCOPES = ['https://www.googleapis.com/auth/drive.metadata.readonly']
 
+PREFIXES = [ "Cinnamon" ]
+
 
-def getFiles(secretFile):
-    """Shows basic usage of the Drive v3 API.
-    Prints the names and ids of the first 10 files the user has access to.
+def tokenPath(scopes):
     """
+        @return The token file for a set of scopes: token.json for the listing scope, one file per other scope set,
+                so a token granted for listing is never taken for one that may write.
+    """
+
+    if sorted(scopes) == sorted(SCOPES):
+        return "token.json"
+    return f"token-{'+'.join(sorted([ scope.rsplit('/', 1)[-1] for scope in scopes ]))}.json"
+
+
+def credentials(secretFile, scopes = SCOPES):
     creds = None
-    # The file token.json stores the user's access and refresh tokens, and is
+    tokenFile = tokenPath(scopes)
+    # The token file stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
     # time.
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    if os.path.exists(tokenFile):
+        creds = Credentials.from_authorized_user_file(tokenFile, scopes)
+    # A token saved for other scopes loads fine but isn't allowed to do more.
+    if creds and not creds.has_scopes(scopes):
+        creds = None
     # If there are no (valid) credentials available, let the user log in.
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(
-                secretFile, SCOPES)
+                secretFile, scopes)
             creds = flow.run_local_server(port=0)
         # Save the credentials for the next run
-        with open('token.json', 'w') as token:
+        with open(tokenFile, 'w') as token:
             token.write(creds.to_json())
 
-    try:
-        service = build('drive', 'v3', credentials=creds)
+    return creds
+
 
-        # Call the Drive v3 API
-        results = service.files().list(
-            fields="nextPageToken, files(id, name)").execute()
-        items = results.get('files', [])
+def getFiles(secretFile, prefixes = PREFIXES):
+    """
+        Names of the demo files on Drive.
 
-        if not items:
-            print('No files found.')
-            return
+        All result pages are read, and the name prefix filter is sent to Drive as a query. File metadata is cached
+        locally, so later runs only fetch what changed since the previous run.
+    """
 
-        result = []
-        for item in items:
-            name = item["name"]
-            if "Cinnamon" in name[0:len("Cinnamon")]:
-                result.append(name)
-            #print(u'{0} ({1})'.format(item['name'], item['id']))
-        return result
-    except HttpError as error:
-        # TODO(developer) - Handle errors from drive API.
-        print(f'An error occurred: {error}')
+    files = drive.listDemos(credentials(secretFile).token, prefixes)
+    return sorted([ entry["name"] for entry in files.values() ])
 
 
 def progress(secretFile):
@@ -82,9 +84,8 @@ def progress(secretFile):
             "map":          parts[2],
             "wad":          parts[1]
         }
-        print(type(result[fileName]))
 
-    return findNexts(byWad(result, errors))
+    return byWad(result, errors)
 
 
 def byWad(demos, errors):
@@ -101,11 +102,3 @@ def byWad(demos, errors):
         result[name].sort()
 
     return result, errors
-
-def findNexts(progress, errors):
-    types = {}
-    for wadName, maps in progress.items():
-        types[wadName] = "doom" if maps[0][0] == "e" else "doom2"
-
-def driveDemos():
-    raise NotImplementedError(f"{__name__} is not implemented.")
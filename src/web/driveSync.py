@@ -0,0 +1,466 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import drive
+import webEnv
+
+# The demo tree's archives and deduplication manifest are read with the launcher's own modules.
+PORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "port")
+if PORT_DIR not in sys.path:
+    sys.path.append(PORT_DIR)
+
+import archive
+import dedup
+
+DRIVE_UPLOAD_API = "https://www.googleapis.com/upload/drive/v3"
+SYNC_SCOPES = [ "https://www.googleapis.com/auth/drive" ]
+
+CHUNK_SIZE = 8 * 1024 * 1024
+EXTENSION = ".lmp"
+HASH_FILE = "driveHashes.json"
+PART_SUFFIX = ".part"
+SESSION_FILE = "driveUploads.json"
+
+
+def demoDir(baseDir, fileName):
+    """
+        Directory a demo belongs in, following the player/wad/map layout of demoFileSetup.
+
+        @param baseDir  The executable/version directory of the demo tree.
+        @param fileName Demo name like "Player-wad-map01-uv-max_003.lmp".
+        @return The directory, or None if the name doesn't follow the naming scheme.
+    """
+
+    stem = fileName[:-len(EXTENSION)]
+    if not fileName.endswith(EXTENSION) or "_" not in stem:
+        return None
+
+    parts = stem.rsplit("_", 1)[0].split("-")
+    if len(parts) < 5:
+        return None
+
+    return os.path.join(baseDir, "-".join(parts[:-4]), parts[-4], parts[-3])
+
+
+def demoKey(baseDir, fileName):
+    """
+        @return Path relative to baseDir, "/" separated, that a demo from Drive belongs at; None if the name doesn't
+                follow the naming scheme.
+    """
+
+    directory = demoDir(baseDir, fileName)
+    return None if directory is None else relativeKey(os.path.join(directory, fileName), baseDir)
+
+
+def relativeKey(filePath, baseDir):
+    return os.path.relpath(filePath, baseDir).replace(os.sep, "/")
+
+
+def readablePath(filePath, demoBase):
+    """
+        Find the file a local demo can be read from: the demo itself, the demo a dedup reference points to, or either
+        of them extracted from its map directory's archive. The same lookup as the launcher's resolveDemo.
+
+        @return Path of a readable file, None if the demo isn't anywhere.
+    """
+
+    for candidate in [ filePath, dedup.referenced(filePath, demoBase) ]:
+        if candidate is None:
+            continue
+        if os.path.exists(candidate):
+            return candidate
+
+        result = archive.extract(candidate)
+        if result is not None:
+            return result
+
+    return None
+
+
+def md5(filePath):
+    result = hashlib.md5()
+    with open(filePath, "rb") as contents:
+        for block in iter(lambda: contents.read(CHUNK_SIZE), b""):
+            result.update(block)
+    return result.hexdigest()
+
+
+def readJson(filePath):
+    try:
+        with open(filePath, "r", encoding = "utf-8") as contents:
+            return json.load(contents)
+    except (OSError, ValueError):
+        return {}
+
+
+def writeJson(filePath, data):
+    temporary = f"{filePath}.tmp"
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump(data, output, indent = 4, sort_keys = True)
+    os.replace(temporary, filePath)
+
+
+class Transfers:
+    """
+        Chunked, resumable downloads and uploads against the Drive v3 API.
+
+        Downloads resume from a ".part" file next to the destination. Upload session URLs are kept in a session file
+        so an interrupted upload continues where Drive says it stopped.
+    """
+
+    _baseUrl     = drive.DRIVE_API
+    _chunkSize   = CHUNK_SIZE
+    _folderId    = None
+    _sessionPath = ""
+    _sessions    = {}
+    _timeout     = 60
+    _token       = ""
+    _uploadUrl   = DRIVE_UPLOAD_API
+
+    def __init__(self, token, folderId, sessionPath, baseUrl = None, uploadUrl = None, chunkSize = CHUNK_SIZE):
+        self._baseUrl     = (baseUrl or os.environ.get("DRIVE_API_URL") or drive.DRIVE_API).rstrip("/")
+        self._chunkSize   = int(chunkSize)
+        self._folderId    = folderId
+        self._sessionPath = sessionPath
+        self._sessions    = readJson(sessionPath)
+        self._timeout     = 60
+        self._token       = str(token)
+        self._uploadUrl   = (uploadUrl or os.environ.get("DRIVE_UPLOAD_URL") or DRIVE_UPLOAD_API).rstrip("/")
+
+    def forget(self, key, lock):
+        with lock:
+            self._sessions.pop(key, None)
+            self.saveSessions()
+
+    def open(self, url, method = "GET", data = None, headers = None):
+        headers = dict(headers or {})
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+
+        request = urllib.request.Request(url, data = data, headers = headers, method = method)
+        try:
+            return urllib.request.urlopen(request, timeout = self._timeout)
+        except urllib.error.HTTPError as error:
+            if error.code == 308:
+                return error
+            raise
+
+    def download(self, fileId, size, checksum, destination):
+        part = f"{destination}{PART_SUFFIX}"
+        os.makedirs(os.path.dirname(destination), exist_ok = True)
+        position = os.path.getsize(part) if os.path.exists(part) else 0
+
+        if position > size:
+            os.remove(part)
+            position = 0
+
+        with open(part, "ab") as output:
+            while position < size:
+                end = min(position + self._chunkSize, size) - 1
+                headers = { "Range": f"bytes={position}-{end}" }
+
+                with self.open(f"{self._baseUrl}/files/{fileId}?alt=media", headers = headers) as response:
+                    block = response.read()
+
+                if not block:
+                    raise ValueError(f"Empty response downloading {destination}.")
+                output.write(block)
+                position += len(block)
+
+        if checksum and md5(part) != checksum:
+            os.remove(part)
+            raise ValueError(f"Checksum mismatch downloading {destination}.")
+
+        os.replace(part, destination)
+
+    def saveSessions(self):
+        writeJson(self._sessionPath, self._sessions)
+
+    def sessionKey(self, source, size):
+        return f"{source}:{size}:{os.stat(source).st_mtime_ns}"
+
+    def upload(self, source, lock, name = None):
+        """
+            Upload a file in chunks through a resumable upload session.
+
+            @param source Local file.
+            @param lock   Lock guarding the session file, shared by the worker threads.
+            @param name   Name on Drive; the file's own name by default.
+            @return Metadata of the created file as returned by Drive.
+        """
+
+        size = os.path.getsize(source)
+        key = self.sessionKey(source, size)
+
+        with lock:
+            session = self._sessions.get(key)
+
+        position = 0
+        if session:
+            try:
+                response = self.open(session, "PUT", b"", { "Content-Range": f"bytes */{size}" })
+            except urllib.error.HTTPError as error:
+                if error.code not in [ 404, 410 ]:
+                    raise
+                session = None
+            else:
+                if response.status != 308:
+                    with response:
+                        result = json.load(response)
+                    self.forget(key, lock)
+                    return result
+                position = self.received(response)
+
+        if not session:
+            metadata = { "name": name or os.path.basename(source) }
+            if self._folderId:
+                metadata["parents"] = [ self._folderId ]
+
+            headers = {
+                "Content-Type":             "application/json; charset=UTF-8",
+                "X-Upload-Content-Length":  str(size)
+            }
+            url = f"{self._uploadUrl}/files?uploadType=resumable&fields=id,name,size,md5Checksum,modifiedTime"
+            with self.open(url, "POST", json.dumps(metadata).encode("utf-8"), headers) as response:
+                session = response.headers["Location"]
+
+            with lock:
+                self._sessions[key] = session
+                self.saveSessions()
+
+        with open(source, "rb") as contents:
+            while True:
+                contents.seek(position)
+                block = contents.read(self._chunkSize)
+                end = position + len(block) - 1
+                contentRange = f"bytes {position}-{end}/{size}" if block else f"bytes */{size}"
+
+                response = self.open(session, "PUT", block, { "Content-Range": contentRange })
+                if response.status == 308:
+                    position = self.received(response)
+                    response.close()
+                    continue
+
+                with response:
+                    result = json.load(response)
+                break
+
+        self.forget(key, lock)
+        return result
+
+    def received(self, response):
+        value = response.headers.get("Range")
+        return int(value.split("-")[-1]) + 1 if value else 0
+
+
+def localDemos(baseDir, hashPath, demoBase = None):
+    """
+        Index the demos of the local tree, hashing only demos whose size or mtime changed since the last run.
+
+        Archived attempts and duplicates that deduplication replaced with a manifest reference are local demos too,
+        listed at the path they would have as loose files. Hardlinked duplicates are plain files already.
+
+        @param demoBase The demo tree the deduplication manifest belongs to; two levels above baseDir by default.
+        @return Dictionary of path relative to baseDir, "/" separated, to path, size and md5Checksum.
+    """
+
+    demoBase = demoBase or os.path.dirname(os.path.dirname(os.path.abspath(baseDir)))
+    hashes = readJson(hashPath)
+    result = {}
+    fresh = {}
+
+    def add(filePath, size, key, checksum):
+        cached = hashes.get(filePath)
+        checksum = cached["md5Checksum"] if cached and cached["key"] == key else checksum()
+
+        fresh[filePath] = { "key": key, "md5Checksum": checksum }
+        result[relativeKey(filePath, baseDir)] = { "path": filePath, "size": size, "md5Checksum": checksum }
+
+    for dirPath, _, fileNames in os.walk(baseDir):
+        loose = set()
+        for fileName in fileNames:
+            if not fileName.endswith(EXTENSION):
+                continue
+
+            filePath = os.path.join(dirPath, fileName)
+            stat = os.stat(filePath)
+            add(filePath, stat.st_size, f"{stat.st_size}:{stat.st_mtime_ns}", lambda: md5(filePath))
+            loose.add(fileName)
+
+        for name, (size, crc) in archive.members(dirPath).items():
+            if name not in loose:
+                filePath = os.path.join(dirPath, name)
+                add(filePath, size, f"{size}:{crc:08x}", lambda: hashlib.md5(archive.read(filePath)).hexdigest())
+
+    for duplicate in dedup.readManifest(demoBase):
+        filePath = os.path.join(demoBase, *duplicate.split("/"))
+        key = relativeKey(filePath, baseDir)
+        if key.startswith("../") or key in result:
+            continue
+
+        source = readablePath(filePath, demoBase)
+        if source is None:
+            continue
+
+        stat = os.stat(source)
+        add(filePath, stat.st_size, f"{stat.st_size}:{stat.st_mtime_ns}", lambda: md5(source))
+
+    if fresh != hashes:
+        writeJson(hashPath, fresh)
+
+    return result
+
+
+def plan(local, remote, baseDir, direction = "both"):
+    """
+        Decide what to transfer.
+
+        Drive holds demos by name only; a Drive demo is matched with the local demo at the path the name belongs at.
+        A local demo is only uploaded if Drive has no demo of its name anywhere.
+
+        @param local     Local demos as returned by localDemos.
+        @param remote    Drive demos, file id to metadata.
+        @param baseDir   The executable/version directory downloads go to.
+        @param direction "up", "down" or "both".
+        @return Dictionary with "upload", "download", "conflict" and "same" lists.
+    """
+
+    result = { "upload": [], "download": [], "conflict": [], "same": [] }
+
+    byName = {}
+    for fileId, entry in remote.items():
+        current = byName.get(entry["name"])
+        if current is None or (entry.get("modifiedTime") or "") > (current[1].get("modifiedTime") or ""):
+            byName[entry["name"]] = (fileId, entry)
+
+    matched = set()
+    for name, (fileId, entry) in sorted(byName.items()):
+        key = demoKey(baseDir, name)
+        mine = local.get(key) if key is not None else None
+
+        if mine is None:
+            if key is not None and direction in [ "both", "down" ]:
+                destination = os.path.join(baseDir, *key.split("/"))
+                result["download"].append((fileId, entry["size"], entry.get("md5Checksum"), destination))
+            continue
+
+        matched.add(key)
+        if mine["size"] == entry["size"] and mine["md5Checksum"] == entry.get("md5Checksum"):
+            result["same"].append(key)
+        else:
+            result["conflict"].append(key)
+
+    if direction in [ "both", "up" ]:
+        for key, mine in sorted(local.items()):
+            if key not in matched and os.path.basename(mine["path"]) not in byName:
+                result["upload"].append(mine["path"])
+
+    return result
+
+
+def sync(token, baseDir, prefixes, folderId = None, direction = "both", workers = 4, dryRun = False, baseUrl = None,
+         uploadUrl = None, cacheDir = None, demoBase = None):
+    """
+        Mirror demos between Drive and the local demo tree.
+
+        Files that are identical on both sides (size and MD5) are skipped, and files that differ are only reported.
+        Archived and deduplicated demos are uploaded from the file they can be read from, under their own name. Only
+        local demos whose names start with one of the prefixes take part, the same ones listed from Drive.
+
+        @param demoBase The demo tree, see localDemos.
+        @return The plan, with "failed" listing (item, error) pairs of transfers that didn't finish.
+    """
+
+    cacheDir = cacheDir or webEnv.cacheDir()
+    demoBase = demoBase or os.path.dirname(os.path.dirname(os.path.abspath(baseDir)))
+    os.makedirs(cacheDir, exist_ok = True)
+    remote = drive.listDemos(token, prefixes, os.path.join(cacheDir, drive.CACHE_FILE), baseUrl)
+    local = { key: mine for key, mine in localDemos(baseDir, os.path.join(cacheDir, HASH_FILE), demoBase).items()
+              if drive.matches(os.path.basename(mine["path"]), prefixes) }
+    result = plan(local, remote, baseDir, direction)
+    result["failed"] = []
+
+    if dryRun:
+        return result
+
+    lock = threading.Lock()
+    transfers = Transfers(token, folderId, os.path.join(cacheDir, SESSION_FILE), baseUrl, uploadUrl)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = {}
+        for fileId, size, checksum, destination in result["download"]:
+            futures[executor.submit(transfers.download, fileId, size, checksum, destination)] = destination
+        for source in result["upload"]:
+            readable = readablePath(source, demoBase)
+            if readable is None:
+                result["failed"].append((source, "No such demo."))
+                continue
+            futures[executor.submit(transfers.upload, readable, lock, os.path.basename(source))] = source
+
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except (OSError, ValueError) as error:
+                result["failed"].append((futures[future], str(error)))
+
+    return result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "Drive Sync", description = "Mirror demos between Drive and DOOM_DEMO_DIR.")
+    parser.add_argument("secretFile")
+
+    parser.add_argument("-d", "--direction",    default = "both",
+                                                choices = [ "both", "down", "up" ],
+                                                help    = "Which way to copy.")
+
+    parser.add_argument("-e", "--executable",   default = "gzdoom",
+                                                help    = "Executable directory of the demo tree.")
+
+    parser.add_argument("-f", "--folder",       default = None,
+                                                help    = "Drive folder id uploads go to.")
+
+    parser.add_argument("-j", "--workers",      default = 4,
+                                                type    = int,
+                                                help    = "Parallel transfers.")
+
+    parser.add_argument("-n", "--dryRun",       action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Only print the plan.")
+
+    parser.add_argument("-p", "--prefixes",     default = [ "Cinnamon" ],
+                                                nargs   = "+",
+                                                help    = "Demo name prefixes (player names).")
+
+    parser.add_argument("-r", "--version",      default = None,
+                                                help    = "Version directory; defaults to GZDOOM_LATEST_VERSION.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import driveDemos
+
+    args = readArgs(sys.argv[1:])
+    demoBase = webEnv.env("DOOM_DEMO_DIR")
+    baseDir = os.path.join(demoBase, args.executable, args.version or webEnv.env("GZDOOM_LATEST_VERSION"))
+    token = driveDemos.credentials(args.secretFile, SYNC_SCOPES).token
+
+    result = sync(token, baseDir, args.prefixes, args.folder, args.direction, args.workers, args.dryRun,
+                  demoBase = demoBase)
+
+    for key in [ "download", "upload", "conflict", "failed" ]:
+        print(f"{key}: {len(result[key])}")
+        for item in result[key]:
+            print(f"    {item}")
+    print(f"same: {len(result['same'])}")
+
+    sys.exit(1 if result["failed"] else 0)
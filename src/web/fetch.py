@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+import webEnv
+
+CACHE_DIR = "http"
+CHUNK_SIZE = 64 * 1024
+MAX_AGE = 7 * 24 * 60 * 60
+MAX_SIZE = 256 * 1024 * 1024
+POOL_SIZE = 16
+TIMEOUT = 30
+
+_lock = threading.Lock()
+_session = None
+
+
+def httpDir():
+    result = os.path.join(webEnv.cacheDir(), CACHE_DIR)
+    os.makedirs(result, exist_ok = True)
+    return result
+
+
+def session():
+    """
+        @return The shared session, with a connection pool large enough for the batch fetchers.
+    """
+
+    global _session
+
+    with _lock:
+        if _session is None:
+            adapter = requests.adapters.HTTPAdapter(pool_connections = POOL_SIZE, pool_maxsize = POOL_SIZE)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+
+    return _session
+
+
+def entryPaths(url, directory):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(directory, f"{key}.body"), os.path.join(directory, f"{key}.json")
+
+
+def readMeta(metaPath):
+    try:
+        with open(metaPath, "r", encoding = "utf-8") as contents:
+            return json.load(contents)
+    except (OSError, ValueError):
+        return None
+
+
+def writeMeta(metaPath, meta):
+    temporary = f"{metaPath}.{threading.get_ident()}.tmp"
+    with open(temporary, "w", encoding = "utf-8") as output:
+        json.dump(meta, output)
+    os.replace(temporary, metaPath)
+
+
+def writeBody(bodyPath, response):
+    temporary = f"{bodyPath}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as output:
+        for block in response.iter_content(CHUNK_SIZE):
+            output.write(block)
+    os.replace(temporary, bodyPath)
+
+
+def evict(directory, maxSize, keep = None):
+    """
+        Delete the least recently used responses until the cache fits in maxSize bytes.
+
+        @param keep Key of an entry that is never deleted, i.e. the one just stored.
+    """
+
+    entries = {}
+    total = 0
+
+    with os.scandir(directory) as items:
+        for item in items:
+            key, extension = os.path.splitext(item.name)
+            if extension not in [ ".body", ".json" ]:
+                continue
+
+            stat = item.stat()
+            size, used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+            total += stat.st_size
+
+    for key, (size, _) in sorted(entries.items(), key = lambda item: item[1][1]):
+        if total <= maxSize:
+            break
+        if key == keep:
+            continue
+
+        for extension in [ ".body", ".json" ]:
+            try:
+                os.remove(os.path.join(directory, f"{key}{extension}"))
+            except OSError:
+                pass
+        total -= size
+
+
+def path(url, maxAge = MAX_AGE, maxSize = MAX_SIZE, directory = None):
+    """
+        Fetch a URL through the on-disk response cache.
+
+        A cached response younger than maxAge is used without touching the network. An older one is revalidated with
+        If-None-Match/If-Modified-Since, and a 304 answer keeps the cached body. New bodies are streamed to disk.
+
+        @param url     URL to fetch.
+        @param maxAge  Seconds a cached response is used without asking the server.
+        @param maxSize Size in bytes the cache is trimmed to after a new response is stored.
+        @return Path of the cached body.
+    """
+
+    directory = directory or httpDir()
+    bodyPath, metaPath = entryPaths(url, directory)
+    meta = readMeta(metaPath)
+    now = time.time()
+    headers = {}
+
+    if meta is not None and os.path.exists(bodyPath):
+        if now - meta["fetched"] < maxAge:
+            os.utime(metaPath)
+            return bodyPath
+
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("lastModified"):
+            headers["If-Modified-Since"] = meta["lastModified"]
+
+    with session().get(url, headers = headers, timeout = TIMEOUT, stream = True) as response:
+        if response.status_code == 304 and headers:
+            meta["fetched"] = now
+            writeMeta(metaPath, meta)
+            return bodyPath
+
+        response.raise_for_status()
+        writeBody(bodyPath, response)
+        writeMeta(metaPath, {
+            "url":          url,
+            "etag":         response.headers.get("ETag"),
+            "lastModified": response.headers.get("Last-Modified"),
+            "encoding":     response.encoding,
+            "fetched":      now
+        })
+
+    evict(directory, maxSize, os.path.splitext(os.path.basename(bodyPath))[0])
+    return bodyPath
+
+
+def encoding(url, directory = None):
+    """
+        @return Character encoding the server declared for a cached response, UTF-8 if it declared none.
+    """
+
+    meta = readMeta(entryPaths(url, directory or httpDir())[1]) or {}
+    return meta.get("encoding") or "utf-8"
+
+
+def get(url, maxAge = MAX_AGE, maxSize = MAX_SIZE, directory = None):
+    """
+        @return Body of the response as bytes, see path.
+    """
+
+    with open(path(url, maxAge, maxSize, directory), "rb") as contents:
+        return contents.read()
+
+
+def text(url, maxAge = MAX_AGE, maxSize = MAX_SIZE, directory = None):
+    """
+        @return Body of the response decoded as text, see path.
+    """
+
+    return get(url, maxAge, maxSize, directory).decode(encoding(url, directory), errors = "replace")
@@ -1,123 +1,188 @@
-raise NotImplementedError(f"{__file__} is not implemented.")
+import functools
+import html
+import re
+import urllib.parse
+
+import fetch
+
+CATEGORIES = [
+    "Monsters",
+    "Weapons",
+    "Ammunition",
+    "Health & Armor",
+    "Items",
+    "Keys",
+    "Miscellaneous"
+]
+CHUNK_SIZE = 64 * 1024
+STOP = "Multiplayer"
+
+ADJUSTMENTS = { "Of": "of", "Bfg": "BFG", "-vile": "-Vile" }
+ADJUST = re.compile("|".join([ re.escape(pre) for pre in ADJUSTMENTS ]))
+WORD = re.compile(r"\S+")
+
+ANY_TAG = re.compile(r"<[^>]*>")
+LINK = re.compile(r"""href\s*=\s*["']/wiki/([^"'#]+)""", re.IGNORECASE)
+SPAN = re.compile(r"""colspan\s*=\s*["']?(\d+)""", re.IGNORECASE)
+CELL = re.compile(r"<(t[dh])\b([^>]*)>(.*?)(?=<t[dh]\b|$)", re.IGNORECASE | re.DOTALL)
+ROW = re.compile(r"<tr\b[^>]*>(.*?)</tr\s*>|</table\s*>", re.IGNORECASE | re.DOTALL)
 
-import requests
 
 def text(url):
-    return requests.get(url).text
-
-
-def removeTags(text, tags):
-    result = text
-    for tag in tags:
-        result = result.replace(f"<{tag}>", "").replace(f"</{tag}>", "")
-    return result
-
-
-def categorize(raw):
-    stop = "Multiplayer"
-    categories = [
-        "Monsters",
-        "Weapons",
-        "Ammunition",
-        "Health &amp; Armor",
-        "Items",
-        "Key",
-        "Miscellaneous",
-        stop
-    ]
-
-    result = { name: [] for name in categories}
-    lines = raw.splitlines()
-
-    line = None
-    lineIndex = 0
-    categoryIndex = 0
-    currentCategory = None
-    nextCategory = categories[categoryIndex]
-
-    while lineIndex < len(lines):
-        line = lines[lineIndex]
-
-        if nextCategory in line:
-            if categoryIndex + 1 >= len(categories):
-                break
+    return fetch.text(url)
 
-            currentCategory = nextCategory
-            categoryIndex += 1
-            nextCategory = categories[categoryIndex]
 
-        if currentCategory:
-            result[currentCategory].append(line)
+def category(header):
+    """
+        @return The category a table header names, STOP for the multiplayer table, None for anything else.
+    """
 
-        lineIndex += 1
+    if header == STOP:
+        return STOP
+    for name in CATEGORIES:
+        if header == name or (name == "Keys" and header == "Key"):
+            return name
+    return None
 
-    del result[stop]
-    return result
 
+@functools.lru_cache(maxsize = None)
+def normalize(name):
+    """
+        Turn a wiki page name or cell text into a thing name, e.g. "Baron_of_Hell" to "Baron of Hell".
+    """
 
-def adjust(text, adjustments):
-    result = text
+    result = urllib.parse.unquote(name).replace("_", " ")
+    result = WORD.sub(lambda match: match.group(0)[0].upper() + match.group(0)[1:].lower(), result)
+    return ADJUST.sub(lambda match: ADJUSTMENTS[match.group(0)], result)
 
-    for pre, post in adjustments:
-        result = result.replace(pre, post)
-    return result
 
-def lexical(text):
-    result = []
-    for word in text.split():
-        result.append(word[0].upper() + word[1:].lower())
+def cellText(cell):
+    return html.unescape(ANY_TAG.sub("", cell)).strip()
 
-    return " ".join([new for new in result])
 
+class ThingsParser:
+    """
+        Reads the "Things" tables of a wiki level page as it is fed, keeping only the current row in memory.
 
-def readCategory(values):
-    result = {}
-    currentName = None
-    stops = ["</table>"]
+        Text outside tables is skipped with a plain search for the next table, and inside a table each row is taken
+        whole by one regular expression. A header cell naming a category starts that category, and its rows of a name
+        cell followed by one count per skill column are collected until the table ends. A cell spanning several columns
+        counts for each of them. Everything after the multiplayer table is ignored.
+    """
 
-    for line in values[6:]:
-        pruned = removeTags(line, ["td", "th", "tr", "td colspan=\"3\""])
+    _category = None
+    _done     = False
+    _inTable  = False
+    _pending  = ""
+    _result   = {}
 
-        if any([test in line for test in stops]):
-            break
+    def __init__(self):
+        self._category = None
+        self._done     = False
+        self._inTable  = False
+        self._pending  = ""
+        self._result   = { name: {} for name in CATEGORIES }
+
+    def close(self):
+        self._pending = ""
+
+    def done(self):
+        return self._done
+
+    def feed(self, chunk):
+        data = self._pending + chunk
+        position = 0
+
+        while not self._done:
+            if not self._inTable:
+                start = data.find("<table", position)
+                if start < 0:
+                    position = max(position, len(data) - len("<table"))
+                    break
 
-        if not pruned:
-            currentName = None
-            continue
+                self._inTable = True
+                position = start + len("<table")
 
-        if not currentName:
-            if "a href" in pruned:
-                currentName = pruned.split("/wiki/")[1].split("\" title")[0]
+            match = ROW.search(data, position)
+            if match is None:
+                break
+            position = match.end()
+
+            if match.group(1) is None:
+                self._category = None
+                self._inTable = False
             else:
-                currentName = pruned.replace("<td style=\"text-align: left;\">", "")
+                self.row(match.group(1))
 
-            currentName = lexical(currentName.replace("_", " ").replace("%27", "'"))
-            currentName = adjust(currentName, [["Of", "of"], ["Bfg", "BFG"], ["-vile", "-Vile"]])
-            result[currentName] = []
-            continue
+        self._pending = "" if self._done else data[position:]
 
-        result[currentName].append(int(pruned))
+    def result(self):
+        return self._result
 
-    return result
+    def row(self, content):
+        cells = CELL.findall(content)
+        if not cells:
+            return
 
+        tag, _, first = cells[0]
+        if tag.lower() == "th":
+            found = category(cellText(first))
+            if found == STOP:
+                self._done = True
+                return
+            if found:
+                self._category = found
+                return
 
+        if self._category is None or len(cells) < 2:
+            return
 
-def levelData(url):
-    single = {
-        "Monsters": {},
-        "Weapons": {},
-        "Ammunition": {},
-        "Health & Armor": {},
-        "Items": {},
-        "Keys": {},
-        "Miscellaneous": {}
-    }
+        counts = []
+        for _, attributes, cell in cells[1:]:
+            value = cellText(cell)
+            if not value.isdigit():
+                return
+
+            span = SPAN.search(attributes)
+            counts += [ int(value) ] * (int(span.group(1)) if span else 1)
+
+        link = LINK.search(first)
+        name = link.group(1) if link else cellText(first)
+        if name:
+            self._result[self._category][normalize(name)] = counts
 
-    for name, value in categorize(text(url)).items():
-        single[name] = readCategory(value)
 
-    return single
+def parse(chunks):
+    """
+        Read the things of a level page.
+
+        @param chunks Iterable of text chunks of the page.
+        @return Dictionary of category to dictionary of thing name to its count per skill column.
+    """
+
+    parser = ThingsParser()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done():
+            break
+
+    parser.close()
+    return parser.result()
+
+
+def readChunks(contents, size = CHUNK_SIZE):
+    return iter(lambda: contents.read(size), "")
+
+
+def levelData(url):
+    with open(fetch.path(url), "r", encoding = fetch.encoding(url), errors = "replace") as contents:
+        return parse(readChunks(contents))
 
 
 if __name__ == "__main__":
-    raise NotImplementedError(f"{__name__} is not implemented.")
+    import json
+    import sys
+
+    for argument in sys.argv[1:]:
+        print(json.dumps(levelData(argument), indent = 4))
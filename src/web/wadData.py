@@ -0,0 +1,164 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import urllib.parse
+
+import readWiki
+import webEnv
+
+WIKI_KEY = "wiki"
+WIKI_URL = "https://doomwiki.org/wiki/"
+
+
+def pageUrl(page, baseUrl = None):
+    """
+        @param page    Wiki page name like "MAP01: Entryway (Doom II)", or a full URL.
+        @param baseUrl Wiki to resolve page names against, defaults to DOOM_WIKI_URL or the Doom Wiki.
+        @return URL of the page.
+    """
+
+    if "://" in page:
+        return page
+
+    baseUrl = baseUrl or os.environ.get("DOOM_WIKI_URL") or WIKI_URL
+    return baseUrl.rstrip("/") + "/" + urllib.parse.quote(page.replace(" ", "_"), safe = ":()!',_")
+
+
+def mapPages(configurationPath, wadName):
+    """
+        @return The wiki pages of a WAD's maps, as listed under "wiki" in the configuration.
+    """
+
+    with open(configurationPath, "r", encoding = "utf-8") as contents:
+        configuration = json.load(contents)
+
+    if wadName not in configuration:
+        raise ValueError(f"No such WAD in {configurationPath}: {wadName}.")
+    if WIKI_KEY not in configuration[wadName]:
+        raise ValueError(f"No \"{WIKI_KEY}\" pages for {wadName} in {configurationPath}.")
+
+    return configuration[wadName][WIKI_KEY]
+
+
+def fetchLevel(page, baseUrl = None):
+    url = pageUrl(page, baseUrl)
+    result = { "page": page, "url": url, "data": None, "error": None }
+
+    try:
+        result["data"] = readWiki.levelData(url)
+    except (OSError, ValueError) as error:
+        result["error"] = str(error)
+
+    return result
+
+
+def levels(pages, workers = 8, baseUrl = None):
+    """
+        Fetch and parse level pages through a bounded thread pool.
+
+        @param pages   Wiki page names or URLs.
+        @param workers Pages fetched at the same time.
+        @return Generator of per-map records with "page", "url", "data" and "error", in order of completion.
+    """
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = [ executor.submit(fetchLevel, page, baseUrl) for page in pages ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def add(total, data):
+    """
+        Add the counts of one level to a running total, column by column.
+    """
+
+    for category, things in data.items():
+        totalThings = total.setdefault(category, {})
+
+        for name, counts in things.items():
+            current = totalThings.get(name, [])
+            if len(current) < len(counts):
+                current = current + [ 0 ] * (len(counts) - len(current))
+            totalThings[name] = [ value + (counts[index] if index < len(counts) else 0)
+                                  for index, value in enumerate(current) ]
+
+    return total
+
+
+def wadData(pages, workers = 8, baseUrl = None):
+    """
+        @return Dictionary with the per-map records, ordered as the pages are, the total counts and the failed pages.
+    """
+
+    records = { record["page"]: record for record in levels(pages, workers, baseUrl) }
+    result = { "maps": [ records[page] for page in pages ], "total": {}, "failed": [] }
+
+    for record in result["maps"]:
+        if record["error"] is None:
+            add(result["total"], record["data"])
+        else:
+            result["failed"].append(record["page"])
+
+    return result
+
+
+def readArgs(argv):
+    parser = argparse.ArgumentParser(prog = "WAD Data", description = "Thing counts of every map of a WAD.")
+    parser.add_argument("wad", nargs = "?", default = None, help = "WAD name in the configuration.")
+
+    parser.add_argument("-b", "--base",         default = None,
+                                                help    = "Wiki URL page names are resolved against.")
+
+    parser.add_argument("-c", "--configuration",
+                                                default = None,
+                                                help    = "Configuration file (DOOM_DIR/data/pwads.json).")
+
+    parser.add_argument("-j", "--workers",      default = 8,
+                                                type    = int,
+                                                help    = "Pages fetched at the same time.")
+
+    parser.add_argument("-p", "--pages",        default = [],
+                                                nargs   = "*",
+                                                help    = "Wiki page names or URLs, instead of or after the WAD's.")
+
+    parser.add_argument("-s", "--stream",       action  = "store_const",
+                                                const   = True,
+                                                default = False,
+                                                help    = "Print each map as it arrives (JSON lines), then the total.")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = readArgs(sys.argv[1:])
+
+    pages = []
+    if args.wad:
+        configuration = args.configuration or os.path.join(webEnv.env("DOOM_DIR"), "data", "pwads.json")
+        pages += mapPages(configuration, args.wad)
+    pages += args.pages
+
+    if not pages:
+        print("No pages to read.")
+        sys.exit(1)
+
+    if args.stream:
+        total = {}
+        failures = 0
+        for record in levels(pages, args.workers, args.base):
+            if record["error"] is None:
+                add(total, record["data"])
+            else:
+                failures += 1
+            print(json.dumps(record))
+            sys.stdout.flush()
+
+        print(json.dumps({ "total": total }))
+    else:
+        result = wadData(pages, args.workers, args.base)
+        failures = len(result["failed"])
+        print(json.dumps(result, indent = 4))
+
+    sys.exit(1 if failures else 0)
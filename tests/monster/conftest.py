@@ -0,0 +1,8 @@
+import os
+import sys
+
+MONSTER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src",
+                           "monster")
+
+if MONSTER_DIR not in sys.path:
+    sys.path.insert(0, MONSTER_DIR)
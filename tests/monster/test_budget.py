@@ -0,0 +1,68 @@
+import math
+
+import numpy
+
+import budget
+import monster
+
+MONSTERS = monster.readMonsters({ "DOOM 2": { "Zombieman": { "HP": 20 }, "Imp": { "HP": 60 } } })
+
+LEVELS = [
+    {
+        "Monsters":     { "Zombieman": [ 2, 3, 4 ], "Imp": [ 1, 1, 2 ], "Arch-vile": [ 0, 0, 1 ] },
+        "Ammunition":   { "Box of shotgun shells": [ 1, 1, 1 ], "Backpack": [ 0, 0, 1 ], "Mystery ammo": [ 5, 5, 5 ] },
+        "Weapons":      { "Chainsaw": [ 1, 1, 1 ], "Shotgun": [ 1, 1, 0 ] }
+    },
+    {
+        "Monsters":     { "Imp": [ 10, 10, 10 ] },
+        "Ammunition":   { "Clip": [ 1, 1, 1 ] }
+    },
+    {
+        "Ammunition":   { "Clip": [ 2, 2, 2 ] }
+    }
+]
+
+
+def testHpPerMapAndSkill():
+    hp = budget.Budget(LEVELS, MONSTERS).hp()
+
+    assert hp.shape == (3, 5)
+    assert list(hp[0]) == [ 100, 100, 120, 200, 200 ]
+    assert list(hp[1]) == [ 600 ] * 5 and list(hp[2]) == [ 0 ] * 5
+
+
+def testAmmoCountsBundlesAndWeapons():
+    ammo = budget.Budget(LEVELS, MONSTERS).ammo()
+    backpack = 10 * 10.0 + 4 * 70.0 + 1 * 90.0 + 20 * 22.5
+
+    assert ammo[0, 0] == 20 * 70.0 + 8 * 70.0
+    assert ammo[0, 4] == 20 * 70.0 + backpack
+    assert list(ammo[1]) == [ 100.0 ] * 5
+
+
+def testRatioIsNanWithoutMonsters():
+    ratio = budget.Budget(LEVELS, MONSTERS).ratio()
+
+    assert math.isclose(ratio[1, 3], 100 / 600)
+    assert numpy.isnan(ratio[2]).all()
+
+
+def testRankPutsMapsWithoutMonstersLast():
+    plan = budget.Budget(LEVELS, MONSTERS, [ "MAP01", "MAP02", "MAP03" ])
+
+    assert list(plan.rank(4, "hp")) == [ 1, 0, 2 ]
+    assert list(plan.rank(4, "ratio")) == [ 0, 1, 2 ]
+    assert plan.names() == [ "MAP01", "MAP02", "MAP03" ]
+
+
+def testUnknownNamesAreReported():
+    plan = budget.Budget(LEVELS, MONSTERS)
+
+    assert plan.unknown() == { "Arch-vile" }
+    assert plan.unknownAmmo() == { "Mystery ammo" }
+
+
+def testSkillCountsSpreadTheWikiColumns():
+    assert list(budget.skillCounts([ 1, 2, 3 ])) == [ 1, 1, 2, 3, 3 ]
+    assert list(budget.skillCounts([ 1, 2, 3, 4, 5 ])) == [ 1, 2, 3, 4, 5 ]
+    assert list(budget.skillCounts([])) == [ 0 ] * 5
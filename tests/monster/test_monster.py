@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+import monster
+
+MONSTERS = {
+    "DOOM 2": {
+        "Imp":              { "HP": 60, "Movement": 8, "Projectile": { "Damage": 3, "Speed": 10 },
+                              "Modifier": "Ranged" },
+        "Nightmare Imp":    { "Copy Of": "Imp", "HP": 2, "Projectile": { "Speed": 2 }, "Modifiers": [ "Fast" ] },
+        "Dark Imp":         { "Copy Of": "Nightmare Imp", "HP": 0.5, "Movement": 1.5 }
+    }
+}
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOOM_CACHE_DIR", str(tmp_path / "cache"))
+    filePath = str(tmp_path / "monsters.json")
+    with open(filePath, "w", encoding = "utf-8") as output:
+        json.dump(MONSTERS, output)
+    return filePath
+
+
+def testCopiesResolveThroughEveryOriginal(table):
+    monsters = monster.parse(table)
+
+    assert monsters["Nightmare Imp"].hp() == 120 and monsters["Nightmare Imp"].movement() == 8
+    assert monsters["Nightmare Imp"].projectile() == { "Damage": 3, "Speed": 20 }
+    assert monsters["Dark Imp"].hp() == 60 and monsters["Dark Imp"].movement() == 12
+    assert monsters["Dark Imp"].projectile() == { "Damage": 3, "Speed": 20 }
+    assert monsters["Dark Imp"].modifiers() == ("Ranged", "Fast")
+
+
+def testCopyLoopsAreErrors():
+    with pytest.raises(ValueError):
+        monster.readMonsters({ "Game": { "A": { "Copy Of": "B" }, "B": { "Copy Of": "A" } } })
+
+
+def testCacheLivesInTheCacheDirectory(table, tmp_path):
+    monster.parse(table)
+
+    assert os.path.dirname(monster.cachePath(table)) == str(tmp_path / "cache")
+    assert os.path.exists(monster.cachePath(table))
+    assert sorted(os.listdir(tmp_path)) == [ "cache", "monsters.json" ]
+
+
+def testCacheIsUsedUntilTheSourceChanges(table, monkeypatch):
+    first = monster.parse(table)
+
+    def noParsing(monsterData):
+        raise AssertionError("Parsed despite a fresh cache.")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(monster, "readMonsters", noParsing)
+        cached = monster.parse(table)
+    assert { name: entry.stats() for name, entry in cached.items() } == \
+           { name: entry.stats() for name, entry in first.items() }
+
+    changed = json.loads(json.dumps(MONSTERS))
+    changed["DOOM 2"]["Imp"]["HP"] = 70
+    with open(table, "w", encoding = "utf-8") as output:
+        json.dump(changed, output, indent = 4)
+
+    assert monster.parse(table)["Dark Imp"].hp() == 70
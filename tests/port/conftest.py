@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+PORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src", "port")
+
+if PORT_DIR not in sys.path:
+    sys.path.insert(0, PORT_DIR)
+
+import doomTree
+import gzdoom
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """
+        @return Environment settings of a minimal DOOM tree, already in effect.
+    """
+
+    environment = doomTree.build(tmp_path)
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+
+    gzdoom.envSetting.cache_clear()
+    yield environment
+    gzdoom.envSetting.cache_clear()
@@ -0,0 +1,77 @@
+import struct
+
+END_MARKER = b"\x80"
+
+BOOM_SIGNATURE = b"\x1dMBF\xe6\x00"
+TIC = struct.Struct("<bbBB")
+LONG_TIC = struct.Struct("<bbhB")
+
+ZDOOM_EMPTYUSERCMD = b"\x29"
+ZDOOM_FAST_MONSTERS = 1 << 15
+ZDOOM_NO_MONSTERS = 1 << 12
+ZDOOM_STOP = b"\x06"
+
+
+def vanilla(tics, skill = 3, episode = 1, map = 1, fast = 0, respawn = 0, noMonsters = 0, complete = True):
+    """
+        @return Bytes of a vanilla 1.9 demo of one player running forward for the given number of tics.
+    """
+
+    header = bytes([ 109, skill, episode, map, 0, respawn, fast, noMonsters, 0, 1, 0, 0, 0 ])
+    return header + TIC.pack(50, 0, 0, 0) * tics + (END_MARKER if complete else b"")
+
+
+def boom(version, tics, skill = 3, episode = 1, map = 1, fast = 0, respawn = 0, noMonsters = 0, complete = True):
+    """
+        @param version 200 - 214 for Boom/MBF and PrBoom+, 221 for MBF21.
+        @return Bytes of a demo of one player running forward and firing, longtics from 214 on.
+    """
+
+    header = bytes([ version ]) + BOOM_SIGNATURE + bytes([ 0, skill, episode, map, 0, 0 ])
+
+    if version == 221:
+        options = bytearray(21)
+        options[3:6] = [ respawn, fast, noMonsters ]
+        options[20] = 25
+        header += bytes(options) + bytes(25)
+    else:
+        options = bytearray(64)
+        options[6:9] = [ respawn, fast, noMonsters ]
+        header += bytes(options)
+
+    header += bytes([ 1 ]) + bytes(31)
+    command = LONG_TIC if version >= 214 else TIC
+    return header + command.pack(50, 0, 0, 1) * tics + (END_MARKER if complete else b"")
+
+
+def extended(demo, mapName = None):
+    """
+        @param demo    Bytes of the demo to wrap.
+        @param mapName Map name of a UMAPINFO extension, or None for no extensions.
+        @return Bytes of an extended (255) demo around it.
+    """
+
+    result = bytes([ 255 ]) + b"PR+UM" + b"\x01"
+    if mapName is None:
+        return result + struct.pack("<H", 0) + demo
+
+    return result + struct.pack("<H", 1) + b"\x08UMAPINFO" + mapName.encode("ascii").ljust(8, b"\0") + demo
+
+
+def zdoomChunk(name, data):
+    return name + struct.pack(">I", len(data)) + data + (b"\0" if len(data) & 1 else b"")
+
+
+def zdoom(tics, skill = 3, mapName = "MAP01", dmflags = 0, complete = True):
+    """
+        @return Bytes of a ZDoom demo of one player running forward and firing on the first tic and repeating that
+                command afterwards, with a chat message before the first tic.
+    """
+
+    header = struct.pack(">H", 0x221) + b"\0\0" + mapName.encode("ascii") + b"\0"
+    variables = f"\\skill\\{skill}\\dmflags\\{dmflags}".encode("ascii") + b"\0"
+    body = b"\x03hi\0" + b"\x01\x09\x01" + struct.pack(">h", 100) + ZDOOM_EMPTYUSERCMD * (tics - 1)
+    body += ZDOOM_STOP if complete else b""
+
+    chunks = zdoomChunk(b"ZDHD", header) + zdoomChunk(b"VARS", variables) + zdoomChunk(b"BODY", body)
+    return b"FORM" + struct.pack(">I", 4 + len(chunks)) + b"ZDEM" + chunks
@@ -0,0 +1,93 @@
+import json
+import os
+import stat
+import struct
+import sys
+
+# Stands in for the engines: exits with the code in the demo it plays, or sleeps for "sleep <seconds>" first.
+STUB = f"""#!{sys.executable}
+import sys
+import time
+
+arguments = sys.argv[1:]
+demo = arguments[arguments.index("-playdemo") + 1] if "-playdemo" in arguments else None
+words = open(demo).read().split() if demo else []
+
+if words[:1] == [ "sleep" ]:
+    time.sleep(float(words[1]))
+sys.exit(int(words[1]) if words[:1] == [ "exit" ] else 0)
+"""
+
+CONFIGURATION = { "doom": {}, "doom2": {}, "valiant": { "short": "val" } }
+
+
+def writeWad(filePath, kind, lumps):
+    """
+        Write a WAD of the given lump names, each with a few bytes of data.
+    """
+
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    data = b""
+    directory = b""
+    for name in lumps:
+        directory += struct.pack("<ii8s", 12 + len(data), 4, name.encode("ascii"))
+        data += b"lump"
+
+    with open(filePath, "wb") as output:
+        output.write(struct.pack("<4sii", kind.encode("ascii"), len(lumps), 12 + len(data)) + data + directory)
+
+
+def writeStub(filePath):
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "w", encoding = "utf-8") as output:
+        output.write(STUB)
+    os.chmod(filePath, os.stat(filePath).st_mode | stat.S_IXUSR)
+
+
+def build(root):
+    """
+        Lay out a minimal DOOM directory, demo tree and GZDoom and dsda-doom stubs under root.
+
+        @return Dictionary of the environment settings pointing at it.
+    """
+
+    root = str(root)
+    doomDir = os.path.join(root, "doom")
+    result = {
+        "DOOM_CACHE_DIR":           os.path.join(root, "cache"),
+        "DOOM_DEMO_DIR":            os.path.join(root, "demos"),
+        "DOOM_DIR":                 doomDir,
+        "DOOM_IWAD_DIR":            os.path.join(doomDir, "iwad"),
+        "DOOM_PLAYER":              "tester",
+        "DOOM_PWAD_DIR":            os.path.join(doomDir, "pwad"),
+        "DSDA_EXE":                 os.path.join(root, "dsda", "dsda-doom"),
+        "DSDA_LATEST_VERSION":      "0.27",
+        "GZDOOM_EXE":               os.path.join(root, "gzdoom", "gzdoom"),
+        "GZDOOM_LATEST_VERSION":    "4.11",
+        "HOME":                     os.path.join(root, "home")
+    }
+
+    writeWad(os.path.join(doomDir, "iwad", "doom2", "doom2.wad"), "IWAD", [ "MAP01", "MAP02", "MAP03" ])
+    writeWad(os.path.join(doomDir, "iwad", "doom", "doom.wad"), "IWAD", [ "E1M1", "E1M2" ])
+    writeWad(os.path.join(doomDir, "pwad", "valiant", "valiant.wad"), "PWAD", [ "MAP01", "MAP02" ])
+
+    os.makedirs(os.path.join(doomDir, "data"))
+    with open(os.path.join(doomDir, "data", "pwads.json"), "w", encoding = "utf-8") as output:
+        json.dump(CONFIGURATION, output)
+
+    for executable in [ result["GZDOOM_EXE"], result["DSDA_EXE"] ]:
+        writeStub(executable)
+        os.makedirs(os.path.join(os.path.dirname(executable), "addon"))
+        os.makedirs(os.path.join(os.path.dirname(executable), "mod"))
+
+    for name in [ "DOOM_CACHE_DIR", "DOOM_DEMO_DIR" ]:
+        os.makedirs(result[name], exist_ok = True)
+    os.makedirs(os.path.join(result["HOME"], "doc", "annoy"))
+
+    return result
+
+
+def writeDemo(filePath, content):
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "w", encoding = "utf-8") as output:
+        output.write(content)
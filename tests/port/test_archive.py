@@ -0,0 +1,46 @@
+import os
+
+import archive
+
+PREFIX = "Cinnamon-doom2-map01-uv-max"
+
+
+def demoName(number):
+    return f"{PREFIX}_{number:03d}.lmp"
+
+
+def write(filePath, content):
+    with open(filePath, "wb") as output:
+        output.write(content)
+
+
+def read(filePath):
+    with open(filePath, "rb") as contents:
+        return contents.read()
+
+
+def testPackKeepsTheNewestAndUnpackRestores(tmp_path):
+    demoDir = str(tmp_path)
+    for number in range(3):
+        write(os.path.join(demoDir, demoName(number)), f"attempt {number}".encode())
+
+    assert archive.pack(demoDir, keep = 1) == [ demoName(0), demoName(1) ]
+    assert sorted(os.listdir(demoDir)) == [ demoName(2), archive.ARCHIVE_FILE ]
+    assert bytes(archive.read(os.path.join(demoDir, demoName(1)))) == b"attempt 1"
+
+    assert archive.unpack(demoDir) == [ demoName(0), demoName(1) ]
+    assert not os.path.exists(archive.archivePath(demoDir))
+    assert read(os.path.join(demoDir, demoName(0))) == b"attempt 0"
+
+
+def testUnpackLeavesCollidingMembersArchived(tmp_path):
+    demoDir = str(tmp_path)
+    write(os.path.join(demoDir, demoName(0)), b"archived")
+    write(os.path.join(demoDir, demoName(1)), b"also archived")
+    archive.pack(demoDir)
+    write(os.path.join(demoDir, demoName(0)), b"loose")
+
+    assert archive.unpack(demoDir) == [ demoName(1) ]
+    assert read(os.path.join(demoDir, demoName(0))) == b"loose"
+    assert list(archive.members(demoDir)) == [ demoName(0) ]
+    assert bytes(archive.read(os.path.join(demoDir, demoName(0)))) == b"archived"
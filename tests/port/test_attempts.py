@@ -0,0 +1,42 @@
+import os
+
+import attempts
+
+PREFIX = "Cinnamon-doom2-map01-uv-max"
+
+
+def demoFile(filePath, number, extension):
+    return f"{filePath}_{number:03d}{extension}"
+
+
+def touch(demoDir, number):
+    open(os.path.join(demoDir, f"{PREFIX}_{number:03d}.lmp"), "w").close()
+
+
+def testNextAttemptUsesAndRepairsTheIndex(tmp_path):
+    demoDir = str(tmp_path)
+    prefix = os.path.join(demoDir, PREFIX)
+    touch(demoDir, 0)
+    touch(demoDir, 1)
+
+    assert attempts.nextAttempt(prefix, ".lmp", demoFile) == 2
+    assert attempts.readIndex(demoDir) == { PREFIX: 2 }
+
+    touch(demoDir, 2)
+    assert attempts.nextAttempt(prefix, ".lmp", demoFile) == 3
+
+    attempts.writeIndex(demoDir, { PREFIX: 9 })
+    assert attempts.nextAttempt(prefix, ".lmp", demoFile, stored = { f"{PREFIX}_003.lmp" }) == 4
+
+
+def testFailedWriteIsReportedAndCleanedUp(tmp_path, monkeypatch, capsys):
+    demoDir = str(tmp_path)
+
+    def failing(source, target):
+        raise PermissionError("Read-only file system.")
+
+    monkeypatch.setattr(attempts.os, "replace", failing)
+
+    assert not attempts.writeIndex(demoDir, { PREFIX: 1 })
+    assert os.listdir(demoDir) == []
+    assert "can't write the attempt index" in capsys.readouterr().err
@@ -0,0 +1,18 @@
+import gzdoom
+
+
+def command(arguments, port = "gzdoom"):
+    return gzdoom.readLaunch([ "doom2", "-m", "1", "-i" ] + arguments, port = port).command()
+
+
+def testMusicTrackIsSetOnlyWhenChosen(tree):
+    assert "idmus" not in command([])
+    assert command([ "-k", "7" ])[-3:] == [ "+set", "idmus", "7" ]
+
+
+def testDsdaOnlyGetsWads(tree):
+    result = command([], "dsda")
+
+    assert result[0] == tree["DSDA_EXE"]
+    assert "-compatmode" not in result and "idmus" not in result
+    assert result[result.index("-iwad") + 1].endswith("doom2.wad")
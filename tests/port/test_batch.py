@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import batch
+import doomTree
+
+
+def demoPath(environment, number, player = "Tester", version = "4.11"):
+    return os.path.join(environment["DOOM_DEMO_DIR"], "gzdoom", version, player, "valiant", "map01",
+                        f"{player}-valiant-map01-uv-max_{number:03d}.lmp")
+
+
+def runAll(entries, timeout = 10, **kwargs):
+    return sorted(batch.runAll(entries, 2, timeout, **kwargs), key = lambda record: record["entry"].get("demo", -1))
+
+
+def testEntryFromDemoKeepsPlayerAndVersion(tree):
+    entry = batch.entryFromDemo(demoPath(tree, 4, "Other", "4.10"))
+
+    assert entry["player"] == "Other" and entry["version"] == "4.10" and entry["executable"] == "gzdoom"
+    assert entry["demo"] == 4 and entry["map"] == [ "01" ] and entry["target"] == "valiant"
+    arguments = batch.entryArgs(entry, "gzdoom")
+    assert arguments[arguments.index("-p") + 1] == "Other" and arguments[arguments.index("-r") + 1] == "4.10"
+    assert "-r" not in batch.entryArgs(entry, "dsda-doom")
+
+
+def testStubReportsExitCodesAndWallTimes(tree):
+    for number, content in enumerate([ "exit 0", "exit 3", "sleep 0.3" ]):
+        doomTree.writeDemo(demoPath(tree, number), content)
+
+    records = runAll(batch.readManifest(None, [ os.path.join(os.path.dirname(demoPath(tree, 0)), "*.lmp") ]))
+
+    assert [ record["exitCode"] for record in records ] == [ 0, 3, 0 ]
+    assert [ record["error"] for record in records ] == [ None, None, None ]
+    assert records[2]["wallTime"] >= 0.3 > records[0]["wallTime"]
+    assert all([ "-playdemo" in record["command"] for record in records ])
+
+
+def testSlowRunTimesOut(tree):
+    doomTree.writeDemo(demoPath(tree, 0), "sleep 5")
+
+    record, = runAll([ batch.entryFromDemo(demoPath(tree, 0)) ], timeout = 0.5)
+
+    assert record["timedOut"] and record["exitCode"] is None
+    assert 0.5 <= record["wallTime"] < 5
+
+
+def testEntryWithoutDemoIsRejected(tree):
+    record, = runAll([ { "target": "valiant", "map": [ "01" ] } ])
+
+    assert record["command"] is None and "No demo number" in record["error"]
+    assert not os.path.exists(os.path.join(tree["DOOM_DEMO_DIR"], "gzdoom"))
+
+
+@pytest.mark.parametrize("demo", [ None, -1, "record" ])
+def testEntryArgsNeedsADemo(demo):
+    with pytest.raises(ValueError):
+        batch.entryArgs({ "target": "valiant", "demo": demo })
+
+
+def testEveryPortPlaysItsOwnDemoFromOneResolution(tree, monkeypatch):
+    doomTree.writeDemo(demoPath(tree, 0), "exit 0")
+    doomTree.writeDemo(demoPath(tree, 1), "exit 0")
+    dsdaDemo = os.path.join(tree["DOOM_DEMO_DIR"], "dsda-doom", "0.27", "Tester", "valiant", "map01",
+                            "Tester-valiant-map01-uv-max_000.lmp")
+    doomTree.writeDemo(dsdaDemo, "exit 5")
+
+    resolutions = []
+    readLaunch = batch.gzdoom.readLaunch
+    monkeypatch.setattr(batch.gzdoom, "readLaunch", lambda *args, **kwargs: resolutions.append(kwargs["port"]) or
+                                                                            readLaunch(*args, **kwargs))
+
+    entries = [ batch.entryFromDemo(demoPath(tree, number)) for number in [ 0, 1 ] ]
+    records = { (record["entry"]["demo"], record["port"]): record
+                for record in batch.runAll(entries, 2, 10, portNames = [ "dsda", "gzdoom" ]) }
+
+    assert resolutions == [ "gzdoom", "gzdoom" ]
+    assert records[(0, "gzdoom")]["exitCode"] == 0 and demoPath(tree, 0) in records[(0, "gzdoom")]["command"]
+    assert records[(0, "dsda")]["exitCode"] == 5 and dsdaDemo in records[(0, "dsda")]["command"]
+    assert "-compatmode" not in records[(0, "dsda")]["command"]
+    assert records[(1, "dsda")]["command"] is None and "doesn't exist" in records[(1, "dsda")]["error"]
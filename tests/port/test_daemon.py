@@ -0,0 +1,58 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import daemon
+
+
+@pytest.fixture
+def running(tree, tmp_path):
+    """
+        @return Socket path of a daemon serving in a thread, stopped afterwards.
+    """
+
+    path = str(tmp_path / "launcher.sock")
+    server = daemon.Daemon(path, poll = True)
+    thread = threading.Thread(target = server.serve)
+    thread.start()
+
+    yield path
+
+    daemon.send(path, { "type": "stop" })
+    thread.join(10)
+    server.close()
+
+
+def sendLine(path, line):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(line)
+        return connection.makefile("rb").readline()
+
+
+def launch(path, argv):
+    return daemon.send(path, { "type": "launch", "argv": argv, "environment": dict(os.environ), "cwd": os.getcwd() })
+
+
+@pytest.mark.parametrize("line", [ b"[1, 2]\n", b"\"launch\"\n", b"{\"type\": \"launch\", \"argv\": 3}\n",
+                                   b"{\"type\": \"finish\", \"token\": \"x\", \"runtime\": \"slow\"}\n",
+                                   b"{\"type\": \"finish\", \"token\": [ 1 ]}\n", b"not json\n" ])
+def testBrokenRequestsDontStopTheDaemon(running, line):
+    sendLine(running, line)
+
+    assert daemon.isRunning(running)
+    assert "command" in launch(running, [ "doom2", "-m", "1" ])
+
+
+def testRecordingsGetTheirOwnNumbers(running):
+    first = launch(running, [ "doom2", "-m", "1" ])
+    second = launch(running, [ "doom2", "-m", "1" ])
+
+    assert first["demoPath"].endswith("_000.lmp") and second["demoPath"].endswith("_001.lmp")
+
+    daemon.send(running, { "type": "finish", "token": first["token"], "exitCode": 1, "runtime": 0.5 })
+    daemon.send(running, { "type": "finish", "token": second["token"], "exitCode": 1, "runtime": 0.5 })
+
+    assert launch(running, [ "doom2", "-m", "1" ])["demoPath"].endswith("_000.lmp")
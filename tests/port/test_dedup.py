@@ -0,0 +1,68 @@
+import os
+
+import dedup
+
+
+def write(filePath, content):
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "wb") as output:
+        output.write(content)
+
+
+def read(filePath):
+    with open(filePath, "rb") as contents:
+        return contents.read()
+
+
+def testDuplicatesAreHardlinked(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    write(os.path.join(demoBase, "a", "x_000.lmp"), b"same")
+    write(os.path.join(demoBase, "b", "x_000.lmp"), b"same")
+    write(os.path.join(demoBase, "b", "x_001.lmp"), b"other")
+
+    result = dedup.deduplicate(demoBase, str(tmp_path / "hashes.json"))
+
+    assert result["linked"] == [ (os.path.join(demoBase, "b", "x_000.lmp"), os.path.join(demoBase, "a", "x_000.lmp")) ]
+    assert os.stat(os.path.join(demoBase, "a", "x_000.lmp")).st_nlink == 2
+
+
+def testReferenceChainsResolve(tmp_path):
+    demoBase = str(tmp_path)
+    write(os.path.join(demoBase, "c.lmp"), b"demo")
+    dedup.writeManifest(demoBase, { "a.lmp": "b.lmp", "b.lmp": "c.lmp", "x.lmp": "y.lmp", "y.lmp": "x.lmp" })
+
+    assert dedup.referenced(os.path.join(demoBase, "a.lmp"), demoBase) == os.path.join(demoBase, "c.lmp")
+    assert dedup.resolve(os.path.join(demoBase, "a.lmp"), demoBase) == os.path.join(demoBase, "c.lmp")
+    assert dedup.resolve(os.path.join(demoBase, "x.lmp"), demoBase) is None
+    assert dedup.referenced(os.path.join(demoBase, "c.lmp"), demoBase) is None
+
+
+def testReferencesFollowAReferencedDemo(tmp_path, monkeypatch):
+    demoBase = str(tmp_path / "demos")
+    write(os.path.join(demoBase, "a.lmp"), b"same")
+    write(os.path.join(demoBase, "b.lmp"), b"same")
+    dedup.writeManifest(demoBase, { "old.lmp": "b.lmp" })
+
+    def noLinks(source, duplicate):
+        raise OSError("Cross-device link.")
+
+    monkeypatch.setattr(dedup, "link", noLinks)
+    result = dedup.deduplicate(demoBase, str(tmp_path / "hashes.json"), references = True)
+
+    assert len(result["referenced"]) == 1 and not os.path.exists(os.path.join(demoBase, "b.lmp"))
+    assert dedup.readManifest(demoBase) == { "b.lmp": "a.lmp", "old.lmp": "a.lmp" }
+
+
+def testRemovingAReferencedDemoKeepsItsDuplicates(tmp_path):
+    demoBase = str(tmp_path)
+    write(os.path.join(demoBase, "a.lmp"), b"demo")
+    dedup.writeManifest(demoBase, { "b.lmp": "a.lmp", "c.lmp": "a.lmp" })
+
+    assert dedup.remove(os.path.join(demoBase, "a.lmp"), demoBase) == os.path.join(demoBase, "b.lmp")
+    assert not os.path.exists(os.path.join(demoBase, "a.lmp"))
+    assert dedup.readManifest(demoBase) == { "c.lmp": "b.lmp" }
+    assert read(dedup.resolve(os.path.join(demoBase, "c.lmp"), demoBase)) == b"demo"
+
+    write(os.path.join(demoBase, "d.lmp"), b"alone")
+    assert dedup.remove(os.path.join(demoBase, "d.lmp"), demoBase) is None
+    assert not os.path.exists(os.path.join(demoBase, "d.lmp"))
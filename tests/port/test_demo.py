@@ -0,0 +1,71 @@
+import pytest
+
+import demo as lmp
+import demoBytes
+
+MBF21 = demoBytes.boom(221, 70, skill = 4, map = 7, fast = 1)
+
+
+@pytest.mark.parametrize("data, fields", [
+    (demoBytes.vanilla(70, skill = 2, episode = 2, map = 4, respawn = 1),
+     { "format": "vanilla", "version": 109, "skill": 3, "episode": 2, "map": 4, "respawn": True, "longtics": False }),
+    (demoBytes.boom(203, 70, map = 7, noMonsters = 1),
+     { "format": "boom", "version": 203, "skill": 4, "map": 7, "nomonsters": True, "fast": False, "longtics": False }),
+    (demoBytes.boom(214, 70, map = 7, fast = 1),
+     { "format": "boom", "version": 214, "map": 7, "fast": True, "nomonsters": False, "longtics": True }),
+    (MBF21,
+     { "format": "mbf21", "version": 221, "skill": 5, "map": 7, "fast": True, "respawn": False, "longtics": True }),
+    (demoBytes.extended(MBF21, "MAP31"),
+     { "format": "mbf21", "version": 221, "skill": 5, "map": 7, "mapName": "map31" }),
+    (demoBytes.extended(MBF21),
+     { "format": "mbf21", "version": 221, "map": 7, "mapName": None }),
+    (demoBytes.zdoom(70, mapName = "E2M4", dmflags = demoBytes.ZDOOM_FAST_MONSTERS | demoBytes.ZDOOM_NO_MONSTERS),
+     { "format": "zdoom", "version": 0x221, "skill": 4, "episode": 2, "map": 4, "mapName": "e2m4", "fast": True,
+       "nomonsters": True, "respawn": False })
+])
+def testHeaderFields(data, fields):
+    header = lmp.readHeader(data)
+
+    assert { name: header[name] for name in fields } == fields
+
+
+@pytest.mark.parametrize("data, attack", [
+    (demoBytes.vanilla(70), 0),
+    (demoBytes.boom(203, 70), 70),
+    (demoBytes.boom(214, 70), 70),
+    (MBF21, 70),
+    (demoBytes.extended(MBF21, "MAP31"), 70),
+    (demoBytes.zdoom(70), 70)
+])
+def testSummaryCountsEveryTic(data, attack):
+    result = lmp.summary(data)
+
+    assert result["tics"] == 70 and result["duration"] == 2.0 and result["complete"]
+    assert result["inputs"][0]["forward"] == 70 and result["inputs"][0]["attack"] == attack
+
+
+@pytest.mark.parametrize("data", [
+    demoBytes.vanilla(70, complete = False), demoBytes.boom(214, 70, complete = False),
+    demoBytes.zdoom(70, complete = False)
+])
+def testCutOffDemosAreIncomplete(data):
+    result = lmp.summary(data)
+
+    assert result["tics"] == 70 and not result["complete"]
+
+
+@pytest.mark.parametrize("data", [ b"\x6d\x02", bytes([ 150 ]) + bytes(20), b"\xffNOTUM" + bytes(10),
+                                   b"FORM\0\0\0\0NOPE", MBF21[:40] ])
+def testBrokenHeadersAreRejected(data):
+    with pytest.raises(ValueError):
+        lmp.readHeader(data)
+
+
+def testHeaderMismatches():
+    header = lmp.readHeader(demoBytes.vanilla(1, skill = 3, episode = 1, map = 2))
+
+    assert lmp.mismatches(header, 4, "e1m2", [ "1", "2" ]) == []
+    assert lmp.mismatches(header, 3, "map02", [ "02" ]) == [ "skill 4 instead of 3" ]
+    assert lmp.mismatches(lmp.readHeader(demoBytes.extended(MBF21, "MAP31")), 5, "map07", [ "07" ]) == [
+        "map map31 instead of map07"
+    ]
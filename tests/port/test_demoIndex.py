@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import archive
+import demoBytes
+import demoIndex
+
+PARTS = [ "gzdoom", "4.11", "Cinnamon", "doom2" ]
+
+
+def mapDir(demoBase, map):
+    return os.path.join(demoBase, *PARTS, map)
+
+
+def write(demoBase, map, number, content = None):
+    demoDir = mapDir(demoBase, map)
+    os.makedirs(demoDir, exist_ok = True)
+    with open(os.path.join(demoDir, f"Cinnamon-doom2-{map}-uv-max_{number:03d}.lmp"), "wb") as output:
+        output.write(content or demoBytes.vanilla(35, map = int(map[3:])))
+    later(demoDir)
+
+
+def later(path):
+    """
+        Move the mtime of a path a second forward, so a change shows even within the file system's time resolution.
+    """
+
+    stamp = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns = (stamp, stamp))
+
+
+def numbers(connection, **filters):
+    return sorted([ row["number"] for row in demoIndex.query(connection, filters) ])
+
+
+def testUpdateFollowsAddedAndRemovedDemos(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    for number in range(2):
+        write(demoBase, "map01", number)
+    write(demoBase, "map02", 0)
+    connection = demoIndex.connect(str(tmp_path / "index.db"))
+
+    assert demoIndex.update(connection, demoBase) == { "dirs": 2, "removed": 0, "demos": 3 }
+    assert demoIndex.update(connection, demoBase) == { "dirs": 0, "removed": 0, "demos": 3 }
+
+    write(demoBase, "map01", 2)
+    assert demoIndex.update(connection, demoBase) == { "dirs": 1, "removed": 0, "demos": 4 }
+    assert numbers(connection, map = "MAP01", player = "cinnamon") == [ 0, 1, 2 ]
+
+    os.remove(os.path.join(mapDir(demoBase, "map01"), "Cinnamon-doom2-map01-uv-max_001.lmp"))
+    later(mapDir(demoBase, "map01"))
+    assert demoIndex.update(connection, demoBase) == { "dirs": 1, "removed": 0, "demos": 3 }
+    assert numbers(connection, map = "map01") == [ 0, 2 ]
+
+    shutil.rmtree(mapDir(demoBase, "map02"))
+    assert demoIndex.update(connection, demoBase) == { "dirs": 0, "removed": 1, "demos": 2 }
+    assert numbers(connection, map = "map02") == []
+
+
+def testArchivedDemosKeepTheirRowsAndHeaders(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    write(demoBase, "map01", 0, demoBytes.boom(214, 35, map = 1))
+    write(demoBase, "map01", 1)
+    connection = demoIndex.connect(str(tmp_path / "index.db"))
+    demoIndex.update(connection, demoBase)
+
+    archive.pack(mapDir(demoBase, "map01"), keep = 1)
+    later(mapDir(demoBase, "map01"))
+    assert demoIndex.update(connection, demoBase, headers = True)["dirs"] == 1
+
+    rows = { row["number"]: row for row in demoIndex.query(connection, { "target": "doom2" }) }
+    assert rows[0]["archived"] == 1 and rows[0]["format"] == "boom" and rows[0]["headerVersion"] == 214
+    assert rows[1]["archived"] == 0 and rows[1]["format"] == "vanilla" and rows[1]["skill"] == 4
+
+    assert demoIndex.update(connection, demoBase, headers = True)["dirs"] == 0
+    assert demoIndex.update(connection, demoBase)["dirs"] == 0
+
+
+def testFiltersAndOrder(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    for number in range(3):
+        write(demoBase, "map01", number)
+    connection = demoIndex.connect(str(tmp_path / "index.db"))
+    demoIndex.update(connection, demoBase)
+
+    latest = demoIndex.query(connection, { "category": "MAX", "flags": "" }, order = "number", latest = 2)
+    assert [ row["number"] for row in latest ] == [ 2, 1 ]
+    assert demoIndex.demoPath(latest[0]).endswith("Cinnamon-doom2-map01-uv-max_002.lmp")
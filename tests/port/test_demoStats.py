@@ -0,0 +1,41 @@
+import os
+
+import archive
+import demoBytes
+import demoStats
+
+PARTS = [ "gzdoom", "4.11", "Cinnamon", "doom2", "map01" ]
+PREFIX = "Cinnamon-doom2-map01-uv-max"
+
+
+def write(demoDir, number, content):
+    with open(os.path.join(demoDir, f"{PREFIX}_{number:03d}.lmp"), "wb") as output:
+        output.write(content)
+
+
+def testLongestAttemptAndTotals(tmp_path):
+    demoDir = str(tmp_path)
+    write(demoDir, 0, demoBytes.vanilla(35 * 60))
+    write(demoDir, 1, demoBytes.vanilla(35 * 2))
+    write(demoDir, 2, demoBytes.vanilla(35 * 90, complete = False))
+    write(demoDir, 3, b"not a demo")
+    archive.pack(demoDir, keep = 2)
+
+    result = demoStats.mapStats((demoDir, PARTS))
+
+    assert result["attempts"] == 4 and result["latest"] == 3 and result["unparsed"] == 1
+    assert result["longest"] == 2 and result["longestDuration"] == 90.0
+    assert result["duration"] == 60.0 + 2.0 + 90.0
+    assert result["player"] == "Cinnamon" and result["map"] == "map01" and result["mapper"] == ""
+
+
+def testMapDirsAreFoundBelowThePlayer(tmp_path):
+    demoDir = tmp_path.joinpath(*PARTS)
+    testDir = tmp_path.joinpath(*PARTS[:3], ".test", "Mapper", "mywad", "map02")
+    demoDir.mkdir(parents = True)
+    testDir.mkdir(parents = True)
+
+    result = dict(demoStats.findMapDirs(str(tmp_path)))
+
+    assert result == { str(demoDir): PARTS, str(testDir): PARTS[:3] + [ ".test", "Mapper", "mywad", "map02" ] }
+    assert demoStats.mapKey(result[str(testDir)])["mapper"] == "Mapper"
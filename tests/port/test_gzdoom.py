@@ -0,0 +1,32 @@
+import pytest
+
+import gzdoom
+
+
+@pytest.mark.parametrize("mapList, iwad, expected", [
+    ([ "01", "01" ], "doom", ("e1m1", [ 1, 1 ])),
+    ([ "2", "4" ], "doom", ("e2m4", [ 2, 4 ])),
+    ([ "7" ], "doom2", ("map07", [ 7 ])),
+    ([ "012" ], "doom2", ("map12", [ 12 ])),
+    ([], "doom", ("e1m1", [ 1, 1 ]))
+])
+def testParseMapNamesLikeTheLumps(mapList, iwad, expected):
+    assert gzdoom.parseMap(mapList, iwad) == expected
+
+
+@pytest.mark.parametrize("mapList, iwad", [ ([ "1" ], "doom"), ([ "1", "1" ], "doom2"), ([ "1", "2", "3" ], "doom2") ])
+def testParseMapRejectsTheWrongShape(mapList, iwad):
+    with pytest.raises(ValueError):
+        gzdoom.parseMap(mapList, iwad)
+
+
+def testPaddedEpisodeMapsAreVerified(tree):
+    launch = gzdoom.readLaunch([ "doom", "-m", "01", "01", "-i" ])
+
+    assert launch.demoPrefix().endswith("-e1m1-uv-max")
+    assert launch.warp() == [ "1", "1" ]
+
+
+def testMissingMapsAreRejected(tree):
+    with pytest.raises(ValueError):
+        gzdoom.readLaunch([ "doom", "-m", "3", "1", "-i" ])
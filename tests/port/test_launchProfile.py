@@ -0,0 +1,72 @@
+import os
+
+import gzdoom
+import launchProfile
+
+ARGV = [ "valiant", "-m", "1" ]
+
+
+def saved(argv = ARGV):
+    launch = gzdoom.readLaunch(argv)
+    launchProfile.save(argv, launch)
+    return launch
+
+
+def later(path):
+    """
+        Move the mtime of a path a second forward, as a change to it would.
+    """
+
+    stamp = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns = (stamp, stamp))
+
+
+def testSavedProfileLoadsWithTheSameCommand(tree):
+    launch = saved()
+    profile = launchProfile.load(ARGV, "gzdoom")
+
+    assert profile["command"] == launch.command() and profile["record"]
+    assert profile["command"][profile["demoIndex"]] == launch.demoPath()
+    assert launchProfile.load(ARGV, "dsda") is None
+    assert launchProfile.load(ARGV + [ "-s", "3" ], "gzdoom") is None
+
+
+def testEnvironmentChangesMissTheProfile(tree, monkeypatch):
+    saved()
+    monkeypatch.setenv("DOOM_PLAYER", "other")
+
+    assert launchProfile.load(ARGV, "gzdoom") is None
+
+
+def testChangedFilesInvalidateTheProfile(tree):
+    launch = saved()
+    later(launch.targetPath())
+
+    assert launchProfile.load(ARGV, "gzdoom") is None
+
+    saved()
+    assert launchProfile.load(ARGV, "gzdoom") is not None
+
+
+def testNewAddonsInvalidateTheProfile(tree):
+    launch = saved()
+    with open(os.path.join(launch.addonDir(), "new.pk3"), "wb") as output:
+        output.write(b"addon")
+    later(launch.addonDir())
+
+    assert launchProfile.load(ARGV, "gzdoom") is None
+
+
+def testRemovedFilesInvalidateTheProfile(tree):
+    launch = saved()
+    os.remove(launch.targetPath())
+
+    assert launchProfile.load(ARGV, "gzdoom") is None
+
+
+def testUnreadableProfilesAreMisses(tree):
+    saved()
+    with open(launchProfile.profilePath(launchProfile.profileKey(ARGV, "gzdoom")), "w", encoding = "utf-8") as output:
+        output.write("{ broken")
+
+    assert launchProfile.load(ARGV, "gzdoom") is None
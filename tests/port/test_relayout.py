@@ -0,0 +1,68 @@
+import os
+
+import archive
+import attempts
+import dedup
+import relayout
+
+PATTERN = "{map}/{_}_{number}.lmp"
+
+
+def write(filePath, content = b"demo"):
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "wb") as output:
+        output.write(content)
+
+
+def defaults(**fields):
+    result = dict(relayout.DEFAULTS)
+    result.update({ "version": "4.11", "player": "cinnamon", "target": "TNT" }, **fields)
+    return result
+
+
+def target(demoBase, number):
+    return os.path.join(demoBase, "gzdoom", "4.11", "Cinnamon", "tnt", "map01",
+                        f"Cinnamon-tnt-map01-uv-max_{number:03d}.lmp")
+
+
+def testDestinationIsSpelledLikeLaunch(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    write(str(tmp_path / "old" / "map01" / "x_1.lmp"))
+
+    result = relayout.plan(str(tmp_path / "old"), PATTERN, defaults(category = "MAX"), demoBase)
+
+    assert result["errors"] == [] and result["collisions"] == {}
+    assert result["moves"] == [ (str(tmp_path / "old" / "map01" / "x_1.lmp"), target(demoBase, 1)) ]
+
+
+def testArchivesAreRefused(tmp_path):
+    demoDir = str(tmp_path / "old" / "map01")
+    write(os.path.join(demoDir, "x_1.lmp"))
+    write(os.path.join(demoDir, "x_2.lmp"))
+    archive.rewrite(demoDir, [ "x_2.lmp" ])
+    os.remove(os.path.join(demoDir, "x_2.lmp"))
+
+    result = relayout.plan(str(tmp_path / "old"), PATTERN, defaults(), str(tmp_path / "demos"))
+
+    assert [ path for path, _ in result["errors"] ] == [ f"map01/{archive.ARCHIVE_FILE}" ]
+
+
+def testApplyDropsIndexesAndMovesReferences(tmp_path):
+    demoBase = str(tmp_path / "demos")
+    sourceDir = os.path.join(demoBase, "old")
+    write(os.path.join(sourceDir, "map01", "x_1.lmp"))
+    attempts.writeIndex(os.path.join(sourceDir, "map01"), { "x": 2 })
+    dedup.writeManifest(demoBase, { "old/map01/x_2.lmp": "old/map01/x_1.lmp" })
+
+    result = relayout.plan(sourceDir, PATTERN, defaults(), demoBase)
+    journal = str(tmp_path / "journal.jsonl")
+
+    assert relayout.apply(result["moves"], journal) == []
+    assert relayout.updateManifest(result["moves"] + result["references"], demoBase) == 1
+    assert not os.path.exists(attempts.indexPath(os.path.join(sourceDir, "map01")))
+    assert dedup.readManifest(demoBase) == { dedup.relative(target(demoBase, 2), demoBase):
+                                             dedup.relative(target(demoBase, 1), demoBase) }
+
+    assert relayout.rollback(journal) == 2
+    assert os.path.exists(os.path.join(sourceDir, "map01", "x_1.lmp"))
+    assert not os.path.exists(os.path.dirname(target(demoBase, 1)))
@@ -0,0 +1,177 @@
+import hashlib
+import http.server
+import json
+import threading
+import urllib.parse
+
+TOKEN = "test-token"
+
+
+class FakeDrive:
+    """
+        In-memory Drive v3 endpoint for the tests: file listing with pages and name queries, the change feed, ranged
+        media downloads and resumable uploads.
+
+        Pages hold `pageSize` items at most, whatever the client asks for, so paging is exercised with a few files.
+        Upload chunks whose number (counting from 1) is in `failPuts` fail with a server error.
+    """
+
+    def __init__(self, pageSize = 2):
+        self.changes  = []
+        self.failPuts = set()
+        self.files    = {}
+        self.lock     = threading.Lock()
+        self.pageSize = pageSize
+        self.requests = []
+        self.sessions = {}
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handlerFor(self))
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add(self, name, content = b"", modifiedTime = "2024-01-01T00:00:00.000Z"):
+        with self.lock:
+            fileId = f"id{len(self.files) + 1}"
+            self.files[fileId] = {
+                "id":           fileId,
+                "name":         name,
+                "modifiedTime": modifiedTime,
+                "size":         str(len(content)),
+                "md5Checksum":  hashlib.md5(content).hexdigest(),
+                "trashed":      False,
+                "content":      bytes(content)
+            }
+            self.changes.append({ "fileId": fileId, "removed": False })
+            return fileId
+
+    def baseUrl(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def metadata(self, fileId):
+        return { key: value for key, value in self.files[fileId].items() if key != "content" }
+
+    def paths(self):
+        return [ path for _, path in self.requests ]
+
+    def trash(self, fileId):
+        with self.lock:
+            self.files[fileId]["trashed"] = True
+            self.changes.append({ "fileId": fileId, "removed": False })
+
+
+def page(items, token, pageSize):
+    start = int(token or 0)
+    return items[start:start + pageSize], (str(start + pageSize) if start + pageSize < len(items) else None)
+
+
+def handlerFor(drive):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *_):
+            pass
+
+        def reply(self, status, data = None, headers = None, body = None):
+            if data is not None:
+                body = json.dumps(data).encode("utf-8")
+            body = body or b""
+
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def route(self):
+            url = urllib.parse.urlsplit(self.path)
+            drive.requests.append((self.command, url.path))
+
+            if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+                self.reply(401, { "error": "unauthorized" })
+                return None, None
+            return url.path, dict(urllib.parse.parse_qsl(url.query))
+
+        def do_GET(self):
+            path, query = self.route()
+            if path is None:
+                return
+
+            with drive.lock:
+                if path == "/files":
+                    prefix = query["q"].split("'")[1]
+                    items = [ drive.metadata(fileId) for fileId, item in sorted(drive.files.items())
+                              if prefix in item["name"] and not item["trashed"] ]
+                    items, token = page(items, query.get("pageToken"), drive.pageSize)
+                    self.reply(200, dict({ "files": items }, **({ "nextPageToken": token } if token else {})))
+
+                elif path == "/changes/startPageToken":
+                    self.reply(200, { "startPageToken": str(len(drive.changes)) })
+
+                elif path == "/changes":
+                    start = int(query["pageToken"])
+                    items = [ dict(change, file = drive.metadata(change["fileId"]))
+                              for change in drive.changes[start:start + drive.pageSize] ]
+                    if start + drive.pageSize < len(drive.changes):
+                        self.reply(200, { "changes": items, "nextPageToken": str(start + drive.pageSize) })
+                    else:
+                        self.reply(200, { "changes": items, "newStartPageToken": str(len(drive.changes)) })
+
+                elif path.startswith("/files/") and query.get("alt") == "media":
+                    content = drive.files[path.split("/")[-1]]["content"]
+                    first, last = self.headers["Range"].split("=")[1].split("-")
+                    self.reply(206, body = content[int(first):int(last) + 1])
+
+                else:
+                    self.reply(404, { "error": "not found" })
+
+        def do_POST(self):
+            path, query = self.route()
+            if path is None:
+                return
+
+            metadata = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if path != "/upload/files" or query.get("uploadType") != "resumable":
+                self.reply(404, { "error": "not found" })
+                return
+
+            with drive.lock:
+                session = f"/upload/session/{len(drive.sessions) + 1}"
+                drive.sessions[session] = { "metadata": metadata, "data": b"" }
+            self.reply(200, headers = { "Location": f"{drive.baseUrl()}{session}" })
+
+        def do_PUT(self):
+            path, _ = self.route()
+            if path is None:
+                return
+
+            block = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            puts = [ method for method, _ in drive.requests ].count("PUT")
+            if puts in drive.failPuts:
+                self.reply(503, { "error": "unavailable" })
+                return
+
+            session = drive.sessions.get(path)
+            if session is None:
+                self.reply(404, { "error": "no such session" })
+                return
+
+            span, total = self.headers["Content-Range"].split(" ")[1].split("/")
+            if span != "*":
+                first = int(span.split("-")[0])
+                session["data"] = session["data"][:first] + block
+
+            if len(session["data"]) < int(total):
+                headers = { "Range": f"bytes=0-{len(session['data']) - 1}" } if session["data"] else {}
+                self.reply(308, headers = headers)
+                return
+
+            fileId = drive.add(session["metadata"]["name"], session["data"])
+            self.reply(200, drive.metadata(fileId))
+
+    return Handler
@@ -0,0 +1,87 @@
+import json
+import os
+
+import drive
+from fakeDrive import FakeDrive, TOKEN
+
+
+def listDemos(fake, cachePath):
+    return drive.listDemos(TOKEN, [ "Cinnamon" ], str(cachePath), fake.baseUrl(), concurrency = 2)
+
+
+def names(files):
+    return sorted([ entry["name"] for entry in files.values() ])
+
+
+def testListingFollowsEveryPage(tmp_path):
+    with FakeDrive(pageSize = 2) as fake:
+        for number in range(5):
+            fake.add(f"Cinnamon-doom2-map0{number + 1}-uv-max_000.lmp", b"demo")
+        fake.add("Other-doom2-map01-uv-max_000.lmp", b"demo")
+
+        files = listDemos(fake, tmp_path / "drive.json")
+
+    assert names(files) == [ f"Cinnamon-doom2-map0{number + 1}-uv-max_000.lmp" for number in range(5) ]
+    assert fake.paths().count("/files") == 3
+
+
+def testPrefixIsSentAsQuery(tmp_path):
+    with FakeDrive() as fake:
+        fake.add("Cinnamon-doom2-map01-uv-max_000.lmp")
+        fake.add("Other-doom2-map01-uv-max_000.lmp")
+
+        files = listDemos(fake, tmp_path / "drive.json")
+
+    assert names(files) == [ "Cinnamon-doom2-map01-uv-max_000.lmp" ]
+    assert drive.nameQuery("Cinnamon") == "name contains 'Cinnamon' and trashed = false"
+
+
+def testLaterRunsOnlyReadChanges(tmp_path):
+    cachePath = tmp_path / "drive.json"
+
+    with FakeDrive(pageSize = 2) as fake:
+        first = fake.add("Cinnamon-doom2-map01-uv-max_000.lmp", b"one")
+        fake.add("Cinnamon-doom2-map02-uv-max_000.lmp", b"two")
+        listDemos(fake, cachePath)
+
+        fake.requests.clear()
+        fake.trash(first)
+        fake.add("Cinnamon-doom2-map03-uv-max_000.lmp", b"three")
+        fake.add("Other-doom2-map03-uv-max_000.lmp", b"three")
+        files = listDemos(fake, cachePath)
+
+        assert "/files" not in fake.paths()
+        assert fake.paths().count("/changes") == 2
+
+    assert names(files) == [ "Cinnamon-doom2-map02-uv-max_000.lmp", "Cinnamon-doom2-map03-uv-max_000.lmp" ]
+
+    with open(cachePath, "r", encoding = "utf-8") as contents:
+        cache = json.load(contents)
+    assert cache["pageToken"] == "5"
+    assert names(cache["files"]) == names(files)
+
+
+def testUnchangedCacheIsNotRewritten(tmp_path):
+    cachePath = tmp_path / "drive.json"
+
+    with FakeDrive() as fake:
+        fake.add("Cinnamon-doom2-map01-uv-max_000.lmp")
+        listDemos(fake, cachePath)
+        stamp = os.stat(cachePath).st_mtime_ns
+
+        listDemos(fake, cachePath)
+
+    assert os.stat(cachePath).st_mtime_ns == stamp
+
+
+def testOtherPrefixesStartOver(tmp_path):
+    cachePath = tmp_path / "drive.json"
+
+    with FakeDrive() as fake:
+        fake.add("Cinnamon-doom2-map01-uv-max_000.lmp")
+        fake.add("Other-doom2-map01-uv-max_000.lmp")
+        listDemos(fake, cachePath)
+
+        files = drive.listDemos(TOKEN, [ "Cinnamon", "Other" ], str(cachePath), fake.baseUrl())
+
+    assert len(files) == 2
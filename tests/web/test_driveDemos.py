@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("google_auth_oauthlib")
+
+import driveDemos
+import driveSync
+
+
+def testListingKeepsItsTokenFile():
+    assert driveDemos.tokenPath(driveDemos.SCOPES) == "token.json"
+
+
+def testEveryScopeSetHasItsOwnTokenFile():
+    syncToken = driveDemos.tokenPath(driveSync.SYNC_SCOPES)
+
+    assert syncToken != driveDemos.tokenPath(driveDemos.SCOPES)
+    assert syncToken == driveDemos.tokenPath(list(reversed(driveSync.SYNC_SCOPES)))
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import threading
+import zipfile
+
+import pytest
+
+import driveSync
+from fakeDrive import FakeDrive, TOKEN
+
+PLAYER = "Cinnamon"
+
+
+def demoName(mapName, number = 0):
+    return f"{PLAYER}-doom2-{mapName}-uv-max_{number:03d}.lmp"
+
+
+def demoPath(baseDir, mapName, number = 0):
+    return os.path.join(baseDir, PLAYER, "doom2", mapName, demoName(mapName, number))
+
+
+def write(filePath, content):
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "wb") as output:
+        output.write(content)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+        @return Tuple of the demo tree, its gzdoom/4.11 directory and the cache directory.
+    """
+
+    demoBase = tmp_path / "demos"
+    baseDir = demoBase / "gzdoom" / "4.11"
+    baseDir.mkdir(parents = True)
+    (tmp_path / "cache").mkdir()
+    return str(demoBase), str(baseDir), str(tmp_path / "cache")
+
+
+def sync(fake, baseDir, cacheDir, **kwargs):
+    return driveSync.sync(TOKEN, baseDir, [ PLAYER ], baseUrl = fake.baseUrl(), uploadUrl = f"{fake.baseUrl()}/upload",
+                          cacheDir = cacheDir, **kwargs)
+
+
+def testDemoDirFollowsTheLayout():
+    assert driveSync.demoDir("base", demoName("map07", 3)) == os.path.join("base", PLAYER, "doom2", "map07")
+    assert driveSync.demoDir("base", "Some-Player-doom2-map07-uvf-max_003.lmp") == \
+        os.path.join("base", "Some-Player", "doom2", "map07")
+    assert driveSync.demoDir("base", "notes.txt") is None
+    assert driveSync.demoDir("base", "short-name_001.lmp") is None
+
+
+def testSyncDownloadsUploadsAndSkips(tree):
+    demoBase, baseDir, cacheDir = tree
+    write(demoPath(baseDir, "map01"), b"same demo")
+    write(demoPath(baseDir, "map02"), b"local only")
+    write(demoPath(baseDir, "map03"), b"mine")
+
+    with FakeDrive() as fake:
+        fake.add(demoName("map01"), b"same demo")
+        fake.add(demoName("map03"), b"theirs")
+        fake.add(demoName("map04"), b"remote only")
+
+        result = sync(fake, baseDir, cacheDir)
+        uploaded = { item["name"]: item["content"] for item in fake.files.values() }
+
+    assert result["failed"] == []
+    assert result["same"] == [ f"{PLAYER}/doom2/map01/{demoName('map01')}" ]
+    assert result["conflict"] == [ f"{PLAYER}/doom2/map03/{demoName('map03')}" ]
+    assert result["upload"] == [ demoPath(baseDir, "map02") ]
+
+    with open(demoPath(baseDir, "map04"), "rb") as contents:
+        assert contents.read() == b"remote only"
+    with open(demoPath(baseDir, "map03"), "rb") as contents:
+        assert contents.read() == b"mine"
+    assert uploaded[demoName("map02")] == b"local only"
+
+
+def testSecondSyncHasNothingToDo(tree):
+    demoBase, baseDir, cacheDir = tree
+    write(demoPath(baseDir, "map02"), b"local only")
+
+    with FakeDrive() as fake:
+        fake.add(demoName("map01"), b"remote only")
+        sync(fake, baseDir, cacheDir)
+        result = sync(fake, baseDir, cacheDir)
+
+    assert result["download"] == [] and result["upload"] == [] and result["conflict"] == []
+    assert len(result["same"]) == 2
+
+
+def testOtherPlayersStayLocal(tree):
+    demoBase, baseDir, cacheDir = tree
+    other = os.path.join(baseDir, "Other", "doom2", "map01", "Other-doom2-map01-uv-max_000.lmp")
+    write(other, b"not mine")
+
+    with FakeDrive() as fake:
+        results = [ sync(fake, baseDir, cacheDir) for _ in range(3) ]
+        names = [ item["name"] for item in fake.files.values() ]
+
+    assert all([ result["upload"] == [] for result in results ])
+    assert names == []
+
+
+def testDryRunOnlyPlans(tree):
+    demoBase, baseDir, cacheDir = tree
+    write(demoPath(baseDir, "map02"), b"local only")
+
+    with FakeDrive() as fake:
+        fake.add(demoName("map01"), b"remote only")
+        result = sync(fake, baseDir, cacheDir, dryRun = True)
+        names = [ item["name"] for item in fake.files.values() ]
+
+    assert len(result["download"]) == 1 and len(result["upload"]) == 1
+    assert not os.path.exists(demoPath(baseDir, "map01"))
+    assert names == [ demoName("map01") ]
+
+
+def testArchivedAndReferencedDemosAreLocal(tree):
+    demoBase, baseDir, cacheDir = tree
+    mapDir = os.path.dirname(demoPath(baseDir, "map01"))
+    os.makedirs(mapDir)
+    with zipfile.ZipFile(os.path.join(mapDir, "demos.zip"), "w") as container:
+        container.writestr(demoName("map01", 0), b"archived")
+
+    write(demoPath(baseDir, "map02", 0), b"kept")
+    with open(os.path.join(demoBase, ".dedup.json"), "w", encoding = "utf-8") as output:
+        reference = f"gzdoom/4.11/{PLAYER}/doom2/map02/{demoName('map02', 0)}"
+        output.write(f'{{ "version": 1, "references": {{ "gzdoom/4.11/{PLAYER}/doom2/map02/{demoName("map02", 1)}": '
+                     f'"{reference}" }} }}')
+
+    local = driveSync.localDemos(baseDir, os.path.join(cacheDir, "hashes.json"), demoBase)
+    assert sorted(local) == [ f"{PLAYER}/doom2/map01/{demoName('map01', 0)}",
+                              f"{PLAYER}/doom2/map02/{demoName('map02', 0)}",
+                              f"{PLAYER}/doom2/map02/{demoName('map02', 1)}" ]
+    assert local[f"{PLAYER}/doom2/map01/{demoName('map01', 0)}"]["md5Checksum"] == hashlib.md5(b"archived").hexdigest()
+
+    with FakeDrive() as fake:
+        fake.add(demoName("map01", 0), b"archived")
+        fake.add(demoName("map02", 1), b"kept")
+        result = sync(fake, baseDir, cacheDir)
+        uploaded = { item["name"]: item["content"] for item in fake.files.values() }
+
+    assert result["download"] == [] and result["conflict"] == [] and result["failed"] == []
+    assert len(result["same"]) == 2
+    assert uploaded[demoName("map02", 0)] == b"kept"
+    assert not os.path.exists(demoPath(baseDir, "map01", 0))
+    assert not os.path.exists(demoPath(baseDir, "map02", 1))
+
+
+def testSameNamesInOtherDirectoriesStayApart(tree):
+    demoBase, baseDir, cacheDir = tree
+    write(demoPath(baseDir, "map01"), b"one")
+    write(os.path.join(baseDir, "elsewhere", demoName("map01")), b"two")
+
+    local = driveSync.localDemos(baseDir, os.path.join(cacheDir, "hashes.json"), demoBase)
+
+    assert len(local) == 2
+
+
+def testUploadGoesInChunks(tree):
+    _, baseDir, cacheDir = tree
+    source = demoPath(baseDir, "map01")
+    write(source, bytes(range(10)) * 3)
+
+    with FakeDrive() as fake:
+        transfers = driveSync.Transfers(TOKEN, None, os.path.join(cacheDir, "sessions.json"), fake.baseUrl(),
+                                        f"{fake.baseUrl()}/upload", chunkSize = 8)
+        result = transfers.upload(source, threading.Lock())
+        puts = [ path for method, path in fake.requests if method == "PUT" ]
+
+    assert result["name"] == demoName("map01")
+    assert result["md5Checksum"] == hashlib.md5(bytes(range(10)) * 3).hexdigest()
+    assert len(puts) == 4
+
+
+def testInterruptedUploadResumes(tree):
+    _, baseDir, cacheDir = tree
+    source = demoPath(baseDir, "map01")
+    content = bytes(range(30))
+    write(source, content)
+    sessionPath = os.path.join(cacheDir, "sessions.json")
+
+    with FakeDrive() as fake:
+        fake.failPuts = { 2 }
+        transfers = driveSync.Transfers(TOKEN, None, sessionPath, fake.baseUrl(), f"{fake.baseUrl()}/upload",
+                                        chunkSize = 8)
+        with pytest.raises(OSError):
+            transfers.upload(source, threading.Lock())
+
+        transfers = driveSync.Transfers(TOKEN, None, sessionPath, fake.baseUrl(), f"{fake.baseUrl()}/upload",
+                                        chunkSize = 8)
+        result = transfers.upload(source, threading.Lock())
+        posts = [ path for method, path in fake.requests if method == "POST" ]
+
+    assert result["md5Checksum"] == hashlib.md5(content).hexdigest()
+    assert len(posts) == 1
+    assert driveSync.readJson(sessionPath) == {}
+
+
+def testDownloadResumesFromPart(tree):
+    _, baseDir, cacheDir = tree
+    destination = demoPath(baseDir, "map01")
+    content = bytes(range(20))
+    write(f"{destination}{driveSync.PART_SUFFIX}", content[:12])
+
+    with FakeDrive() as fake:
+        fileId = fake.add(demoName("map01"), content)
+        transfers = driveSync.Transfers(TOKEN, None, os.path.join(cacheDir, "sessions.json"), fake.baseUrl(),
+                                        chunkSize = 4)
+        transfers.download(fileId, len(content), hashlib.md5(content).hexdigest(), destination)
+        gets = [ path for method, path in fake.requests if method == "GET" ]
+
+    with open(destination, "rb") as contents:
+        assert contents.read() == content
+    assert len(gets) == 2
+
+
+def testCorruptDownloadIsDropped(tree):
+    _, baseDir, cacheDir = tree
+    destination = demoPath(baseDir, "map01")
+
+    with FakeDrive() as fake:
+        fileId = fake.add(demoName("map01"), b"content")
+        transfers = driveSync.Transfers(TOKEN, None, os.path.join(cacheDir, "sessions.json"), fake.baseUrl())
+
+        with pytest.raises(ValueError):
+            transfers.download(fileId, 7, "0" * 32, destination)
+
+    assert not os.path.exists(destination)
+    assert not os.path.exists(f"{destination}{driveSync.PART_SUFFIX}")
@@ -0,0 +1,134 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+import fetch
+
+
+class Server:
+    """
+        Local server answering conditional requests for the bodies in `pages`, recording the headers it was sent.
+    """
+
+    def __init__(self, pages, etag = True, lastModified = True):
+        self.pages    = pages
+        self.requests = []
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *_):
+                pass
+
+            def do_GET(self):
+                body = server.pages[self.path]
+                tag = f'"{len(body)}-{hash(body)}"'
+                stamp = "Wed, 21 Oct 2015 07:28:00 GMT"
+                server.requests.append((self.path, dict(self.headers)))
+
+                fresh = (etag and self.headers.get("If-None-Match") == tag or
+                         not etag and lastModified and self.headers.get("If-Modified-Since") == stamp)
+                self.send_response(304 if fresh else 200)
+                if etag:
+                    self.send_header("ETag", tag)
+                if lastModified:
+                    self.send_header("Last-Modified", stamp)
+                self.send_header("Content-Length", "0" if fresh else str(len(body)))
+                self.end_headers()
+                if not fresh:
+                    self.wfile.write(body)
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self._server.server_address[1]}{path}"
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path)
+
+
+def testFreshResponsesDontAskTheServer(directory):
+    with Server({ "/a": b"first" }) as server:
+        assert fetch.get(server.url("/a"), directory = directory) == b"first"
+        assert fetch.get(server.url("/a"), directory = directory) == b"first"
+
+    assert len(server.requests) == 1
+
+
+def testStaleResponsesRevalidateWithTheEtag(directory):
+    with Server({ "/a": b"first" }) as server:
+        fetch.get(server.url("/a"), maxAge = 0, directory = directory)
+        bodyPath, metaPath = fetch.entryPaths(server.url("/a"), directory)
+        fetched = fetch.readMeta(metaPath)["fetched"]
+
+        assert fetch.get(server.url("/a"), maxAge = 0, directory = directory) == b"first"
+        assert fetch.readMeta(metaPath)["fetched"] >= fetched
+
+        server.pages["/a"] = b"second"
+        assert fetch.get(server.url("/a"), maxAge = 0, directory = directory) == b"second"
+
+    headers = [ request[1] for request in server.requests ]
+    assert "If-None-Match" not in headers[0]
+    assert headers[1]["If-None-Match"] == headers[2]["If-None-Match"]
+    assert headers[1]["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def testLastModifiedAloneRevalidates(directory):
+    with Server({ "/a": b"first" }, etag = False) as server:
+        fetch.get(server.url("/a"), maxAge = 0, directory = directory)
+        with open(fetch.entryPaths(server.url("/a"), directory)[0], "wb") as output:
+            output.write(b"kept")
+
+        assert fetch.get(server.url("/a"), maxAge = 0, directory = directory) == b"kept"
+
+    assert "If-None-Match" not in server.requests[1][1]
+    assert server.requests[1][1]["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def testWithoutValidatorsTheBodyIsFetchedAgain(directory):
+    with Server({ "/a": b"first" }, etag = False, lastModified = False) as server:
+        fetch.get(server.url("/a"), maxAge = 0, directory = directory)
+        server.pages["/a"] = b"second"
+
+        assert fetch.get(server.url("/a"), maxAge = 0, directory = directory) == b"second"
+
+    assert "If-Modified-Since" not in server.requests[1][1]
+
+
+def testEvictionDropsTheLeastRecentlyUsed(directory):
+    pages = { f"/{name}": name.encode() * 100 for name in "abcd" }
+
+    with Server(pages) as server:
+        for number, name in enumerate("abc"):
+            fetch.get(server.url(f"/{name}"), directory = directory)
+            for filePath in fetch.entryPaths(server.url(f"/{name}"), directory):
+                os.utime(filePath, (1000 + number, 1000 + number))
+
+        fetch.get(server.url("/a"), directory = directory)
+        entrySize = sum([ os.path.getsize(filePath) for filePath in fetch.entryPaths(server.url("/a"), directory) ])
+        fetch.get(server.url("/d"), maxSize = 2 * entrySize + 10, directory = directory)
+
+    cached = [ name for name in "abcd" if os.path.exists(fetch.entryPaths(server.url(f"/{name}"), directory)[0]) ]
+    assert cached == [ "a", "d" ]
+
+
+def testEvictionKeepsTheNewestEvenIfTooLarge(directory):
+    with Server({ "/a": b"a" * 100, "/b": b"b" * 1000 }) as server:
+        fetch.get(server.url("/a"), directory = directory)
+        fetch.get(server.url("/b"), maxSize = 10, directory = directory)
+
+        assert not os.path.exists(fetch.entryPaths(server.url("/a"), directory)[0])
+        assert fetch.get(server.url("/b"), directory = directory) == b"b" * 1000
@@ -0,0 +1,154 @@
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+import wadData
+
+PAGES = {
+    "MAP01: Entryway": { "Zombieman": [ 4, 6, 8 ], "Shotgun guy": [ 0, 1, 2 ], "Shotgun": [ 1, 1, 1 ] },
+    "MAP02: Underhalls": { "Zombieman": [ 2, 2, 2 ], "Imp": [ 3, 5, 7 ] },
+    "MAP03: The Gantlet": { "Imp": [ 1, 1, 1 ], "Box of shells": [ 2, 2, 1 ] }
+}
+AMMO = { "Box of shells" }
+WEAPONS = { "Shotgun" }
+
+
+def pageHtml(things):
+    rows = { "Monsters": [], "Weapons": [], "Ammunition": [] }
+    for name, counts in things.items():
+        kind = "Weapons" if name in WEAPONS else "Ammunition" if name in AMMO else "Monsters"
+        cells = "".join([ f"<td>{count}</td>" for count in counts ])
+        rows[kind].append(f'<tr><td><a href="/wiki/{name.replace(" ", "_")}">{name}</a></td>{cells}</tr>')
+
+    tables = "".join([ f"<table><tr><th>{kind}</th><th>ITYTD</th><th>HMP</th><th>UV</th></tr>{''.join(lines)}</table>"
+                       for kind, lines in rows.items() ])
+    return f"<html><body><p>Intro</p>{tables}<table><tr><th>Multiplayer</th></tr></table></body></html>"
+
+
+class WikiServer:
+    """
+        Local fixture wiki serving the level pages of PAGES, recording how many requests it served at once.
+    """
+
+    def __init__(self, delay = 0.05):
+        self.active  = 0
+        self.delay   = delay
+        self.lock    = threading.Lock()
+        self.peak    = 0
+        self.served  = []
+
+        wiki = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *_):
+                pass
+
+            def do_GET(self):
+                with wiki.lock:
+                    wiki.active += 1
+                    wiki.peak = max(wiki.peak, wiki.active)
+                try:
+                    time.sleep(wiki.delay)
+                    page = urllib.parse.unquote(self.path.split("/wiki/", 1)[-1]).replace("_", " ").split("?")[0]
+                    wiki.served.append(page)
+
+                    if page not in PAGES:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+
+                    body = pageHtml(PAGES[page]).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=UTF-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with wiki.lock:
+                        wiki.active -= 1
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def baseUrl(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/wiki/"
+
+
+@pytest.fixture(autouse = True)
+def cacheDir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOOM_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("DOOM_WIKI_URL", raising = False)
+
+
+def testPageUrlQuotesNames():
+    assert wadData.pageUrl("MAP01: Entryway (Doom II)", "http://wiki/") == "http://wiki/MAP01:_Entryway_(Doom_II)"
+    assert wadData.pageUrl("http://elsewhere/page") == "http://elsewhere/page"
+
+
+def testMapPagesComeFromTheConfiguration(tmp_path):
+    configuration = tmp_path / "pwads.json"
+    configuration.write_text(json.dumps({ "scythe": { "wiki": list(PAGES) }, "other": {} }))
+
+    assert wadData.mapPages(str(configuration), "scythe") == list(PAGES)
+    with pytest.raises(ValueError):
+        wadData.mapPages(str(configuration), "other")
+    with pytest.raises(ValueError):
+        wadData.mapPages(str(configuration), "missing")
+
+
+def testWadDataTotalsEveryMap():
+    with WikiServer() as wiki:
+        result = wadData.wadData(list(PAGES), workers = 3, baseUrl = wiki.baseUrl())
+
+    assert [ record["page"] for record in result["maps"] ] == list(PAGES)
+    assert result["failed"] == []
+    assert result["maps"][1]["data"]["Monsters"] == { "Zombieman": [ 2, 2, 2 ], "Imp": [ 3, 5, 7 ] }
+    assert result["total"]["Monsters"] == {
+        "Zombieman":    [ 6, 8, 10 ],
+        "Shotgun Guy":  [ 0, 1, 2 ],
+        "Imp":          [ 4, 6, 8 ]
+    }
+    assert result["total"]["Weapons"] == { "Shotgun": [ 1, 1, 1 ] }
+    assert result["total"]["Ammunition"] == { "Box of Shells": [ 2, 2, 1 ] }
+
+
+def testFailedPagesAreReportedNotRaised():
+    with WikiServer() as wiki:
+        result = wadData.wadData([ "MAP01: Entryway", "MAP99: Missing" ], baseUrl = wiki.baseUrl())
+
+    assert result["failed"] == [ "MAP99: Missing" ]
+    assert result["maps"][1]["error"]
+    assert result["total"]["Monsters"]["Zombieman"] == [ 4, 6, 8 ]
+
+
+def testFetchesAreConcurrentAndBounded():
+    pages = list(PAGES) * 4
+
+    with WikiServer(delay = 0.1) as wiki:
+        records = list(wadData.levels([ f"{page}?copy={index}" for index, page in enumerate(pages) ], workers = 3,
+                                      baseUrl = wiki.baseUrl()))
+
+    assert len(records) == len(pages)
+    assert all([ record["error"] is None for record in records ])
+    assert 1 < wiki.peak <= 3
+
+
+def testPagesAreCachedBetweenRuns():
+    with WikiServer() as wiki:
+        wadData.wadData(list(PAGES), baseUrl = wiki.baseUrl())
+        wadData.wadData(list(PAGES), baseUrl = wiki.baseUrl())
+
+    assert len(wiki.served) == len(PAGES)